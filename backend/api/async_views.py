@@ -0,0 +1,277 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import gettext_lazy as _
+from django_filters import utils as filter_utils
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .authentication import StatelessJWTAuthentication
+from .cache import recipe_list_cache, short_link_cache, token_user_cache
+from .constants import MAX_LENGTH_SHORT_LINK
+from .filters import RecipeFilter
+from .ingredient_index import ingredient_index
+from .pagination import RecipePagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    IngredientSerializer, RecipeCreateSerializer, TagSerializer
+)
+from .views import IngredientViewSet, TagViewSet, recipe_queryset
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import Subscription
+
+# Методы, обрабатываемые асинхронно.
+READ_METHODS = ('GET', 'HEAD')
+
+
+async def authenticate(request):
+    """
+    Функция для асинхронной аутентификации в режиме AUTH_MODE.
+    Повторяет проверки и сообщения классов аутентификации.
+    """
+    if settings.AUTH_MODE == 'jwt':
+        # Проверка JWT не обращается к БД.
+        result = StatelessJWTAuthentication().authenticate(request)
+        if result is not None:
+            return result[0]
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != b'token':
+        return AnonymousUser()
+    if len(auth) == 1:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. No credentials provided.')
+        )
+    if len(auth) > 2:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. Token string should not contain spaces.')
+        )
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(
+            _('Invalid token header. '
+              'Token string should not contain invalid characters.')
+        )
+    cached = settings.AUTH_MODE != 'token'
+    if cached:
+        user = token_user_cache.lookup(key)
+        if user is not None:
+            return user
+    token = await token_user_cache.queryset(key).afirst()
+    if token is None:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    if cached:
+        token_user_cache.store(key, token.user)
+    return token.user
+
+
+def json_response(data, status=200):
+    response = HttpResponse(
+        FastJSONRenderer().render(data), content_type='application/json',
+        status=status
+    )
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def error_response(request, exc):
+    """Функция для ответа на исключение как у обработчика DRF."""
+    data = exc.detail
+    if not isinstance(data, (list, dict)):
+        data = {'detail': data}
+    response = json_response(data, exc.status_code)
+    if isinstance(exc, exceptions.AuthenticationFailed):
+        authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+        response['WWW-Authenticate'] = authenticator.authenticate_header(
+            request
+        )
+    return response
+
+
+def not_found(model):
+    """Функция для ошибки 404 с текстом как у get_object_or_404."""
+    return exceptions.NotFound(
+        f'No {model._meta.object_name} matches the given query.'
+    )
+
+
+def wants_json(request):
+    """Функция для проверки, что клиент ждет ответ в JSON."""
+    return (
+        'format' not in request.GET
+        and 'text/html' not in request.META.get('HTTP_ACCEPT', '')
+    )
+
+
+def async_read_view(sync_view, handler, supports=None):
+    """
+    Функция для создания асинхронного варианта представления.
+    Асинхронно обрабатываются GET и HEAD с ответом в JSON, остальные
+    запросы передаются синхронному представлению. В Django 4.2
+    асинхронный ORM выполняет запросы в потоке, но поток занят только
+    на время запроса к БД, а не на все соединение с клиентом.
+    handler(request, ...) - корутина, получающая Request DRF
+    с аутентифицированным пользователем. supports(request) - проверка,
+    что запрос обрабатывается асинхронно, иначе он передается
+    синхронному представлению.
+    """
+    delegate = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        drf_request = Request(request)
+        if (
+            request.method not in READ_METHODS or not wants_json(request)
+            or supports is not None and not supports(drf_request)
+        ):
+            return await delegate(request, *args, **kwargs)
+        try:
+            drf_request.user = await authenticate(request)
+            return await handler(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(request, exc)
+
+    # Атрибуты исходного представления для CSRF и бюджетов запросов.
+    view.csrf_exempt = True
+    view.cls = sync_view.cls
+    view.actions = getattr(sync_view, 'actions', None)
+    return view
+
+
+async def load_followed_ids(request):
+    """
+    Функция для загрузки подписок пользователя до сериализации,
+    чтобы сериализаторы не обращались к БД из асинхронного кода.
+    """
+    if request.user.is_authenticated:
+        request._followed_ids = frozenset([
+            followed_id async for followed_id in Subscription.objects.filter(
+                follower_id=request.user.id
+            ).values_list('followed_id', flat=True)
+        ])
+
+
+def filter_recipes(request):
+    """
+    Функция для фильтрации рецептов как в DjangoFilterBackend.
+    Выполняется в потоке: фильтры по тегам и поиску могут
+    перестраивать индексы в памяти с запросами к БД.
+    """
+    filterset = RecipeFilter(
+        request.query_params,
+        queryset=recipe_queryset(Recipe.objects.all(), request.user),
+        request=request
+    )
+    if not filterset.is_valid():
+        raise filter_utils.translate_validation(filterset.errors)
+    return filterset.qs
+
+
+def serialize_recipes(request, recipes, many=False):
+    return RecipeCreateSerializer(
+        recipes, many=many, context={'request': request}
+    ).data
+
+
+def is_page_mode(request):
+    return not RecipePagination().is_cursor_mode(request)
+
+
+async def recipe_list(request):
+    """
+    Список рецептов с постраничной пагинацией.
+    Страницы для анонимных пользователей кэшируются.
+    """
+    key = recipe_list_cache.make_key(request)
+    if key is not None:
+        cached = await sync_to_async(recipe_list_cache.get)(key)
+        if cached is not None:
+            return json_response(cached)
+    queryset = await sync_to_async(filter_recipes)(request)
+    pagination = RecipePagination.page_pagination_class()
+    paginator = pagination.django_paginator_class(
+        queryset, pagination.get_page_size(request)
+    )
+    paginator.count = await queryset.acount()
+    page_number = pagination.get_page_number(request, paginator)
+    try:
+        page = paginator.page(page_number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(pagination.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+    page.object_list = [recipe async for recipe in page.object_list]
+    pagination.page, pagination.request = page, request
+    await load_followed_ids(request)
+    data = pagination.get_paginated_response(
+        serialize_recipes(request, page.object_list, many=True)
+    ).data
+    if key is not None:
+        recipe_list_cache.set(key, data)
+    return json_response(data)
+
+
+async def recipe_detail(request, pk):
+    queryset = await sync_to_async(filter_recipes)(request)
+    recipe = await queryset.filter(pk=pk).afirst()
+    if recipe is None:
+        raise not_found(Recipe)
+    await load_followed_ids(request)
+    return json_response(serialize_recipes(request, recipe))
+
+
+def catalog_views(viewset, model, serializer_class, search=None):
+    """
+    Функция для создания обработчиков списка и объекта справочника.
+    Полный список отдается готовым содержимым справочника,
+    search(request) - поиск по параметрам запроса в потоке.
+    """
+
+    def get_data():
+        return serializer_class(model.objects.all(), many=True).data
+
+    async def list_view(request):
+        if not request.query_params:
+            return await viewset.catalog.aresponse(request._request, get_data)
+        if search is not None:
+            objects = await sync_to_async(search)(request)
+        else:
+            objects = [obj async for obj in model.objects.all()]
+        return json_response(serializer_class(objects, many=True).data)
+
+    async def detail_view(request, pk):
+        obj = await model.objects.filter(pk=pk).afirst()
+        if obj is None:
+            raise not_found(model)
+        return json_response(serializer_class(obj).data)
+
+    return list_view, detail_view
+
+
+def search_ingredients(request):
+    name = request.query_params.get('name')
+    if name:
+        return ingredient_index.search(name)
+    return list(Ingredient.objects.all())
+
+
+tag_list, tag_detail = catalog_views(TagViewSet, Tag, TagSerializer)
+ingredient_list, ingredient_detail = catalog_views(
+    IngredientViewSet, Ingredient, IngredientSerializer, search_ingredients
+)
+
+
+async def recipe_redirect(request, short_link):
+    recipe_id = None
+    if len(short_link) <= MAX_LENGTH_SHORT_LINK:
+        recipe_id = await short_link_cache.aresolve(short_link)
+    if recipe_id is None:
+        raise exceptions.NotFound()
+    return redirect(Recipe(pk=recipe_id).get_absolute_url())
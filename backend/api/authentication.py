@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import token_user_cache
+
+User = get_user_model()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кэшем процесса для пары токен-пользователь.
+    Повторные запросы с тем же токеном не обращаются к БД.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_user_cache.lookup(key)
+        if user is not None:
+            return user, Token(key=key, user=user)
+        user, token = super().authenticate_credentials(key)
+        token_user_cache.store(key, user)
+        return user, token
+
+
+def stateless_user(user_id):
+    """
+    Функция для получения пользователя по id без запроса к БД.
+    Остальные поля отложены: они загружаются при первом обращении,
+    а save() сохраняет только загруженные поля.
+    """
+    return User.from_db(
+        DEFAULT_DB_ALIAS,
+        [User._meta.get_field(api_settings.USER_ID_FIELD).attname],
+        [user_id]
+    )
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без обращения к БД.
+    Токен доступа живет ACCESS_TOKEN_LIFETIME, деактивация
+    и смена пароля проверяются при его обновлении.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        return stateless_user(user_id)
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """Обновление JWT только для активного пользователя с прежним паролем."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(**{
+            api_settings.USER_ID_FIELD: refresh.get(
+                api_settings.USER_ID_CLAIM
+            )
+        }).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        if api_settings.CHECK_REVOKE_TOKEN and refresh.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code='password_changed'
+            )
+        return super().validate(attrs)
@@ -0,0 +1,589 @@
+import copy
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import urls as api_urls
+from .ingredient_index import IngredientIndex
+from .renderers import FastJSONRenderer, JSONFragment
+from .views import RecipeViewSet
+from recipes.dataset import SEED_PASSWORD, SEED_USERNAME_PREFIX
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart
+from users.models import Subscription
+
+User = get_user_model()
+
+# Кол-во авторов в подписках и их рецептов в сценарии
+# user-subscriptions-large.
+LARGE_SUBSCRIPTIONS = 100
+LARGE_SUBSCRIPTION_RECIPES = 10
+# Изображение 1x1 в формате PNG для сценариев с загрузкой картинок.
+PIXEL_PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+
+
+class Scenario:
+    """
+    Сценарий запроса к маршруту API.
+    Значения kwargs и data могут быть функциями от контекста
+    с id объектов синтетического набора данных. settings - настройки,
+    переопределяемые на время сценария. namespace - пространство имен
+    маршрута, None для маршрутов вне api.urls. setup - функция
+    от контекста, создающая данные сценария в транзакции с откатом.
+    """
+
+    def __init__(self, name, route, method='get', auth=None, kwargs=None,
+                 query='', data=None, settings=None, namespace='api',
+                 setup=None):
+        self.name = name
+        self.route = route
+        self.method = method
+        self.auth = auth
+        self.kwargs = kwargs
+        self.query = query
+        self.data = data
+        self.settings = settings or {}
+        self.namespace = namespace
+        self.setup = setup
+
+    def resolve(self, value, context):
+        return value(context) if callable(value) else value
+
+    def url(self, context):
+        route = (
+            f'{self.namespace}:{self.route}' if self.namespace else self.route
+        )
+        url = reverse(route, kwargs=self.resolve(self.kwargs, context))
+        return f'{url}?{self.query}' if self.query else url
+
+
+def follow_prolific_authors(context):
+    """
+    Функция для замены подписок пользователя сценария на
+    LARGE_SUBSCRIPTIONS авторов, у каждого из которых не меньше
+    LARGE_SUBSCRIPTION_RECIPES рецептов. Не хватающие авторы
+    и рецепты создаются.
+    """
+    user = context['user']
+    authors = list(
+        User.objects.exclude(id=user.id).annotate(
+            recipes_total=Count('recipes')
+        ).order_by('-recipes_total', 'id')[:LARGE_SUBSCRIPTIONS]
+    )
+    authors += User.objects.bulk_create(
+        User(
+            username=f'benchmark-author-{number}',
+            email=f'benchmark-author-{number}@example.com',
+            first_name='Автор', last_name=str(number)
+        )
+        for number in range(LARGE_SUBSCRIPTIONS - len(authors))
+    )
+    Recipe.objects.bulk_create(
+        Recipe(
+            author=author, name=f'Рецепт {author.pk}-{number}',
+            text='Рецепт для замера подписок.', cooking_time=10
+        )
+        for author in authors
+        for number in range(
+            getattr(author, 'recipes_total', 0), LARGE_SUBSCRIPTION_RECIPES
+        )
+    )
+    Subscription.objects.filter(follower=user).delete()
+    Subscription.objects.bulk_create(
+        Subscription(follower=user, followed=author) for author in authors
+    )
+
+
+def recipe_data(context):
+    return {
+        'name': 'Рецепт для замера', 'text': 'Описание', 'cooking_time': 10,
+        'image': PIXEL_PNG, 'tags': [context['tag']],
+        'ingredients': [
+            {'id': ingredient, 'amount': 10}
+            for ingredient in context['ingredients']
+        ],
+    }
+
+
+SCENARIOS = (
+    Scenario('api-root', 'api-root', auth='user'),
+    Scenario('tag-list', 'tag-list'),
+    Scenario('tag-detail', 'tag-detail',
+             kwargs=lambda ctx: {'pk': ctx['tag']}),
+    Scenario('ingredient-list', 'ingredient-list'),
+    Scenario('ingredient-list-search', 'ingredient-list',
+             query='name=Ингредиент 1'),
+    Scenario('ingredient-list-search-lower', 'ingredient-list',
+             query='name=ингредиент 1'),
+    Scenario('ingredient-list-search-substring', 'ingredient-list',
+             query='name=диент 12'),
+    Scenario('ingredient-list-search-typo', 'ingredient-list',
+             query='name=Ингридиент 12'),
+    Scenario('ingredient-detail', 'ingredient-detail',
+             kwargs=lambda ctx: {'pk': ctx['ingredients'][0]}),
+    Scenario('recipe-list', 'recipe-list'),
+    Scenario('recipe-list-user', 'recipe-list', auth='user'),
+    # Тот же список без кэша представлений рецептов.
+    Scenario('recipe-list-user-uncached', 'recipe-list', auth='user',
+             settings={'RECIPE_CACHE_TIMEOUT': 0}),
+    Scenario('recipe-list-tags', 'recipe-list',
+             query='tags=seed-tag-0&tags=seed-tag-1'),
+    Scenario('recipe-list-search', 'recipe-list', query='search=борщ'),
+    Scenario('recipe-list-search-tags', 'recipe-list',
+             query='search=борщ&tags=seed-tag-0&tags=seed-tag-1'),
+    Scenario('recipe-list-search-user', 'recipe-list', auth='user',
+             query='search=борщ'),
+    Scenario('recipe-list-popular', 'recipe-list',
+             query='ordering=-popularity'),
+    Scenario('recipe-list-favorited', 'recipe-list', auth='user',
+             query='is_favorited=1'),
+    Scenario('recipe-list-cursor', 'recipe-list',
+             query='pagination=cursor'),
+    Scenario('recipe-create', 'recipe-list', 'post', 'user',
+             data=recipe_data),
+    Scenario('recipe-detail', 'recipe-detail',
+             kwargs=lambda ctx: {'pk': ctx['recipe']}),
+    Scenario('recipe-detail-user', 'recipe-detail', auth='user',
+             kwargs=lambda ctx: {'pk': ctx['recipe']}),
+    Scenario('recipe-detail-user-uncached', 'recipe-detail', auth='user',
+             kwargs=lambda ctx: {'pk': ctx['recipe']},
+             settings={'RECIPE_CACHE_TIMEOUT': 0}),
+    Scenario('recipe-update', 'recipe-detail', 'patch', 'user',
+             kwargs=lambda ctx: {'pk': ctx['own_recipe']}, data=recipe_data),
+    Scenario('recipe-delete', 'recipe-detail', 'delete', 'user',
+             kwargs=lambda ctx: {'pk': ctx['own_recipe']}),
+    Scenario('recipe-get-link', 'recipe-get-short-link',
+             kwargs=lambda ctx: {'pk': ctx['recipe']}),
+    Scenario('recipe-redirect', 'recipe-redirect', namespace=None,
+             kwargs=lambda ctx: {'short_link': ctx['short_link']}),
+    Scenario('recipe-redirect-unknown', 'recipe-redirect', namespace=None,
+             kwargs={'short_link': 'zzzzzz'}),
+    Scenario('recipe-favorite-add', 'recipe-favorite', 'post', 'user',
+             kwargs=lambda ctx: {'pk': ctx['recipe']}),
+    Scenario('recipe-favorite-remove', 'recipe-favorite', 'delete', 'user',
+             kwargs=lambda ctx: {'pk': ctx['favorite_recipe']}),
+    Scenario('recipe-cart-add', 'recipe-shopping-cart', 'post', 'user',
+             kwargs=lambda ctx: {'pk': ctx['recipe']}),
+    Scenario('recipe-cart-remove', 'recipe-shopping-cart', 'delete', 'user',
+             kwargs=lambda ctx: {'pk': ctx['cart_recipe']}),
+    Scenario('recipe-favorite-bulk-add', 'recipe-favorite-bulk', 'post',
+             'user', data=lambda ctx: {'recipes': ctx['recipes']}),
+    Scenario('recipe-favorite-bulk-remove', 'recipe-favorite-bulk', 'delete',
+             'user', data=lambda ctx: {'recipes': ctx['favorite_recipes']}),
+    Scenario('recipe-cart-bulk-add', 'recipe-shopping-cart-bulk', 'post',
+             'user', data=lambda ctx: {'recipes': ctx['recipes']}),
+    Scenario('recipe-cart-bulk-remove', 'recipe-shopping-cart-bulk',
+             'delete', 'user',
+             data=lambda ctx: {'recipes': ctx['cart_recipes']}),
+    Scenario('shopping-cart-txt', 'recipe-download-shopping-cart',
+             auth='user'),
+    Scenario('shopping-cart-csv', 'recipe-download-shopping-cart',
+             auth='user', query='format=csv'),
+    Scenario('shopping-cart-pdf', 'recipe-download-shopping-cart',
+             auth='user', query='format=pdf'),
+    Scenario('recipe-cache-stats', 'recipe-cache-stats', auth='staff'),
+    Scenario('metrics', 'metrics', auth='staff'),
+    Scenario('user-list', 'users-list'),
+    Scenario('user-create', 'users-list', 'post', data=lambda ctx: {
+        'email': 'benchmark@example.com', 'username': 'benchmark',
+        'first_name': 'Замер', 'last_name': 'Замер',
+        'password': 'benchmark-password',
+    }),
+    Scenario('user-detail', 'users-detail',
+             kwargs=lambda ctx: {'id': ctx['author']}),
+    Scenario('user-me', 'users-me', auth='user'),
+    Scenario('user-avatar-put', 'users-change-avatar', 'put', 'user',
+             data={'avatar': PIXEL_PNG}),
+    Scenario('user-avatar-delete', 'users-change-avatar', 'delete', 'user'),
+    Scenario('user-subscriptions', 'users-subscriptions', auth='user',
+             query='recipes_limit=3'),
+    Scenario('user-subscriptions-large', 'users-subscriptions',
+             auth='user', query='limit=100&recipes_limit=10',
+             setup=follow_prolific_authors),
+    Scenario('user-subscribe', 'users-subscribe', 'post', 'user',
+             kwargs=lambda ctx: {'id': ctx['author']}),
+    Scenario('user-unsubscribe', 'users-subscribe', 'delete', 'user',
+             kwargs=lambda ctx: {'id': ctx['followed']}),
+    Scenario('user-set-password', 'users-set-password', 'post', 'user',
+             data={
+                 'current_password': SEED_PASSWORD,
+                 'new_password': 'benchmark-new-password',
+             }),
+    Scenario('token-login', 'login', 'post', data=lambda ctx: {
+        'email': ctx['email'], 'password': SEED_PASSWORD,
+    }),
+    Scenario('token-logout', 'logout', 'post', 'user'),
+    Scenario('jwt-create', 'jwt-create', 'post', data=lambda ctx: {
+        'email': ctx['email'], 'password': SEED_PASSWORD,
+    }),
+    Scenario('jwt-refresh', 'jwt-refresh', 'post',
+             data=lambda ctx: {'refresh': ctx['refresh']}),
+    Scenario('jwt-verify', 'jwt-verify', 'post',
+             data=lambda ctx: {'token': ctx['refresh']}),
+)
+
+# Маршруты без сценариев и причины их исключения.
+SKIPPED_ROUTES = {
+    **{
+        route: 'требует токена из письма'
+        for route in (
+            'users-activation', 'users-resend-activation',
+            'users-reset-password', 'users-reset-password-confirm',
+            'users-reset-username', 'users-reset-username-confirm',
+            'users-set-username',
+        )
+    },
+    **{
+        route: 'дублирует маршрут users-* из djoser.urls'
+        for route in (
+            'user-list', 'user-activation', 'user-me',
+            'user-resend-activation', 'user-reset-password',
+            'user-reset-password-confirm', 'user-reset-username',
+            'user-reset-username-confirm', 'user-set-password',
+            'user-set-username', 'user-detail',
+        )
+    },
+}
+
+
+def api_routes(patterns=None):
+    """Функция для получения имен всех маршрутов api.urls."""
+    routes = set()
+    for pattern in api_urls.urlpatterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            routes |= api_routes(pattern.url_patterns)
+        elif pattern.name:
+            routes.add(pattern.name)
+    return routes
+
+
+def uncovered_routes():
+    """Функция для получения маршрутов без сценариев и исключений."""
+    covered = {scenario.route for scenario in SCENARIOS}
+    return sorted(api_routes() - covered - set(SKIPPED_ROUTES))
+
+
+def percentile(values, percent):
+    """Функция для расчета перцентиля отсортированной выборки."""
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (
+        position - lower
+    )
+
+
+class BenchmarkRunner:
+    """
+    Замер маршрутов API через тестовый клиент на синтетическом наборе
+    данных. Изменяющие запросы выполняются в транзакции с откатом,
+    поэтому набор данных не меняется между повторами.
+    """
+
+    def __init__(self, iterations=30, warmup=3):
+        self.iterations = iterations
+        self.warmup = warmup
+
+    def build_context(self):
+        """Метод для выбора объектов набора данных для сценариев."""
+        user = User.objects.filter(
+            username__startswith=SEED_USERNAME_PREFIX
+        ).order_by('id').first()
+        if user is None:
+            raise LookupError('Синтетический набор данных не найден.')
+        followed = Subscription.objects.filter(follower=user).values_list(
+            'followed_id', flat=True
+        )
+        used = Recipe.objects.filter(author=user).values_list('id', flat=True)
+        favorites = Favorite.objects.filter(user=user).values_list(
+            'recipe_id', flat=True
+        )
+        carts = ShoppingCart.objects.filter(user=user).values_list(
+            'recipe_id', flat=True
+        )
+        recipes = Recipe.objects.exclude(id__in=used).exclude(
+            id__in=favorites
+        ).exclude(id__in=carts).order_by('id')
+        recipe = recipes.first()
+        refresh = RefreshToken.for_user(user)
+        return {
+            'user': user,
+            'email': user.email,
+            'token': Token.objects.get_or_create(user=user)[0].key,
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'author': User.objects.exclude(id=user.id).exclude(
+                id__in=followed
+            ).order_by('id').values_list('id', flat=True).first(),
+            'followed': followed.first(),
+            'own_recipe': used.first(),
+            'recipe': recipe.pk,
+            'short_link': recipe.short_link,
+            'recipes': list(recipes.values_list('id', flat=True)[:5]),
+            'favorite_recipe': favorites.first(),
+            'favorite_recipes': list(favorites[:5]),
+            'cart_recipe': carts.first(),
+            'cart_recipes': list(carts[:5]),
+            'tag': recipe.tags.values_list('id', flat=True).first(),
+            'ingredients': list(
+                recipe.recipe_ingredients.values_list(
+                    'ingredient_id', flat=True
+                )[:3]
+            ),
+        }
+
+    def client(self, scenario, context):
+        client = APIClient()
+        if scenario.auth == 'user' and settings.AUTH_MODE == 'jwt':
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {context["access"]}'
+            )
+        elif scenario.auth == 'user':
+            client.credentials(HTTP_AUTHORIZATION=f'Token {context["token"]}')
+        elif scenario.auth == 'staff':
+            staff = copy.copy(context['user'])
+            staff.is_staff = True
+            client.force_authenticate(staff)
+        return client
+
+    def request(self, scenario, client, url, data):
+        """Метод для выполнения запроса с чтением всего ответа."""
+        with transaction.atomic():
+            response = getattr(client, scenario.method)(
+                url, data=data, format='json'
+            )
+            if response.streaming:
+                content = b''.join(response.streaming_content)
+            else:
+                content = response.content
+            if scenario.method != 'get':
+                transaction.set_rollback(True)
+        return response.status_code, len(content)
+
+    def run_scenario(self, scenario, context):
+        if scenario.setup is None:
+            return self.measure(scenario, context)
+        with transaction.atomic():
+            scenario.setup(context)
+            result = self.measure(scenario, context)
+            transaction.set_rollback(True)
+        return result
+
+    def measure(self, scenario, context):
+        client = self.client(scenario, context)
+        url = scenario.url(context)
+        data = scenario.resolve(scenario.data, context)
+        timings, queries = [], []
+        with override_settings(**scenario.settings):
+            for _ in range(self.warmup):
+                self.request(scenario, client, url, data)
+            for _ in range(self.iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    status, size = self.request(scenario, client, url, data)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured.captured_queries))
+        timings.sort()
+        return {
+            'route': scenario.route,
+            'method': scenario.method.upper(),
+            'url': url,
+            'status': status,
+            'queries': max(queries),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'size_bytes': size,
+        }
+
+    def run(self, names=None, progress=None):
+        """Метод для замера сценариев и формирования отчета."""
+        context = self.build_context()
+        # Маршруты JWT подключаются только в режиме AUTH_MODE=jwt.
+        routes = api_routes()
+        endpoints = {}
+        for scenario in SCENARIOS:
+            if (
+                names and scenario.name not in names
+                or scenario.namespace == 'api'
+                and scenario.route not in routes
+            ):
+                continue
+            endpoints[scenario.name] = self.run_scenario(scenario, context)
+            if progress is not None:
+                progress(scenario.name, endpoints[scenario.name])
+        return {
+            'meta': {
+                'created_at': int(time.time()),
+                'vendor': connection.vendor,
+                'iterations': self.iterations,
+                'recipes': Recipe.objects.count(),
+                'users': User.objects.count(),
+                'auth_mode': settings.AUTH_MODE,
+            },
+            'endpoints': endpoints,
+            'skipped': SKIPPED_ROUTES,
+            'uncovered': uncovered_routes(),
+        }
+
+
+def compare(report, baseline, tolerance=0.25, min_delta_ms=1.0):
+    """
+    Функция для сравнения отчета с базовым.
+    Регрессией считается рост числа запросов, смена статуса ответа
+    или рост p95 больше чем на tolerance и на min_delta_ms.
+    """
+    regressions = []
+    for name, current in report['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        if current['status'] != previous['status']:
+            regressions.append(
+                f'{name}: статус {previous["status"]} -> {current["status"]}'
+            )
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        delta = current['p95_ms'] - previous['p95_ms']
+        if (
+            delta > min_delta_ms
+            and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+        ):
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]} -> '
+                f'{current["p95_ms"]} мс'
+            )
+    return regressions
+
+
+def query_reductions(report, baseline):
+    """Функция для получения сценариев с уменьшившимся числом запросов."""
+    reductions = []
+    for name, current in report['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is not None and current['queries'] < previous['queries']:
+            reductions.append(
+                f'{name}: запросов {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+    return reductions
+
+
+def page_data(limit=None):
+    """
+    Функция для получения данных полной страницы рецептов.
+    Возвращает данные с закодированными фрагментами из кэша
+    представлений и те же данные с разобранными фрагментами.
+    """
+    view = RecipeViewSet.as_view({'get': 'list'})
+    request = APIRequestFactory().get(
+        reverse('api:recipe-list'), {'limit': limit} if limit else {}
+    )
+    # Первый запрос заполняет кэш представлений рецептов.
+    view(request)
+    data = view(request).data
+    plain = dict(data, results=[
+        {
+            key: value.tolist() if isinstance(value, JSONFragment) else value
+            for key, value in recipe.items()
+        }
+        for recipe in data['results']
+    ])
+    return data, plain
+
+
+def benchmark_renderers(data, plain, iterations=1000):
+    """
+    Функция для замера рендеринга страницы JSONRenderer DRF
+    и FastJSONRenderer с orjson и без него, с фрагментами и без.
+    Возвращает среднее время в мкс и совпадение ответа с DRF.
+    """
+    stdlib = FastJSONRenderer()
+    stdlib.use_orjson = False
+    variants = {'drf': (JSONRenderer(), plain)}
+    if FastJSONRenderer.use_orjson:
+        variants['orjson'] = (FastJSONRenderer(), plain)
+        variants['orjson-fragments'] = (FastJSONRenderer(), data)
+    variants['stdlib'] = (stdlib, plain)
+    variants['stdlib-fragments'] = (stdlib, data)
+    expected = JSONRenderer().render(plain)
+    results = {}
+    for name, (renderer, value) in variants.items():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            content = renderer.render(value)
+        elapsed = (time.perf_counter() - started) / iterations
+        results[name] = {
+            'mean_us': round(elapsed * 1_000_000, 2),
+            'identical': content == expected,
+            'size_bytes': len(content),
+        }
+    for result in results.values():
+        result['speedup'] = round(
+            results['drf']['mean_us'] / result['mean_us'], 2
+        )
+    return results
+
+
+def ingredient_queries(names, count, seed=42):
+    """
+    Функция для выбора запросов автодополнения ингредиентов:
+    префиксов длиной от 1 до 4 символов случайных названий.
+    """
+    generator = random.Random(seed)
+    return [
+        name[:generator.randint(1, 4)]
+        for name in generator.sample(names, min(count, len(names)))
+    ]
+
+
+def benchmark_ingredient_search(queries, iterations=5):
+    """
+    Функция для замера поиска ингредиентов индексом в памяти
+    и прежним фильтром name__startswith в БД.
+    Возвращает среднее и p95 время запроса в мкс и ускорение.
+    """
+    index = IngredientIndex()
+    index.ensure_current()
+    variants = {
+        'db-startswith': lambda query: list(
+            Ingredient.objects.filter(name__startswith=query)
+        ),
+        'index': index.search,
+    }
+    results = {}
+    for name, search in variants.items():
+        durations, found = [], 0
+        for _ in range(iterations):
+            for query in queries:
+                started = time.perf_counter()
+                found += len(search(query))
+                durations.append(time.perf_counter() - started)
+        durations.sort()
+        results[name] = {
+            'mean_us': round(statistics.mean(durations) * 1_000_000, 2),
+            'p95_us': round(percentile(durations, 95) * 1_000_000, 2),
+            'mean_results': round(found / len(durations), 2),
+        }
+    for result in results.values():
+        result['speedup'] = round(
+            results['db-startswith']['mean_us'] / result['mean_us'], 2
+        )
+    return results
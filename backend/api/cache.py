@@ -0,0 +1,466 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from copy import copy
+from datetime import date
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from .constants import (
+    CATALOG_VERSION_KEY, INGREDIENT_CATALOG_VERSION_KEY, LOCAL_CACHE_BACKENDS,
+    RECIPE_COUNTER_FIELDS, RECIPE_LIST_CACHED_PARAMS, RECIPE_LIST_KEY,
+    RECIPE_LIST_VERSION_KEY, RECIPE_REPRESENTATION_KEY, RECIPE_VERSION_KEY,
+    SHOPPING_LIST_KEY, SHOPPING_LIST_VERSION_KEY, USER_AUTH_VERSION_KEY
+)
+from .pagination import RecipePagination
+from .renderers import JSONFragment
+from recipes.models import Recipe, ShoppingCart
+
+
+def new_version():
+    """Функция для генерации версии вида '<время>-<случайная часть>'."""
+    return f'{int(time.time())}-{uuid4().hex}'
+
+
+def version_timestamp(version):
+    """Функция для получения времени создания версии."""
+    return int(version.split('-', 1)[0])
+
+
+def get_versions(*keys):
+    """
+    Функция для получения версий по ключам.
+    Отсутствующие версии создаются, поэтому вытеснение версии из кэша
+    не может вернуть ключ к устаревшему значению.
+    """
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return tuple(versions[key] for key in keys)
+
+
+def get_version(key):
+    """Функция для получения версии по ключу с ее созданием при отсутствии."""
+    return get_versions(key)[0]
+
+
+def bump_version(key):
+    """Функция для смены версии по ключу."""
+    cache.set(key, new_version(), timeout=None)
+
+
+def bump_shopping_list_versions(user_ids):
+    """Функция для сброса готовых списков покупок пользователей."""
+    cache.set_many(
+        {
+            SHOPPING_LIST_VERSION_KEY.format(user_id): new_version()
+            for user_id in user_ids
+        },
+        timeout=None
+    )
+
+
+def bump_recipe_shopping_lists(recipe_id):
+    """Функция для сброса списков покупок, содержащих рецепт."""
+    bump_shopping_list_versions(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        )
+    )
+
+
+def shopping_list_key(user_id, report_format):
+    """
+    Функция для получения ключа готового списка покупок.
+    Ключ меняется при изменении корзины пользователя, справочника
+    ингредиентов и с наступлением нового дня (дата входит в отчет).
+    """
+    return SHOPPING_LIST_KEY.format(
+        user_id,
+        *get_versions(
+            SHOPPING_LIST_VERSION_KEY.format(user_id),
+            INGREDIENT_CATALOG_VERSION_KEY
+        ),
+        report_format, date.today().isoformat()
+    )
+
+
+class RecipeListCache:
+    """
+    Кэш страниц списка рецептов для анонимных пользователей.
+    Для них флаги избранного, корзины и подписки всегда ложны, поэтому
+    страница одинакова для всех. Ключ строится по нормализованным
+    параметрам и общей версии списков, которая меняется после фиксации
+    любого изменения рецептов, тегов, ингредиентов и авторов.
+    Счетчики избранного и корзин меняются при каждом добавлении рецепта,
+    поэтому в страницу не сохраняются и подставляются при чтении.
+    Ссылки next/previous берутся из запроса, заполнившего кэш, и могут
+    отличаться порядком параметров.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    @property
+    def stats(self):
+        """Счетчики попаданий, промахов и инвалидаций процесса."""
+        with self._lock:
+            return dict(self._stats)
+
+    def make_key(self, request):
+        """
+        Метод для получения ключа страницы текущей версии.
+        Возвращает None, если ответ зависит от пользователя или от
+        параметров вне RECIPE_LIST_CACHED_PARAMS. Версия читается
+        до запросов к БД, поэтому данные, прочитанные до фиксации
+        изменения, сохраняются только под прежней версией.
+        """
+        params = request.query_params
+        if (
+            not settings.RECIPE_LIST_CACHE_TIMEOUT
+            or request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or not RECIPE_LIST_CACHED_PARAMS.issuperset(params)
+        ):
+            return None
+        page = params.get('page', '1')
+        author = params.get('author', '')
+        normalized = (
+            request.build_absolute_uri('/'),
+            str(int(page)) if page.isdigit() else page,
+            RecipePagination.page_pagination_class().get_page_size(request),
+            str(int(author)) if author.isdigit() else author,
+            sorted(set(params.getlist('tags'))),
+        )
+        return RECIPE_LIST_KEY.format(
+            get_version(RECIPE_LIST_VERSION_KEY),
+            hashlib.sha256(repr(normalized).encode()).hexdigest()
+        )
+
+    def get(self, key):
+        """
+        Метод для получения страницы.
+        Текущие счетчики рецептов страницы загружаются одним запросом.
+        """
+        page = cache.get(key)
+        self._count('hits' if page is not None else 'misses')
+        if page is None:
+            return None
+        counters = {
+            recipe_id: dict(zip(RECIPE_COUNTER_FIELDS, values))
+            for recipe_id, *values in Recipe.objects.filter(
+                id__in=[recipe['id'] for recipe in page['results']]
+            ).values_list('id', *RECIPE_COUNTER_FIELDS)
+        }
+        empty = dict.fromkeys(RECIPE_COUNTER_FIELDS, 0)
+        return dict(page, results=[
+            dict(recipe, **counters.get(recipe['id'], empty))
+            for recipe in page['results']
+        ])
+
+    def set(self, key, page):
+        """
+        Метод для сохранения страницы без счетчиков рецептов.
+        Вложенные значения рецептов сохраняются закодированными
+        и отдаются без повторной сериализации и кодирования.
+        """
+        cache.set(
+            key,
+            dict(page, results=[
+                {
+                    field: (
+                        JSONFragment.encode(value)
+                        if isinstance(value, (dict, list)) else value
+                    )
+                    for field, value in recipe.items()
+                    if field not in RECIPE_COUNTER_FIELDS
+                }
+                for recipe in page['results']
+            ]),
+            timeout=settings.RECIPE_LIST_CACHE_TIMEOUT
+        )
+
+    def bump_version(self):
+        """
+        Метод для смены версии списков после фиксации транзакции.
+        Смена до фиксации позволила бы сохранить под новой версией
+        еще не измененные данные.
+        """
+        transaction.on_commit(lambda: bump_version(RECIPE_LIST_VERSION_KEY))
+        self._count('invalidations')
+
+
+recipe_list_cache = RecipeListCache()
+
+
+class RecipeRepresentationCache:
+    """
+    Кэш независимой от пользователя части представления рецепта.
+    Ключ содержит версию рецепта и каталога, поэтому любое изменение
+    рецепта, его тегов или ингредиентов делает старую запись недоступной.
+    Смена версий сбрасывает и страницы списка рецептов.
+    """
+
+    # Поля, сохраняемые закодированными в JSON.
+    fragment_fields = ('tags', 'ingredients')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    @property
+    def stats(self):
+        """Счетчики попаданий, промахов и инвалидаций процесса."""
+        with self._lock:
+            return dict(self._stats)
+
+    def make_keys(self, recipe_ids, base_url):
+        """
+        Метод для получения ключей представлений текущих версий
+        в виде {id рецепта: ключ}. Версии всех рецептов читаются
+        одним обращением к кэшу. Возвращает None, если кэш отключен
+        (RECIPE_CACHE_TIMEOUT=0).
+        """
+        if not settings.RECIPE_CACHE_TIMEOUT:
+            return None
+        *versions, catalog_version = get_versions(
+            *map(RECIPE_VERSION_KEY.format, recipe_ids), CATALOG_VERSION_KEY
+        )
+        return {
+            recipe_id: RECIPE_REPRESENTATION_KEY.format(
+                recipe_id, version, catalog_version, base_url
+            )
+            for recipe_id, version in zip(recipe_ids, versions)
+        }
+
+    def get_many(self, keys):
+        """Метод для получения представлений в виде {ключ: представление}."""
+        representations = cache.get_many(keys)
+        with self._lock:
+            self._stats['hits'] += len(representations)
+            self._stats['misses'] += len(keys) - len(representations)
+        return representations
+
+    def set_many(self, representations):
+        """
+        Метод для сохранения представлений {ключ: представление}.
+        Теги и ингредиенты сохраняются закодированными и вставляются
+        в ответ без повторного кодирования.
+        """
+        cache.set_many(
+            {
+                key: dict(representation, **{
+                    field: JSONFragment.encode(representation[field])
+                    for field in self.fragment_fields
+                })
+                for key, representation in representations.items()
+            },
+            timeout=settings.RECIPE_CACHE_TIMEOUT
+        )
+
+    def bump_recipe_version(self, recipe_id):
+        """
+        Метод для смены версии рецепта после фиксации его изменения.
+        Смена до фиксации позволила бы сохранить под новой версией
+        еще не измененное представление.
+        """
+        transaction.on_commit(
+            lambda: bump_version(RECIPE_VERSION_KEY.format(recipe_id))
+        )
+        recipe_list_cache.bump_version()
+        self._count('invalidations')
+
+    def bump_author_versions(self, author_id):
+        """
+        Метод для смены версий рецептов автора после фиксации
+        изменения его данных, входящих в представление рецепта.
+        """
+        recipe_ids = list(
+            Recipe.objects.filter(author_id=author_id).values_list(
+                'id', flat=True
+            )
+        )
+        if not recipe_ids:
+            return
+        transaction.on_commit(lambda: cache.set_many(
+            {
+                RECIPE_VERSION_KEY.format(recipe_id): new_version()
+                for recipe_id in recipe_ids
+            },
+            timeout=None
+        ))
+        recipe_list_cache.bump_version()
+        self._count('invalidations')
+
+    def bump_catalog_version(self):
+        """
+        Метод для смены общей версии каталога после фиксации.
+        Используется при изменении тегов и ингредиентов,
+        данные которых входят в представление каждого рецепта.
+        """
+        transaction.on_commit(lambda: bump_version(CATALOG_VERSION_KEY))
+        recipe_list_cache.bump_version()
+        self._count('invalidations')
+
+
+recipe_cache = RecipeRepresentationCache()
+
+
+class ShortLinkCache:
+    """
+    LRU-кэш процесса для соответствия короткой ссылки и id рецепта.
+    Коды не меняются после присвоения, поэтому найденные записи
+    хранятся до вытеснения; отсутствующие коды кэшируются на
+    SHORT_LINK_NEGATIVE_TIMEOUT секунд, так как код может появиться
+    у нового рецепта.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def lookup(self, short_link):
+        """
+        Метод для поиска в кэше без обращения к БД.
+        Возвращает пару (найдена ли запись, id рецепта).
+        """
+        with self._lock:
+            entry = self._entries.get(short_link)
+            if entry is not None:
+                recipe_id, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(short_link)
+                    return True, recipe_id
+        return False, None
+
+    def store(self, short_link, recipe_id):
+        expires = None
+        if recipe_id is None:
+            expires = time.monotonic() + settings.SHORT_LINK_NEGATIVE_TIMEOUT
+        with self._lock:
+            self._entries[short_link] = (recipe_id, expires)
+            self._entries.move_to_end(short_link)
+            while len(self._entries) > settings.SHORT_LINK_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return recipe_id
+
+    def queryset(self, short_link):
+        return Recipe.objects.filter(
+            short_link=short_link
+        ).values_list('id', flat=True)
+
+    def resolve(self, short_link):
+        """Метод для получения id рецепта по короткой ссылке."""
+        found, recipe_id = self.lookup(short_link)
+        if found:
+            return recipe_id
+        return self.store(short_link, self.queryset(short_link).first())
+
+    async def aresolve(self, short_link):
+        """Асинхронный вариант resolve."""
+        found, recipe_id = self.lookup(short_link)
+        if found:
+            return recipe_id
+        return self.store(
+            short_link, await self.queryset(short_link).afirst()
+        )
+
+    def discard(self, short_link):
+        """Метод для удаления записи при создании или удалении рецепта."""
+        with self._lock:
+            self._entries.pop(short_link, None)
+
+
+short_link_cache = ShortLinkCache()
+
+
+class TokenUserCache:
+    """
+    LRU-кэш процесса для соответствия токена и пользователя.
+    Запись действует AUTH_TOKEN_CACHE_TIMEOUT секунд и пока не сменилась
+    версия учетных данных пользователя в кэше default: версия меняется
+    при выходе, смене пароля, деактивации и любом изменении пользователя.
+    Сброс виден всем процессам только при общем кэше default
+    (Redis, Memcached, БД), поэтому с кэшем процесса вроде LocMemCache
+    кэш токенов отключен и каждый запрос проверяет токен в БД.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @property
+    def enabled(self):
+        """Включен ли кэш: кэш default общий для всех процессов."""
+        return settings.CACHES['default']['BACKEND'] not in (
+            LOCAL_CACHE_BACKENDS
+        )
+
+    def lookup(self, key):
+        """
+        Метод для поиска пользователя без обращения к БД.
+        Возвращается копия, так как представления изменяют request.user.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user, version, expires = entry
+        if (
+            expires > time.monotonic()
+            and version == get_version(USER_AUTH_VERSION_KEY.format(user.pk))
+        ):
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+            return copy(user)
+        self.discard(key)
+        return None
+
+    def store(self, key, user):
+        if not self.enabled:
+            return user
+        version = get_version(USER_AUTH_VERSION_KEY.format(user.pk))
+        expires = time.monotonic() + settings.AUTH_TOKEN_CACHE_TIMEOUT
+        with self._lock:
+            self._entries[key] = (copy(user), version, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return user
+
+    def queryset(self, key):
+        return Token.objects.select_related('user').filter(key=key)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        """Метод для сброса токенов пользователя во всех процессах."""
+        bump_version(USER_AUTH_VERSION_KEY.format(user_id))
+        with self._lock:
+            for key, (user, _, _) in list(self._entries.items()):
+                if user.pk == user_id:
+                    del self._entries[key]
+
+
+token_user_cache = TokenUserCache()
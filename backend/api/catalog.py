@@ -0,0 +1,121 @@
+import gzip
+import hashlib
+import threading
+
+import brotli
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .cache import get_version, version_timestamp
+from .renderers import FastJSONRenderer
+
+
+def parse_accept_encoding(header):
+    """
+    Функция для разбора заголовка Accept-Encoding.
+    Возвращает словарь {кодировка: q}, записи с некорректным
+    значением q пропускаются.
+    """
+    weights = {}
+    for item in header.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = None
+        if weight is not None:
+            weights[coding.lower()] = weight
+    return weights
+
+
+class CatalogPayload:
+    """
+    Заранее сериализованный и сжатый справочник.
+    Содержимое перестраивается только при смене версии справочника,
+    а условные запросы с совпадающим ETag обслуживаются без обращения к БД.
+    У каждой кодировки свой ETag, так как тела ответов различаются.
+    """
+
+    encodings = ('br', 'gzip')
+
+    def __init__(self, version_key):
+        self.version_key = version_key
+        self._lock = threading.Lock()
+        self._version = None
+        self._payload = {}
+
+    def build(self, data):
+        """Метод для сериализации и сжатия данных справочника."""
+        body = FastJSONRenderer().render(data)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self._payload = {
+            'identity': (f'"{digest}"', body),
+            'gzip': (f'"{digest}-gzip"', gzip.compress(body, mtime=0)),
+            'br': (f'"{digest}-br"', brotli.compress(body)),
+        }
+
+    def ensure_current(self, get_data):
+        """Метод для перестроения данных при смене версии справочника."""
+        version = get_version(self.version_key)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self.build(get_data())
+                    self._version = version
+        return version
+
+    def choose_encoding(self, request):
+        """
+        Метод для выбора сжатия с наибольшим q.
+        При равных q предпочтение отдается порядку encodings,
+        кодировки с q=0 не используются. Без заголовка и при отказе
+        от всех сжатий ответ отдается без сжатия.
+        """
+        weights = parse_accept_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        default = weights.get('*', 0)
+        best, best_weight = 'identity', 0
+        for encoding in self.encodings:
+            weight = weights.get(encoding, default)
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+        return best
+
+    def response(self, request, get_data):
+        """Метод для формирования ответа с учетом условных заголовков."""
+        return self.make_response(request, self.ensure_current(get_data))
+
+    async def aresponse(self, request, get_data):
+        """
+        Асинхронный вариант response.
+        Перестроение с запросами к БД выполняется в отдельном потоке.
+        """
+        version = get_version(self.version_key)
+        if version != self._version:
+            version = await sync_to_async(self.ensure_current)(get_data)
+        return self.make_response(request, version)
+
+    def make_response(self, request, version):
+        encoding = self.choose_encoding(request)
+        etag, body = self._payload[encoding]
+        last_modified = version_timestamp(version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
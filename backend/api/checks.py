@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from .constants import LOCAL_CACHE_BACKENDS
+
+
+@register()
+def check_token_cache(app_configs, **kwargs):
+    """
+    Проверка кэша для режимов аутентификации с кэшем токенов.
+    С кэшем процесса сброс токена не виден другим процессам,
+    поэтому кэш токенов отключается.
+    """
+    if settings.AUTH_MODE == 'token':
+        return []
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [Warning(
+        f'AUTH_MODE={settings.AUTH_MODE} использует кэш токенов, '
+        'но кэш default не общий для процессов.',
+        hint='Задайте CACHE_BACKEND, например Redis или Memcached, '
+             'иначе токены проверяются в БД на каждый запрос.',
+        id='api.W001',
+    )]
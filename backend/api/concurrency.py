@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+from .benchmark import percentile
+from recipes.dataset import SEED_USERNAME_PREFIX
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.utils import encode_short_link
+
+# Кол-во объектов набора данных, по которым распределяются запросы.
+SAMPLE_SIZE = 100
+# Кол-во существующих коротких ссылок на одну несуществующую.
+SHORT_LINK_HITS_PER_MISS = 3
+
+
+def read_paths():
+    """
+    Функция для получения путей маршрутов для чтения на синтетическом
+    наборе данных: ленты, рецепты, справочники и короткие ссылки.
+    """
+    recipes = list(Recipe.objects.filter(
+        author__username__startswith=SEED_USERNAME_PREFIX
+    ).order_by('id').values_list('id', 'short_link')[:SAMPLE_SIZE])
+    if not recipes:
+        raise LookupError('Синтетический набор данных не найден.')
+    tag = Tag.objects.values_list('slug', flat=True).first()
+    ingredient = Ingredient.objects.values_list('id', flat=True).first()
+    paths = [f'/api/recipes/?page={page}' for page in range(1, 11)]
+    paths += [f'/api/recipes/?tags={tag}', '/api/tags/', '/api/ingredients/']
+    paths.append(f'/api/ingredients/{ingredient}/')
+    for recipe_id, short_link in recipes:
+        paths += [f'/api/recipes/{recipe_id}/', f'/s/{short_link}/']
+    return paths
+
+
+def short_link_paths():
+    """
+    Функция для получения путей переадресации по коротким ссылкам:
+    существующих рецептов и кодов без рецепта, ответ на которые
+    кэшируется как промах. Пути перемешаны, чтобы промахи
+    распределялись по всем соединениям.
+    """
+    codes = list(Recipe.objects.exclude(short_link=None).order_by(
+        'id'
+    ).values_list('short_link', flat=True)[:SAMPLE_SIZE])
+    if not codes:
+        raise LookupError('Синтетический набор данных не найден.')
+    last = Recipe.objects.order_by('-id').values_list('id', flat=True)[0]
+    codes += [
+        encode_short_link(last + number)
+        for number in range(1, len(codes) // SHORT_LINK_HITS_PER_MISS + 1)
+    ]
+    random.Random(SAMPLE_SIZE).shuffle(codes)
+    return [f'/s/{code}/' for code in codes]
+
+
+class HttpConnection:
+    """
+    Соединение HTTP/1.1 с поддержкой keep-alive.
+    Переоткрывается, если сервер закрыл соединение после ответа.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def read_body(self, headers):
+        if headers.get('transfer-encoding') == 'chunked':
+            size = 0
+            while True:
+                chunk = int((await self.reader.readline()).strip(), 16)
+                await self.reader.readexactly(chunk + 2)
+                size += chunk
+                if not chunk:
+                    return size
+        length = int(headers.get('content-length', 0))
+        await self.reader.readexactly(length)
+        return length
+
+    async def get(self, path):
+        """Метод для GET-запроса. Возвращает статус и размер тела."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+        self.writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+            'Accept: application/json\r\n\r\n'.encode()
+        )
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *lines = head.decode('latin-1').split('\r\n')
+        headers = {}
+        for line in filter(None, lines):
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+        size = await self.read_body(headers)
+        if headers.get('connection') == 'close':
+            await self.close()
+        return int(status_line.split()[1]), size
+
+
+class LoadRunner:
+    """
+    Нагрузка на запущенный сервер по набору путей.
+    Каждое из connections соединений последовательно отправляет
+    запросы в течение duration секунд с паузой delay секунд между ними,
+    что моделирует медленных клиентов с открытыми соединениями.
+    """
+
+    def __init__(self, base_url, paths, connections=50, duration=10.0,
+                 delay=0.0):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.prefix = url.path.rstrip('/')
+        self.paths = paths
+        self.connections = connections
+        self.duration = duration
+        self.delay = delay
+
+    async def worker(self, number, deadline, latencies, errors):
+        connection = HttpConnection(self.host, self.port)
+        position = number
+        try:
+            while time.monotonic() < deadline:
+                path = self.prefix + self.paths[position % len(self.paths)]
+                position += self.connections
+                started = time.perf_counter()
+                try:
+                    status, _ = await connection.get(path)
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    await connection.close()
+                    errors['connection'] = errors.get('connection', 0) + 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if status >= 400:
+                    errors[status] = errors.get(status, 0) + 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+        finally:
+            await connection.close()
+
+    async def run(self):
+        """Метод для запуска нагрузки и расчета итогов."""
+        latencies, errors = [], {}
+        started = time.monotonic()
+        deadline = started + self.duration
+        await asyncio.gather(*(
+            self.worker(number, deadline, latencies, errors)
+            for number in range(self.connections)
+        ))
+        elapsed = time.monotonic() - started
+        latencies.sort()
+        result = {
+            'requests': len(latencies),
+            'errors': {str(key): value for key, value in errors.items()},
+            'rps': round(len(latencies) / elapsed, 1),
+        }
+        for percent in (50, 95, 99):
+            result[f'p{percent}_ms'] = round(
+                percentile(latencies, percent) * 1000, 3
+            ) if latencies else None
+        return result
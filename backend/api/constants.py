@@ -8,6 +8,12 @@ INGREDIENT_NAME_MAX_LENGTH: int = 128
 INGREDIENT_UNIT_MAX_LENGTH: int = 64
 # Константа для длины короткой ссылки модели Recipe.
 MAX_LENGTH_SHORT_LINK: int = 6
+# Алфавит кодирования коротких ссылок.
+SHORT_LINK_ALPHABET: str = (
+    '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+# Кол-во тегов, учитываемых в битовой маске тегов рецепта.
+TAG_MASK_BITS: int = 63
 # Константа для длины поля названия модели Recipe.
 RECIPE_NAME_MAX_LENGTH: int = 256
 # Константа для минимального времени приготовления.
@@ -42,6 +48,8 @@ DUPLICATE_OF_TAG_CREATE_ERROR: str = (
 DUPLICATE_OF_RECIPE_ADD_CART: str = (
     'Данный рецепт уже добавлен в список покупок или избранное.'
 )
+# Максимальное кол-во рецептов в одном запросе к избранному/корзине.
+BULK_RECIPES_MAX_COUNT: int = 100
 # Константа для несуществующего рецепта.
 UNEXIST_RECIPE_CREATE_ERROR: str = (
     'Данный рецепт не существует или удален.'
@@ -50,3 +58,77 @@ UNEXIST_RECIPE_CREATE_ERROR: str = (
 UNEXIST_SHOPPING_CART_ERROR: str = (
     'Данный список рецептов не существует или удален.'
 )
+# Ключ кэша для версии рецепта.
+RECIPE_VERSION_KEY: str = 'recipe_version:{}'
+# Ключ кэша для общей версии каталога (теги, ингредиенты, авторы).
+CATALOG_VERSION_KEY: str = 'catalog_version'
+# Поля пользователя, входящие в представление автора рецепта.
+RECIPE_AUTHOR_FIELDS: tuple = (
+    'email', 'username', 'first_name', 'last_name', 'avatar',
+    'avatar_variants'
+)
+# Ключ кэша для представления рецепта.
+RECIPE_REPRESENTATION_KEY: str = 'recipe_representation:{}:{}:{}:{}'
+# Ключ кэша для общей версии списков рецептов.
+RECIPE_LIST_VERSION_KEY: str = 'recipe_list_version'
+# Ключ кэша для страницы списка рецептов анонимного пользователя.
+RECIPE_LIST_KEY: str = 'recipe_list:{}:{}'
+# Счетчики рецепта, которые не хранятся в кэше страниц списка рецептов.
+RECIPE_COUNTER_FIELDS: tuple = ('favorites_count', 'in_carts_count')
+# Параметры запроса, при которых страница списка рецептов кэшируется.
+RECIPE_LIST_CACHED_PARAMS: frozenset = frozenset(
+    ('page', 'limit', 'tags', 'author')
+)
+# Ключ кэша для версии справочника ингредиентов.
+INGREDIENT_CATALOG_VERSION_KEY: str = 'ingredient_catalog_version'
+# Ключ кэша для версии справочника тегов.
+TAG_CATALOG_VERSION_KEY: str = 'tag_catalog_version'
+# Ключ кэша для версии поискового индекса рецептов в памяти процесса.
+RECIPE_SEARCH_VERSION_KEY: str = 'recipe_search_version'
+# Максимальное кол-во ингредиентов в результатах поиска.
+INGREDIENT_SEARCH_LIMIT: int = 20
+# Минимальная схожесть по триграммам для нечеткого поиска.
+TRIGRAM_SIMILARITY_THRESHOLD: float = 0.5
+# Ключ кэша для версии списка покупок пользователя.
+SHOPPING_LIST_VERSION_KEY: str = 'shopping_list_version:{}'
+# Ключ кэша для готового файла списка покупок.
+SHOPPING_LIST_KEY: str = 'shopping_list:{}:{}:{}:{}:{}'
+# Ключ кэша для версии учетных данных пользователя.
+USER_AUTH_VERSION_KEY: str = 'user_auth_version:{}'
+# Бэкенды кэша, данные которых не видны другим процессам.
+LOCAL_CACHE_BACKENDS: frozenset = frozenset((
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+))
+# Варианты изображений: максимальный размер и необходимость обрезки.
+IMAGE_VARIANTS: dict = {
+    'card': ((480, 480), False),
+    'detail': ((1200, 1200), False),
+    'avatar': ((160, 160), True),
+}
+# Варианты изображений рецептов.
+RECIPE_IMAGE_VARIANTS: tuple = ('card', 'detail')
+# Вариант изображения рецепта в списке рецептов.
+RECIPE_LIST_IMAGE_VARIANT: str = 'card'
+# Вариант изображения рецепта на странице рецепта.
+RECIPE_DETAIL_IMAGE_VARIANT: str = 'detail'
+# Варианты изображений аватаров.
+AVATAR_IMAGE_VARIANTS: tuple = ('avatar',)
+# Префикс имен метрик производительности.
+METRICS_PREFIX: str = 'foodgram'
+# Границы корзин гистограмм длительностей, в секундах.
+METRICS_DURATION_BUCKETS: tuple = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Границы корзин гистограммы кол-ва запросов к БД.
+METRICS_QUERY_BUCKETS: tuple = (1, 2, 5, 10, 20, 50, 100)
+# Методы HTTP, учитываемые в метках метрик отдельно.
+METRICS_METHODS: frozenset = frozenset(
+    ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+)
+# Кол-во одинаковых по форме запросов за запрос, считающееся N+1.
+QUERY_INSPECTOR_REPEAT_THRESHOLD: int = 3
+# Границы корзин гистограммы ожидания соединения из пула БД, в секундах.
+DB_POOL_WAIT_BUCKETS: tuple = (
+    0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
@@ -1,21 +1,33 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, F, OuterRef, Q
 from django_filters import rest_framework as filters
 from rest_framework.filters import BaseFilterBackend
 
-from recipes.models import Recipe
+from .ingredient_index import ingredient_index
+from .recipe_search import search_recipes
+from .tag_index import tag_choices, tag_index
+from recipes.models import POPULARITY, Recipe, RecipeTags
 
 User = get_user_model()
 
+# Варианты сортировки рецептов.
+RECIPE_ORDERING_CHOICES = (
+    ('popularity', 'По возрастанию популярности'),
+    ('-popularity', 'По убыванию популярности'),
+)
+
 
 class IngredientFilter(BaseFilterBackend):
     """Фильтр для Ингредиентов."""
 
     def filter_queryset(self, request, queryset, view):
-        """Метод для поиска рецептов по указанному имени."""
-        if 'name' in request.query_params:
-            queryset = queryset.filter(
-                name__startswith=request.query_params['name']
-            )
+        """
+        Метод для поиска ингредиентов по указанному имени.
+        Поиск выполняется по индексу в памяти без обращения к БД.
+        """
+        name = request.query_params.get('name')
+        if name:
+            return ingredient_index.search(name)
         return queryset
 
 
@@ -23,18 +35,44 @@ class RecipeFilter(filters.FilterSet):
     """Фильтр для рецептов."""
 
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method='filter_tags'
+    )
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(
         method='filter_is_favorited'
     )
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    ordering = filters.ChoiceFilter(
+        choices=RECIPE_ORDERING_CHOICES, method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('tags', 'author',)
 
+    def filter_search(self, queryset, name, value):
+        """Метод для полнотекстового поиска с сортировкой по релевантности."""
+        return search_recipes(queryset, value)
+
+    def filter_tags(self, queryset, name, value):
+        """
+        Метод для фильтрации рецептов по любому из тегов.
+        Проверяется битовая маска тегов рецепта без соединения с тегами.
+        """
+        mask, unindexed = tag_index.mask(value)
+        condition = Q()
+        if mask:
+            queryset = queryset.alias(tag_match=F('tags_mask').bitand(mask))
+            condition |= Q(tag_match__gt=0)
+        if unindexed:
+            condition |= Q(Exists(RecipeTags.objects.filter(
+                recipe=OuterRef('pk'), tag__slug__in=unindexed
+            )))
+        return queryset.filter(condition)
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
@@ -48,3 +86,15 @@ class RecipeFilter(filters.FilterSet):
         if value and user.is_authenticated:
             return queryset.filter(shopping_cart__user=user)
         return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        """
+        Метод для сортировки рецептов по популярности.
+        Порядок совпадает с индексом recipe_popularity_idx.
+        Популярность аннотируется по имени, чтобы курсорная пагинация
+        могла продолжить выдачу с того же значения.
+        """
+        queryset = queryset.annotate(popularity=POPULARITY)
+        if value.startswith('-'):
+            return queryset.order_by('-popularity', '-id')
+        return queryset.order_by('popularity', 'id')
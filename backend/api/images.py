@@ -0,0 +1,151 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from .constants import IMAGE_VARIANTS
+
+logger = logging.getLogger(__name__)
+
+# Пул потоков для обработки изображений вне потоков запросов.
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_WORKERS, thread_name_prefix='images'
+)
+
+# Расширения файлов для поддерживаемых форматов вариантов.
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def variant_name(name, variant):
+    """Функция для получения имени файла варианта изображения."""
+    root, _ = os.path.splitext(name)
+    extension = EXTENSIONS[settings.IMAGE_VARIANT_FORMAT]
+    return f'{root}_{variant}.{extension}'
+
+
+def variants_field(field_name):
+    """
+    Функция для получения имени поля модели, в котором обработчик
+    отмечает файл изображения с созданными вариантами.
+    """
+    return f'{field_name}_variants'
+
+
+def variant_url(field_file, variant):
+    """
+    Функция для получения ссылки на вариант изображения.
+    Пока варианты не созданы, возвращается ссылка на оригинал.
+    Наличие вариантов берется из поля модели без обращения
+    к хранилищу.
+    """
+    name = field_file.name
+    if getattr(
+        field_file.instance, variants_field(field_file.field.name), None
+    ) == name:
+        return default_storage.url(variant_name(name, variant))
+    return default_storage.url(name)
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(
+        buffer, format=image_format, quality=settings.IMAGE_QUALITY,
+        optimize=True
+    )
+    return buffer.getvalue()
+
+
+def replace(name, content):
+    """
+    Функция для замены содержимого файла.
+    Новое содержимое сначала сохраняется во временный файл, поэтому
+    ошибка записи не оставляет ссылку без файла. В локальном
+    хранилище временный файл атомарно подменяет прежний.
+    """
+    temporary = default_storage.save(f'{name}.tmp', ContentFile(content))
+    try:
+        os.replace(
+            default_storage.path(temporary), default_storage.path(name)
+        )
+        return
+    except NotImplementedError:
+        pass
+    default_storage.delete(name)
+    default_storage.save(name, ContentFile(content))
+    default_storage.delete(temporary)
+
+
+def process_image(name, variants):
+    """
+    Функция для нормализации изображения и создания вариантов.
+    Оригинал пересохраняется без метаданных с учетом ориентации,
+    затем создаются уменьшенные варианты заданных размеров.
+    """
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image_format = image.format or 'PNG'
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    replace(name, encode(image, image_format))
+    for variant in variants:
+        size, crop = IMAGE_VARIANTS[variant]
+        if crop:
+            resized = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail(size, Image.Resampling.LANCZOS)
+        replace(
+            variant_name(name, variant),
+            encode(resized, settings.IMAGE_VARIANT_FORMAT)
+        )
+
+
+def mark_processed(model, pk, field_name, name):
+    """
+    Функция для отметки созданных вариантов изображения в модели.
+    Отметка сохраняется, только если изображение не сменилось
+    за время обработки. Сохранение через модель вызывает сигналы,
+    которые сбрасывают кэши представлений.
+    """
+    instance = model.objects.filter(pk=pk, **{field_name: name}).first()
+    if instance is None:
+        return
+    field = variants_field(field_name)
+    setattr(instance, field, name)
+    instance.save(update_fields=[field])
+
+
+def run_processing(model, pk, field_name, name, variants):
+    try:
+        process_image(name, variants)
+        mark_processed(model, pk, field_name, name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+    finally:
+        close_old_connections()
+
+
+def schedule_processing(field_file, variants):
+    """
+    Функция для постановки обработки изображения в пул потоков
+    после фиксации транзакции, в которой файл был сохранен.
+    """
+    if not field_file:
+        return
+    args = (
+        type(field_file.instance), field_file.instance.pk,
+        field_file.field.name, field_file.name, variants
+    )
+    transaction.on_commit(
+        lambda: executor.submit(run_processing, *args)
+    )
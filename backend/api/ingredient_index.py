@@ -0,0 +1,115 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from .cache import get_version
+from .constants import (
+    INGREDIENT_CATALOG_VERSION_KEY, INGREDIENT_SEARCH_LIMIT,
+    TRIGRAM_SIMILARITY_THRESHOLD
+)
+from recipes.models import Ingredient
+
+
+def trigrams(value):
+    """Функция для получения множества триграмм строки."""
+    padded = f'  {value} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса.
+    Хранит отсортированный массив названий в нижнем регистре
+    для поиска по префиксу и триграммы для нечеткого поиска.
+    Перестраивается при смене версии после изменения ингредиентов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._snapshot = ([], [], {})
+
+    def build(self):
+        """Метод для построения индекса по текущему состоянию таблицы."""
+        rows = sorted(
+            (name.lower(), pk, name, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        index = defaultdict(list)
+        for position, row in enumerate(rows):
+            for trigram in trigrams(row[0]):
+                index[trigram].append(position)
+        self._snapshot = (
+            [row[0] for row in rows], [row[1:] for row in rows], dict(index)
+        )
+
+    def ensure_current(self):
+        """Метод для перестроения индекса при смене версии."""
+        version = get_version(INGREDIENT_CATALOG_VERSION_KEY)
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self.build()
+                self._version = version
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """
+        Метод для поиска ингредиентов без учета регистра.
+        Сначала возвращаются совпадения по префиксу, затем по подстроке,
+        затем похожие по триграммам, не более limit результатов.
+        """
+        self.ensure_current()
+        snapshot = self._snapshot
+        keys, rows, query = snapshot[0], snapshot[1], query.lower()
+        found = []
+        position = bisect_left(keys, query)
+        while (
+            position < len(keys) and len(found) < limit
+            and keys[position].startswith(query)
+        ):
+            found.append(position)
+            position += 1
+        if len(found) < limit:
+            seen = set(found)
+            substring = sorted(
+                (key.find(query), key, position)
+                for position, key in enumerate(keys)
+                if position not in seen and query in key
+            )
+            found.extend(item[2] for item in substring[:limit - len(found)])
+        if len(found) < limit:
+            found.extend(self._similar(
+                snapshot, query, set(found), limit - len(found)
+            ))
+        return [
+            Ingredient(id=pk, name=name, measurement_unit=unit)
+            for pk, name, unit in (rows[position] for position in found)
+        ]
+
+    def _similar(self, snapshot, query, exclude, limit):
+        """
+        Метод для нечеткого поиска по схожести триграмм.
+        Схожесть - доля триграмм запроса, найденных в названии.
+        """
+        keys, _, index = snapshot
+        query_trigrams = trigrams(query)
+        shared = defaultdict(int)
+        for trigram in query_trigrams:
+            for position in index.get(trigram, ()):
+                shared[position] += 1
+        ranked = []
+        for position, common in shared.items():
+            if position in exclude:
+                continue
+            similarity = common / len(query_trigrams)
+            if similarity >= TRIGRAM_SIMILARITY_THRESHOLD:
+                key = keys[position]
+                ranked.append((-similarity, len(key), key, position))
+        ranked.sort()
+        return [item[-1] for item in ranked[:limit]]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from api.benchmark import BenchmarkRunner, compare, query_reductions
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет маршруты API на синтетическом наборе данных '
+        'и сравнивает результаты с базовым отчетом'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=30,
+            help='Кол-во замеров каждого сценария.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Кол-во прогревочных запросов каждого сценария.'
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Замерить только указанный сценарий.'
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Путь для сохранения отчета.'
+        )
+        parser.add_argument(
+            '--baseline', help='Путь до базового отчета для сравнения.'
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Сохранить отчет как базовый вместо сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимый относительный рост p95.'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Минимальный рост p95 в мс, считающийся регрессией.'
+        )
+
+    def handle(self, *args, **options):
+        runner = BenchmarkRunner(options['iterations'], options['warmup'])
+        # Загружаемые сценариями изображения сохраняются во временный
+        # каталог, а письма не отправляются.
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root,
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        ):
+            try:
+                report = runner.run(options['scenarios'], self.progress)
+            except LookupError as error:
+                raise CommandError(
+                    f'{error} Сначала выполните команду seed_dataset.'
+                )
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Отчет сохранен: {options["output"]}.')
+        if report['uncovered']:
+            raise CommandError(
+                'Маршруты без сценариев: ' + ', '.join(report['uncovered'])
+            )
+        baseline_path = options['baseline']
+        if baseline_path is None:
+            return
+        if options['update_baseline']:
+            with open(baseline_path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Базовый отчет обновлен: {baseline_path}.')
+            return
+        if not os.path.exists(baseline_path):
+            raise CommandError(f'Базовый отчет не найден: {baseline_path}.')
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(
+            report, baseline, options['tolerance'], options['min_delta_ms']
+        )
+        for reduction in query_reductions(report, baseline):
+            self.stdout.write(self.style.SUCCESS(reduction))
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'Найдено регрессий: {len(regressions)}.')
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
+
+    def progress(self, name, result):
+        self.stderr.write(
+            f'{name}: {result["status"]}, запросов {result["queries"]}, '
+            f'p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+            f'{result["size_bytes"]} байт'
+        )
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.concurrency import LoadRunner, read_paths, short_link_paths
+
+# Наборы путей нагрузки.
+PATHS = {'read': read_paths, 'short-links': short_link_paths}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность запущенных серверов '
+        '(например, gunicorn backend.wsgi и uvicorn backend.asgi) '
+        'при одновременных соединениях на синтетическом наборе данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', dest='targets', required=True,
+            help='Сервер в виде имя=адрес, например asgi=http://host:8001.'
+        )
+        parser.add_argument(
+            '--paths', choices=PATHS, default='read',
+            help='Набор путей: маршруты для чтения или переадресация '
+                 'по коротким ссылкам, включая несуществующие (404).'
+        )
+        parser.add_argument(
+            '--connections', type=int, default=50,
+            help='Кол-во одновременных соединений.'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=10.0,
+            help='Длительность нагрузки на каждый сервер, в секундах.'
+        )
+        parser.add_argument(
+            '--delay-ms', type=float, default=0.0,
+            help='Пауза клиента между запросами, в мс.'
+        )
+        parser.add_argument(
+            '--output', help='Путь для сохранения отчета.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            paths = PATHS[options['paths']]()
+        except LookupError as error:
+            raise CommandError(
+                f'{error} Сначала выполните команду seed_dataset.'
+            )
+        report = {}
+        for target in options['targets']:
+            name, separator, url = target.partition('=')
+            if not separator:
+                raise CommandError(f'Ожидается имя=адрес: {target}.')
+            runner = LoadRunner(
+                url, paths, options['connections'], options['duration'],
+                options['delay_ms'] / 1000
+            )
+            result = report[name] = asyncio.run(runner.run())
+            self.stdout.write(
+                f'{name}: {result["rps"]} запросов/с, '
+                f'p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+                f'p99 {result["p99_ms"]} мс, ошибки {result["errors"]}'
+            )
+        baseline_name, baseline = next(iter(report.items()))
+        for name, result in report.items():
+            if name != baseline_name and baseline['rps']:
+                self.stdout.write(
+                    f'{name}/{baseline_name}: '
+                    f'x{result["rps"] / baseline["rps"]:.2f}'
+                )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Отчет сохранен: {options["output"]}.')
@@ -0,0 +1,59 @@
+import io
+import json
+import os
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.benchmark import benchmark_ingredient_search, ingredient_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск ингредиентов по индексу в памяти '
+        'и фильтром name__startswith в БД'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join('data', 'ingredients.json'),
+            help='Файл справочника ингредиентов в формате JSON.'
+        )
+        parser.add_argument(
+            '--queries', type=int, default=200,
+            help='Кол-во запросов автодополнения.'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=5,
+            help='Кол-во повторов набора запросов.'
+        )
+        parser.add_argument(
+            '--output', help='Путь для сохранения отчета.'
+        )
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8') as file:
+            names = [row['name'] for row in json.load(file)['ingredients']]
+        queries = ingredient_queries(names, options['queries'])
+        # Справочник загружается в транзакции с откатом,
+        # поэтому замер не меняет данные в БД.
+        with transaction.atomic():
+            call_command(
+                'load_ingredients', options['path'],
+                stdout=io.StringIO(), stderr=io.StringIO()
+            )
+            report = benchmark_ingredient_search(
+                queries, options['iterations']
+            )
+            transaction.set_rollback(True)
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name}: {result["mean_us"]} мкс, '
+                f'p95 {result["p95_us"]} мкс, x{result["speedup"]}, '
+                f'найдено в среднем {result["mean_results"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Отчет сохранен: {options["output"]}.')
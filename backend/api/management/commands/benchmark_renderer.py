@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from api.benchmark import benchmark_renderers, page_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга полной страницы рецептов '
+        'JSONRenderer DRF и FastJSONRenderer'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=2000,
+            help='Кол-во рендерингов каждого варианта.'
+        )
+        parser.add_argument(
+            '--limit', type=int, help='Кол-во рецептов на странице.'
+        )
+        parser.add_argument(
+            '--output', help='Путь для сохранения отчета.'
+        )
+
+    def handle(self, *args, **options):
+        data, plain = page_data(options['limit'])
+        report = benchmark_renderers(data, plain, options['iterations'])
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name}: {result["mean_us"]} мкс, x{result["speedup"]}, '
+                f'{result["size_bytes"]} байт, '
+                f'{"совпадает" if result["identical"] else "ОТЛИЧАЕТСЯ"}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Отчет сохранен: {options["output"]}.')
@@ -0,0 +1,140 @@
+import threading
+from bisect import bisect_left
+
+from .constants import (
+    METRICS_DURATION_BUCKETS, METRICS_PREFIX, METRICS_QUERY_BUCKETS
+)
+
+# Гистограммы по маршруту: имя, описание и границы корзин.
+HISTOGRAMS = (
+    ('request_duration_seconds', 'Полное время обработки запроса.',
+     METRICS_DURATION_BUCKETS),
+    ('request_view_seconds', 'Время выполнения представления.',
+     METRICS_DURATION_BUCKETS),
+    ('request_render_seconds', 'Время рендеринга ответа.',
+     METRICS_DURATION_BUCKETS),
+    ('request_db_seconds', 'Суммарное время запросов к БД.',
+     METRICS_DURATION_BUCKETS),
+    ('request_db_queries', 'Кол-во запросов к БД.',
+     METRICS_QUERY_BUCKETS),
+)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Последняя корзина соответствует +Inf.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Генератор пар (граница, накопленное кол-во) с +Inf в конце."""
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+    def snapshot(self):
+        return list(self.cumulative()), self.sum, self.count
+
+
+def escape_label(value):
+    """Функция для экранирования значения метки."""
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def header_lines(name, help_text, kind):
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+
+
+def histogram_lines(name, labels, snapshot):
+    """Функция для выгрузки снимка гистограммы с метками labels."""
+    buckets, total, count = snapshot
+    lines = [
+        f'{name}_bucket{{{labels},le="{bound}"}} {value}'
+        for bound, value in buckets
+    ]
+    lines.append(f'{name}_sum{{{labels}}} {total!r}')
+    lines.append(f'{name}_count{{{labels}}} {count}')
+    return lines
+
+
+class RequestMetrics:
+    """
+    Гистограммы времени запросов по маршрутам текущего процесса.
+    Каждый процесс сервера приложений ведет свои значения,
+    суммирование между процессами выполняет Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, method, values):
+        """
+        Метод для учета запроса.
+        values - значения в порядке гистограмм HISTOGRAMS.
+        """
+        key = (route, method)
+        with self._lock:
+            histograms = self._routes.get(key)
+            if histograms is None:
+                histograms = self._routes[key] = [
+                    Histogram(buckets) for _, _, buckets in HISTOGRAMS
+                ]
+            for histogram, value in zip(histograms, values):
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+
+    def render(self):
+        """Метод для выгрузки гистограмм в текстовом формате Prometheus."""
+        with self._lock:
+            snapshot = {
+                key: [histogram.snapshot() for histogram in histograms]
+                for key, histograms in self._routes.items()
+            }
+        lines = []
+        for index, (name, help_text, _) in enumerate(HISTOGRAMS):
+            name = f'{METRICS_PREFIX}_{name}'
+            lines.extend(header_lines(name, help_text, 'histogram'))
+            for (route, method), histograms in sorted(snapshot.items()):
+                lines.extend(histogram_lines(
+                    name, f'route="{escape_label(route)}",method="{method}"',
+                    histograms[index]
+                ))
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+# Функции, возвращающие строки дополнительных метрик.
+collectors = []
+
+
+def register_collector(collector):
+    """Функция для подключения дополнительных метрик к выгрузке."""
+    collectors.append(collector)
+    return collector
+
+
+def render_metrics():
+    """Функция для выгрузки всех метрик в текстовом формате Prometheus."""
+    lines = request_metrics.render()
+    for collector in collectors:
+        lines.extend(collector())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,202 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async
+)
+from django.conf import settings
+from django.db import connection
+
+from .constants import METRICS_METHODS
+from .metrics import request_metrics
+from .query_inspector import (
+    QueryBudgetExceeded, QueryInspector, get_query_budget
+)
+
+logger = logging.getLogger(__name__)
+
+
+def push_execute_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def pop_execute_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+@asynccontextmanager
+async def async_execute_wrapper(wrapper):
+    """
+    Аналог connection.execute_wrapper для асинхронного запроса.
+    Запросы к БД выполняются в потоке sync_to_async, общем для всего
+    запроса, поэтому обертка подключается к соединению этого потока,
+    а не потока цикла событий.
+    """
+    await sync_to_async(push_execute_wrapper)(wrapper)
+    try:
+        yield
+    finally:
+        await sync_to_async(pop_execute_wrapper)(wrapper)
+
+
+class RequestTimings:
+    """
+    Замеры одного запроса: кол-во и время запросов к БД,
+    время представления и рендеринга ответа.
+    """
+
+    __slots__ = (
+        'started', 'view_started', 'view_finished', 'render_finished',
+        'finished', 'queries', 'db_time',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = self.view_finished = None
+        self.render_finished = None
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка выполнения запросов к БД."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def finish_render(self, response):
+        self.render_finished = time.perf_counter()
+
+    def finish(self):
+        """
+        Метод для завершения замеров.
+        Возвращает длительности запроса, представления и рендеринга.
+        """
+        self.finished = time.perf_counter()
+        view_finished = self.view_finished or self.finished
+        view = render = 0.0
+        if self.view_started is not None:
+            view = view_finished - self.view_started
+        if self.view_finished is not None and self.render_finished:
+            render = self.render_finished - self.view_finished
+        return self.finished - self.started, view, render
+
+
+class PerformanceMiddleware:
+    """
+    Замеры производительности запросов.
+    Добавляет в ответ заголовок Server-Timing и учитывает значения
+    в гистограммах по маршрутам. Подключается первым в MIDDLEWARE
+    при PERFORMANCE_METRICS = True. Работает как в синхронном,
+    так и в асинхронном (ASGI) стеке без переключения потоков.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = request.performance_timings = RequestTimings()
+        with connection.execute_wrapper(timings):
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = request.performance_timings = RequestTimings()
+        async with async_execute_wrapper(timings):
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        """Метод для записи замеров в заголовок и метрики."""
+        total, view, render = timings.finish()
+        response['Server-Timing'] = (
+            f'db;dur={timings.db_time * 1000:.1f};'
+            f'desc="{timings.queries} queries", '
+            f'view;dur={view * 1000:.1f}, '
+            f'render;dur={render * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        match = request.resolver_match
+        method = request.method
+        request_metrics.observe(
+            match.view_name if match else 'unmatched',
+            method if method in METRICS_METHODS else 'OTHER',
+            (total, view, render, timings.db_time, timings.queries)
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.performance_timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timings = request.performance_timings
+        timings.view_finished = time.perf_counter()
+        response.add_post_render_callback(timings.finish_render)
+        return response
+
+
+class QueryInspectorMiddleware:
+    """
+    Поиск повторяющихся запросов к БД (N+1) и проверка бюджетов
+    запросов представлений. Повторы пишутся в лог с полем
+    сериализатора и стеком вызовов. Превышение бюджета пишется в лог,
+    а при QUERY_BUDGET_STRICT = True (тестовый запуск) приводит
+    к исключению QueryBudgetExceeded. Как и PerformanceMiddleware,
+    работает в синхронном и асинхронном стеке.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inspector = QueryInspector()
+        request.query_budget = None
+        with connection.execute_wrapper(inspector):
+            response = self.get_response(request)
+        return self.finish(request, response, inspector)
+
+    async def __acall__(self, request):
+        inspector = QueryInspector()
+        request.query_budget = None
+        async with async_execute_wrapper(inspector):
+            response = await self.get_response(request)
+        return self.finish(request, response, inspector)
+
+    def finish(self, request, response, inspector):
+        """Метод для записи повторов в лог и проверки бюджета запросов."""
+        for shape, count, field, stack in inspector.repeated():
+            logger.warning(
+                'N+1: %s %s - %d одинаковых запросов (%s): %s\n%s',
+                request.method, request.path, count,
+                field or 'вне сериализатора', shape, stack
+            )
+        budget = request.query_budget
+        if budget is not None and inspector.queries > budget:
+            message = (
+                f'{request.method} {request.path}: {inspector.queries} '
+                f'запросов к БД при бюджете {budget}.'
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
@@ -1,4 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import (
+    BasePagination, CursorPagination, PageNumberPagination
+)
 
 
 class PageLimitPagination(PageNumberPagination):
@@ -7,3 +9,101 @@ class PageLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_query_param = 'page'
     max_page_size = 6
+
+
+class LimitPagination(PageNumberPagination):
+    """Постраничная пагинация без ограничения размера страницы."""
+
+    page_size_query_param = 'limit'
+
+
+class CursorLimitPagination(CursorPagination):
+    """
+    Курсорная пагинация по стабильному ключу.
+    Не выполняет COUNT(*) и не использует OFFSET для перехода
+    на следующие страницы.
+    """
+
+    page_size_query_param = 'limit'
+    ordering = ('id',)
+
+
+class RecipeCursorPagination(CursorLimitPagination):
+    """
+    Курсорная пагинация рецептов по индексу (name, id).
+    Если фильтры уже задали порядок по именам полей, например
+    по популярности или релевантности, курсор строится по нему.
+    """
+
+    max_page_size = 6
+    ordering = ('name', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = queryset.query.order_by
+        if ordering and all(isinstance(field, str) for field in ordering):
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Пагинация с включаемым курсорным режимом.
+    По умолчанию ответ остается постраничным, курсорный режим
+    включается параметром ?pagination=cursor или наличием курсора.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    page_pagination_class = PageLimitPagination
+    cursor_pagination_class = RecipeCursorPagination
+
+    def __init__(self):
+        self.paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.cursor_pagination_class()
+        else:
+            self.paginator = self.page_pagination_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_pagination_class().get_paginated_response_schema(
+            schema
+        )
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        # Форма фильтров BrowsableAPIRenderer вызывает метод
+        # и для ответов без пагинации, например для одного рецепта.
+        if self.paginator is None:
+            return data['results']
+        return self.paginator.get_results(data)
+
+
+class RecipePagination(OptionalCursorPagination):
+    """Пагинация ленты рецептов."""
+
+
+class SubscriptionPagination(OptionalCursorPagination):
+    """Пагинация ленты подписок."""
+
+    page_pagination_class = LimitPagination
+    cursor_pagination_class = CursorLimitPagination
@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import traceback
+
+from django.conf import settings
+from rest_framework.fields import Field
+from rest_framework.serializers import Serializer
+
+from .constants import QUERY_INSPECTOR_REPEAT_THRESHOLD
+
+# Списки параметров IN разной длины сводятся к одной форме.
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+# Числа и строки, подставленные в SQL без параметров.
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Служебные запросы транзакций, повторы которых не ошибка.
+SERVICE_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO')
+# Каталог слоя БД Django, вызовы из которого не показываются в стеке.
+DB_LAYER = os.path.join('django', 'db', '')
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов к БД, чем заявлено."""
+
+
+def fingerprint(sql):
+    """Функция для получения формы запроса без конкретных значений."""
+    return LITERALS.sub('?', IN_LIST.sub('(...)', sql))
+
+
+def serializer_field(frame):
+    """
+    Функция для поиска поля или метода сериализатора, при выводе
+    которого выполняется запрос. Возвращает самый вложенный вызов.
+    """
+    while frame is not None:
+        serializer = frame.f_locals.get('self')
+        if isinstance(serializer, Serializer):
+            name = frame.f_code.co_name
+            field = frame.f_locals.get('field')
+            if name == 'to_representation' and isinstance(field, Field):
+                name = field.field_name
+            return f'{type(serializer).__name__}.{name}'
+        frame = frame.f_back
+    return None
+
+
+def project_stack(frame):
+    """
+    Функция для получения стека вызовов в пределах кода проекта.
+    Последним добавляется ближайший к запросу вызов вне слоя БД Django,
+    даже если он в сторонней библиотеке.
+    """
+    base_dir = str(settings.BASE_DIR)
+    stack = traceback.extract_stack(frame)
+    while stack and DB_LAYER in stack[-1].filename:
+        stack.pop()
+    entries = [
+        entry for entry in stack[:-1]
+        if entry.filename.startswith(base_dir)
+        and 'site-packages' not in entry.filename
+    ]
+    return ''.join(traceback.format_list(entries + stack[-1:]))
+
+
+class QueryInspector:
+    """
+    Обертка выполнения запросов к БД, группирующая запросы по форме.
+    Стек вызовов запоминается только при первом повторе формы,
+    поэтому одиночные запросы почти ничего не стоят.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if not sql.startswith(SERVICE_PREFIXES):
+            shape = fingerprint(sql)
+            entry = self.shapes.get(shape)
+            if entry is None:
+                self.shapes[shape] = [1, None, None]
+            else:
+                entry[0] += 1
+                if entry[0] == 2:
+                    frame = sys._getframe(1)
+                    entry[1] = serializer_field(frame)
+                    entry[2] = project_stack(frame)
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """
+        Генератор повторяющихся форм запросов:
+        (форма, кол-во, поле сериализатора, стек вызовов).
+        """
+        for shape, (count, field, stack) in self.shapes.items():
+            if count >= QUERY_INSPECTOR_REPEAT_THRESHOLD:
+                yield shape, count, field, stack
+
+
+def get_query_budget(view_func, method):
+    """
+    Функция для получения бюджета запросов представления.
+    Атрибут query_budget класса представления - число или словарь
+    по действиям viewset'а (list, retrieve, ...) или методам (get, ...).
+    """
+    budget = getattr(getattr(view_func, 'cls', None), 'query_budget', None)
+    if isinstance(budget, dict):
+        method = method.lower()
+        actions = getattr(view_func, 'actions', None) or {}
+        return budget.get(actions.get(method, method))
+    return budget
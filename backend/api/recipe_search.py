@@ -0,0 +1,135 @@
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, Func
+from django.db.models.functions import Cast
+
+from .cache import get_version
+from .constants import RECIPE_SEARCH_VERSION_KEY
+from recipes.models import Recipe, RecipeIngredients, RecipeTags
+from recipes.search import has_search_document
+
+# Веса частей документа, как у ts_rank по умолчанию для A, B и C.
+WEIGHTS = {'name': 1.0, 'text': 0.4, 'related': 0.2}
+
+
+def tokenize(value):
+    """Функция для разбиения строки на слова в нижнем регистре."""
+    return re.findall(r'\w+', value.lower())
+
+
+class RecipeSearchIndex:
+    """
+    Инвертированный индекс рецептов в памяти процесса.
+    Используется вместо поискового документа, когда БД не PostgreSQL.
+    Перестраивается при смене версии после изменения рецептов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._postings = {}
+
+    def build(self):
+        """Метод для построения индекса по текущему состоянию БД."""
+        postings = defaultdict(lambda: defaultdict(float))
+
+        def add(recipe_id, value, weight):
+            for term in tokenize(value):
+                postings[term][recipe_id] += weight
+
+        for recipe_id, name, text in Recipe.objects.values_list(
+            'id', 'name', 'text'
+        ).iterator():
+            add(recipe_id, name, WEIGHTS['name'])
+            add(recipe_id, text, WEIGHTS['text'])
+        for model, field in (
+            (RecipeIngredients, 'ingredient__name'), (RecipeTags, 'tag__name')
+        ):
+            for recipe_id, name in model.objects.values_list(
+                'recipe_id', field
+            ).iterator():
+                add(recipe_id, name, WEIGHTS['related'])
+        self._postings = {
+            term: dict(recipes) for term, recipes in postings.items()
+        }
+
+    def ensure_current(self):
+        """Метод для перестроения индекса при смене версии."""
+        version = get_version(RECIPE_SEARCH_VERSION_KEY)
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self.build()
+                self._version = version
+
+    def search(self, query):
+        """
+        Метод для поиска рецептов, содержащих все слова запроса.
+        Возвращает словарь {id рецепта: релевантность}.
+        """
+        self.ensure_current()
+        postings = self._postings
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        matches = [postings.get(term, {}) for term in terms]
+        ranks = {}
+        for recipe_id in set.intersection(*(set(m) for m in matches)):
+            ranks[recipe_id] = sum(m[recipe_id] for m in matches)
+        return ranks
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+class RankMap(Func):
+    """
+    Выражение CASE с релевантностью найденных рецептов по их id.
+    Значения подставляются в SQL как числа, поэтому выражение
+    строится без отдельного объекта When на каждый рецепт.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, expression, ranks):
+        super().__init__(expression)
+        self.ranks = ranks
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        whens = ' '.join(
+            f'WHEN {int(recipe_id)} THEN {float(rank)!r}'
+            for recipe_id, rank in self.ranks.items()
+        )
+        return f'CASE {sql} {whens} ELSE 0 END', params
+
+
+def search_recipes(queryset, query):
+    """
+    Функция для полнотекстового поиска рецептов с сортировкой
+    по релевантности. На PostgreSQL используется поисковый документ
+    с GIN-индексом, иначе индекс в памяти процесса.
+    Релевантность приводится к double precision: значение real
+    не совпадает с собой после записи в курсор, и курсорная
+    пагинация теряла бы или повторяла рецепты.
+    """
+    if has_search_document():
+        search_query = SearchQuery(
+            query, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_document=search_query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_document'), search_query), FloatField()
+            )
+        ).order_by('-search_rank', 'id')
+    ranks = recipe_search_index.search(query)
+    if not ranks:
+        return queryset.none()
+    return queryset.annotate(
+        search_rank=RankMap(F('pk'), ranks)
+    ).filter(search_rank__gt=0).order_by('-search_rank', 'id')
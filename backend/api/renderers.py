@@ -0,0 +1,176 @@
+import json
+import re
+from uuid import uuid4
+
+from rest_framework.compat import SHORT_SEPARATORS
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Числа, которые orjson записывает иначе, чем json: с показателем
+# степени (1e16 вместо 1e+16) и меньше 1e-4 (0.00001 вместо 1e-05).
+# Выражения начинаются с литерала, поэтому поиск идет быстро,
+# а совпадение внутри строки лишь отключает быстрый путь для ответа.
+ORJSON_FLOAT_MISMATCHES = (
+    re.compile(rb'e(?<=[0-9]e)[-0-9]'),
+    re.compile(rb'\.0000(?<=[^0-9]0\.0000)'),
+)
+# Разделители строк, которые DRF экранирует для совместимости с JS.
+LINE_SEPARATOR = re.compile(rb'\xe2\x80[\xa8\xa9]')
+# Случайная метка процесса для мест вставки фрагментов. Состоит
+# из цифр, поэтому не совпадает с ORJSON_FLOAT_MISMATCHES.
+FRAGMENT_MARKER = f'fragment-{uuid4().int}:'
+FRAGMENT_PLACEHOLDER = re.compile(b'"%s(\\d+)"' % FRAGMENT_MARKER.encode())
+
+
+class JSONFragment:
+    """
+    Заранее закодированное значение JSON, например часть
+    закэшированного представления рецепта. FastJSONRenderer вставляет
+    его в ответ без повторного кодирования, остальные рендеры DRF
+    получают разобранное значение.
+    """
+
+    __slots__ = ('content',)
+
+    def __init__(self, content):
+        self.content = content
+
+    @classmethod
+    def encode(cls, value):
+        return cls(FastJSONRenderer().render(value))
+
+    def tolist(self):
+        # JSONEncoder DRF вызывает tolist() у значений, похожих
+        # на массивы numpy, и кодирует результат.
+        return json.loads(self.content)
+
+
+class FragmentCollector:
+    """Замена фрагментов метками при кодировании и вставка после него."""
+
+    def __init__(self):
+        self.fragments = []
+
+    def placeholder(self, fragment):
+        self.fragments.append(fragment.content)
+        return f'{FRAGMENT_MARKER}{len(self.fragments) - 1}'
+
+    def insert(self, content):
+        if not self.fragments:
+            return content
+        return FRAGMENT_PLACEHOLDER.sub(
+            lambda match: self.fragments[int(match.group(1))], content
+        )
+
+
+class FragmentJSONEncoder(encoders.JSONEncoder):
+
+    def __init__(self, *args, collector, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.collector = collector
+
+    def default(self, obj):
+        if isinstance(obj, JSONFragment):
+            return self.collector.placeholder(obj)
+        return super().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer с кодированием через orjson, если он установлен.
+    Ответ совпадает с JSONRenderer байт в байт: типы, которые orjson
+    кодирует иначе (даты, время), передаются кодировщику DRF,
+    а ответы с неподдерживаемыми значениями и числами в другой записи
+    кодируются через json. Значения JSONFragment вставляются как есть.
+    Отличие одно: NaN и бесконечность orjson записывает как null.
+    """
+
+    use_orjson = orjson is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        collector = FragmentCollector()
+        content = None
+        if self.use_orjson:
+            content = self.encode_orjson(data, collector)
+        if content is None:
+            collector = FragmentCollector()
+            content = json.dumps(
+                data, cls=FragmentJSONEncoder, collector=collector,
+                ensure_ascii=False, allow_nan=not self.strict,
+                separators=SHORT_SEPARATORS
+            ).encode()
+        if LINE_SEPARATOR.search(content):
+            content = LINE_SEPARATOR.sub(
+                lambda match: b'\\u%x' % ord(match.group().decode()),
+                content
+            )
+        return collector.insert(content)
+
+    def encode_orjson(self, data, collector):
+        """
+        Метод для кодирования через orjson.
+        Возвращает None, если результат может отличаться от json.
+        """
+        encoder = self.encoder_class()
+
+        def default(obj):
+            if isinstance(obj, JSONFragment):
+                return collector.placeholder(obj)
+            return encoder.default(obj)
+
+        try:
+            content = orjson.dumps(
+                data, default=default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        except orjson.JSONEncodeError:
+            return None
+        if any(pattern.search(content) for pattern in ORJSON_FLOAT_MISMATCHES):
+            return None
+        return content
+
+
+class FileRenderer(BaseRenderer):
+    """
+    Рендерер для файловых выгрузок.
+    Готовое содержимое отдается как есть, ошибки - в формате JSON.
+    """
+
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        return FastJSONRenderer().render(data)
+
+
+class PlainTextRenderer(FileRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class CSVRenderer(FileRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PDFRenderer(FileRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
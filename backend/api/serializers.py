@@ -1,16 +1,21 @@
-from django.db import transaction
+from django.db import models, transaction
 from rest_framework import serializers
 
+from .cache import bump_recipe_shopping_lists, recipe_cache
 from .constants import (
     AMOUNT_OF_INGREDIENT_CREATE_ERROR, AMOUNT_OF_TAG_CREATE_ERROR,
-    DUPLICATE_OF_INGREDIENT_CREATE_ERROR, DUPLICATE_OF_TAG_CREATE_ERROR,
+    BULK_RECIPES_MAX_COUNT, DUPLICATE_OF_INGREDIENT_CREATE_ERROR,
+    DUPLICATE_OF_TAG_CREATE_ERROR, RECIPE_DETAIL_IMAGE_VARIANT,
+    RECIPE_IMAGE_VARIANTS, RECIPE_LIST_IMAGE_VARIANT,
 )
+from .images import schedule_processing
 from recipes.models import (
     Ingredient,
     Recipe,
     RecipeIngredients,
     Tag
 )
+from recipes.shopping_list import apply_ingredient_deltas
 from users.serializers import UserSerializer
 from users.utils import Base64ImageField
 
@@ -57,10 +62,23 @@ class RecipeIngredientsGetSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """
+    Сериализатор списка рецептов.
+    Представления всех рецептов страницы читаются из кэша
+    и сохраняются в него пачкой, а не по одному рецепту.
+    """
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        return self.child.represent(list(data))
+
+
 class RecipeCreateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания рецептов."""
 
-    image = Base64ImageField()
+    image = Base64ImageField(variant=RECIPE_DETAIL_IMAGE_VARIANT)
     tags = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Tag.objects.all()
     )
@@ -76,8 +94,10 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = (
             'id', 'tags', 'author', 'ingredients', 'image', 'is_favorited',
-            'is_in_shopping_cart', 'name', 'text', 'cooking_time'
+            'is_in_shopping_cart', 'name', 'text', 'cooking_time',
+            'favorites_count', 'in_carts_count'
         )
+        list_serializer_class = RecipeListSerializer
 
     def validate(self, attrs):
         """Метод для валидации данных при создании рецепта."""
@@ -117,17 +137,62 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         ]
         RecipeIngredients.objects.bulk_create(ingredients_qs)
 
-    def check_duplicate_ingredients(self, ingredients):
-        """Метод для проверки наличия дубликатов ингредиентов."""
-        existing_ingredients = set(
-            RecipeIngredients.objects.values_list('ingredient', flat=True)
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Метод для обновления ингредиентов рецепта.
+        Текущие ингредиенты рецепта сравниваются с переданными,
+        и выполняются только нужные вставки, изменения и удаления.
+        """
+        current = {
+            ingredient_id: (pk, amount)
+            for pk, ingredient_id, amount in RecipeIngredients.objects.filter(
+                recipe=recipe
+            ).values_list('pk', 'ingredient_id', 'amount')
+        }
+        submitted = {
+            ingredient['id'].pk: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = [
+            pk for ingredient_id, (pk, _) in current.items()
+            if ingredient_id not in submitted
+        ]
+        if removed:
+            # Удаление без сигналов pre_delete и post_delete на каждую
+            # строку: списки покупок меняются одним apply_ingredient_deltas
+            # ниже, а кэши рецепта и списков сбрасываются в update().
+            queryset = RecipeIngredients.objects.filter(pk__in=removed)
+            queryset._raw_delete(queryset.db)
+        RecipeIngredients.objects.bulk_create([
+            RecipeIngredients(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in submitted.items()
+            if ingredient_id not in current
+        ])
+        RecipeIngredients.objects.bulk_update(
+            [
+                RecipeIngredients(pk=current[ingredient_id][0], amount=amount)
+                for ingredient_id, amount in submitted.items()
+                if ingredient_id in current
+                and current[ingredient_id][1] != amount
+            ],
+            ['amount']
         )
-        for ingredient in ingredients:
-            base_ingredient = ingredient.get('id')
-            if base_ingredient in existing_ingredients:
-                raise serializers.ValidationError(
-                    {'errors': DUPLICATE_OF_INGREDIENT_CREATE_ERROR}
-                )
+        deltas = {
+            ingredient_id: -amount
+            for ingredient_id, (_, amount) in current.items()
+            if ingredient_id not in submitted
+        }
+        deltas.update({
+            ingredient_id: amount - current.get(ingredient_id, (None, 0))[1]
+            for ingredient_id, amount in submitted.items()
+        })
+        apply_ingredient_deltas(recipe.pk, deltas)
+
+    def process_image(self, recipe):
+        """Метод для создания уменьшенных вариантов изображения рецепта."""
+        schedule_processing(recipe.image, RECIPE_IMAGE_VARIANTS)
 
     @transaction.atomic()
     def create(self, validated_data):
@@ -137,18 +202,90 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.create_ingredients(recipe, ingredients)
+        self.process_image(recipe)
         return recipe
 
+    @transaction.atomic()
     def update(self, instance, validated_data):
         """Метод для обновления рецептов."""
         ingredients = validated_data.pop('recipe_ingredients')
         super().update(instance, validated_data)
-        self.check_duplicate_ingredients(ingredients)
-        self.create_ingredients(instance, ingredients)
+        if 'image' in validated_data:
+            self.process_image(instance)
+        self.update_ingredients(instance, ingredients)
+        recipe_cache.bump_recipe_version(instance.pk)
+        bump_recipe_shopping_lists(instance.pk)
         return instance
 
+    def get_fields(self):
+        """
+        Метод для выбора варианта изображения.
+        В списке рецептов отдается карточка, для одного рецепта
+        полноразмерный вариант.
+        """
+        fields = super().get_fields()
+        if isinstance(self.parent, serializers.ListSerializer):
+            fields['image'].variant = RECIPE_LIST_IMAGE_VARIANT
+        return fields
+
     def to_representation(self, instance):
         """Метод для представления данных."""
+        return self.represent([instance])[0]
+
+    def represent(self, instances):
+        """
+        Метод для представления рецептов.
+        Общая для всех пользователей часть берется из кэша одним
+        обращением на все рецепты, недостающие представления строятся
+        и сохраняются тоже одним обращением.
+        """
+        request = self.context.get('request')
+        keys = None
+        if request is not None:
+            keys = recipe_cache.make_keys(
+                [instance.pk for instance in instances],
+                request.build_absolute_uri('/')
+            )
+        if not keys:
+            return [self.build_representation(item) for item in instances]
+        cached = recipe_cache.get_many(list(keys.values()))
+        built = {}
+        recipes = []
+        for instance in instances:
+            key = keys[instance.pk]
+            if key in cached:
+                recipes.append(self.personalize(instance, cached[key]))
+            else:
+                recipe = built[key] = self.build_representation(instance)
+                recipes.append(recipe)
+        if built:
+            recipe_cache.set_many(built)
+        return recipes
+
+    def personalize(self, instance, cached):
+        """
+        Метод для дополнения представления из кэша.
+        Персональные флаги и счетчики берутся из текущего запроса.
+        Ссылка на изображение зависит от списка или страницы рецепта,
+        поэтому тоже строится заново.
+        """
+        recipe = dict(cached, author=dict(cached['author']))
+        recipe['image'] = self.fields['image'].to_representation(
+            instance.image
+        )
+        recipe['author']['is_subscribed'] = (
+            self.fields['author'].get_is_subscribed(instance.author)
+        )
+        recipe['is_favorited'] = self.get_is_favorited(instance)
+        recipe['is_in_shopping_cart'] = self.get_is_in_shopping_cart(
+            instance
+        )
+        recipe['favorites_count'] = instance.favorites_count
+        recipe['in_carts_count'] = instance.in_carts_count
+        return recipe
+
+    def build_representation(self, instance):
+        """Метод для построения полного представления рецепта."""
         recipe = super().to_representation(instance)
         recipe['tags'] = TagSerializer(
             instance.tags.all(), many=True
@@ -160,22 +297,39 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
     def get_is_favorited(self, obj):
         request = self.context.get('request')
-        if request.user.is_authenticated:
-            return obj.favorites.filter(user=request.user).exists()
-        return False
+        if not request.user.is_authenticated:
+            return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return obj.favorites.filter(user=request.user).exists()
 
     def get_is_in_shopping_cart(self, obj):
         request = self.context.get('request')
-        if request.user.is_authenticated:
-            return obj.shopping_cart.filter(user=request.user).exists()
-        return False
+        if not request.user.is_authenticated:
+            return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return obj.shopping_cart.filter(user=request.user).exists()
 
 
 class ShortRecipeSerializer(serializers.ModelSerializer):
     """Сериалайзер для добавления рецепта в список покупок."""
 
-    image = Base64ImageField()
+    image = Base64ImageField(variant='card')
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериалайзер для списка рецептов в избранное или корзину."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=BULK_RECIPES_MAX_COUNT
+    )
+
+    def validate_recipes(self, value):
+        """Метод для удаления повторов с сохранением порядка."""
+        return list(dict.fromkeys(value))
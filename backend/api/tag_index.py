@@ -0,0 +1,55 @@
+import threading
+
+from .cache import get_version
+from .constants import TAG_CATALOG_VERSION_KEY
+from recipes.models import Tag
+
+
+class TagIndex:
+    """
+    Словарь тегов в памяти процесса: слаг -> бит маски тегов.
+    Перестраивается при смене версии после изменения тегов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._bits = {}
+
+    def ensure_current(self):
+        """Метод для перестроения словаря при смене версии."""
+        version = get_version(TAG_CATALOG_VERSION_KEY)
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._bits = dict(Tag.objects.values_list('slug', 'bit'))
+                self._version = version
+
+    def choices(self):
+        """Метод для получения вариантов фильтра по слагам тегов."""
+        self.ensure_current()
+        return [(slug, slug) for slug in sorted(self._bits)]
+
+    def mask(self, slugs):
+        """
+        Метод для получения маски по слагам тегов.
+        Возвращает маску и слаги тегов, не имеющих бита в маске.
+        """
+        self.ensure_current()
+        mask, unindexed = 0, []
+        for slug in slugs:
+            bit = self._bits.get(slug)
+            if bit is None:
+                unindexed.append(slug)
+            else:
+                mask |= 1 << bit
+        return mask, unindexed
+
+
+tag_index = TagIndex()
+
+
+def tag_choices():
+    """Функция для получения вариантов фильтра по слагам тегов."""
+    return tag_index.choices()
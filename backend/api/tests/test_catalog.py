@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.cache import get_version
+from api.constants import TAG_CATALOG_VERSION_KEY
+
+from recipes.models import Tag
+
+
+class CatalogEncodingTest(TestCase):
+    """Выбор сжатия справочника по Accept-Encoding и ETag кодировки."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, accept_encoding=None, **headers):
+        if accept_encoding is not None:
+            headers['HTTP_ACCEPT_ENCODING'] = accept_encoding
+        return self.client.get('/api/tags/', **headers)
+
+    def test_choose_encoding(self):
+        for accept_encoding, expected in (
+            (None, None),
+            ('', None),
+            ('gzip, deflate, br', 'br'),
+            ('gzip', 'gzip'),
+            ('br;q=0, gzip', 'gzip'),
+            ('br;q=0.5, gzip;q=0.8', 'gzip'),
+            ('BR', 'br'),
+            ('gzip;q=0, br;q=0', None),
+            ('*;q=0, identity', None),
+            ('gzip;q=abc', None),
+            ('*', 'br'),
+            ('*, br;q=0', 'gzip'),
+            ('gzip;q=0.5, identity', 'gzip'),
+            ('xbr, gzipx', None),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.get(accept_encoding)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.headers.get('Content-Encoding'), expected
+                )
+
+    def test_tag_version_after_commit(self):
+        version = get_version(TAG_CATALOG_VERSION_KEY)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Tag.objects.create(name='Обед', slug='lunch')
+            # До фиксации справочник строится по прежней версии.
+            self.assertEqual(get_version(TAG_CATALOG_VERSION_KEY), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(TAG_CATALOG_VERSION_KEY), version)
+        response = self.client.get('/api/recipes/', {'tags': 'lunch'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_per_encoding(self):
+        etags = {
+            accept_encoding: self.get(accept_encoding)['ETag']
+            for accept_encoding in ('', 'gzip', 'br')
+        }
+        self.assertEqual(len(set(etags.values())), 3)
+        # ETag сжатого ответа не подходит для ответа без сжатия.
+        response = self.get('', HTTP_IF_NONE_MATCH=etags['gzip'])
+        self.assertEqual(response.status_code, 200)
+        response = self.get('gzip', HTTP_IF_NONE_MATCH=etags['gzip'])
+        self.assertEqual(response.status_code, 304)
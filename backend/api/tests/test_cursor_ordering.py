@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.pagination import PageLimitPagination
+from recipes.dataset import DatasetBuilder
+
+
+@override_settings(RECIPE_LIST_CACHE_TIMEOUT=0)
+class CursorOrderingTest(TestCase):
+    """Курсорный режим сохраняет порядок, заданный фильтрами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=5, recipes=20, tags=3, ingredients=10, subscriptions=1,
+            favorites=4, carts=4, seed=6
+        ).build()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def page_ids(self, params):
+        with mock.patch.object(PageLimitPagination, 'max_page_size', 100):
+            response = self.client.get(
+                '/api/recipes/', {**params, 'limit': 100}
+            )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def cursor_ids(self, params):
+        ids = []
+        response = self.client.get(
+            '/api/recipes/', {**params, 'pagination': 'cursor', 'limit': 3}
+        )
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_popularity(self):
+        for ordering in ('-popularity', 'popularity'):
+            with self.subTest(ordering=ordering):
+                params = {'ordering': ordering}
+                expected = self.page_ids(params)
+                self.assertEqual(len(expected), 20)
+                self.assertEqual(self.cursor_ids(params), expected)
+
+    def test_search(self):
+        for query in ('суп', 'суп острый'):
+            with self.subTest(query=query):
+                params = {'search': query}
+                expected = self.page_ids(params)
+                self.assertTrue(expected)
+                self.assertEqual(self.cursor_ids(params), expected)
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from backend.postgresql_pool.pool import ConnectionPool, get_pool, pools
+
+
+class FakeConnection:
+    closed = False
+    autocommit = False
+    info = SimpleNamespace(transaction_status=TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(TestCase):
+    """Новый пул сразу открывает min_size соединений."""
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def test_prewarm(self):
+        key = ('test', repr(self))
+        self.addCleanup(pools.pop, key, None)
+        pool = get_pool(*key, lambda: ConnectionPool(
+            self.connect, min_size=3, max_size=5
+        ))
+        self.assertEqual(len(self.opened), 3)
+        snapshot = pool.snapshot()
+        self.assertEqual((snapshot['size'], snapshot['idle']), (3, 3))
+        # Выдаются открытые заранее соединения.
+        connections = [pool.getconn() for _ in range(3)]
+        self.assertEqual(len(self.opened), 3)
+        for connection in connections:
+            pool.putconn(connection)
+        self.assertEqual(pool.snapshot()['idle'], 3)
+        self.assertIs(get_pool(*key, None), pool)
@@ -0,0 +1,99 @@
+import base64
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.benchmark import PIXEL_PNG
+from api.constants import RECIPE_IMAGE_VARIANTS
+from api.images import (
+    mark_processed, process_image, replace, variant_name
+)
+from recipes.dataset import DatasetBuilder
+from recipes.models import Recipe
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageVariantsTest(TestCase):
+    """Наличие вариантов изображения берется из модели, а не хранилища."""
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=2, recipes=2, tags=1, ingredients=3, subscriptions=1,
+            favorites=1, carts=1, seed=5
+        ).build()
+        cls.recipe = Recipe.objects.order_by('id').first()
+        cls.recipe.image.save(
+            'dish.png',
+            ContentFile(base64.b64decode(PIXEL_PNG.split(',')[1])),
+            save=False
+        )
+        cls.recipe.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def image_url(self):
+        with mock.patch.object(
+            default_storage, 'exists', side_effect=AssertionError
+        ):
+            response = APIClient().get(f'/api/recipes/{self.recipe.pk}/')
+        return response.data['image']
+
+    def list_image_url(self):
+        response = APIClient().get(
+            '/api/recipes/', {'author': self.recipe.author_id}
+        )
+        for recipe in response.data['results']:
+            if recipe['id'] == self.recipe.pk:
+                return recipe['image']
+
+    def test_variants(self):
+        name = self.recipe.image.name
+        self.assertTrue(self.image_url().endswith(name))
+        with self.captureOnCommitCallbacks(execute=True):
+            process_image(name, RECIPE_IMAGE_VARIANTS)
+            mark_processed(Recipe, self.recipe.pk, 'image', name)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, name)
+        for variant in RECIPE_IMAGE_VARIANTS:
+            self.assertTrue(
+                default_storage.exists(variant_name(name, variant))
+            )
+        # Повторные запросы берут представление из кэша.
+        for _ in range(2):
+            self.assertTrue(
+                self.image_url().endswith(variant_name(name, 'detail'))
+            )
+            self.assertTrue(
+                self.list_image_url().endswith(variant_name(name, 'card'))
+            )
+
+    def test_changed_image_is_not_marked(self):
+        # Изображение сменилось, пока обрабатывалось прежнее.
+        mark_processed(
+            Recipe, self.recipe.pk, 'image', 'recipes/images/other.png'
+        )
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, '')
+
+    def test_replace_keeps_name(self):
+        name = default_storage.save('recipes/images/old.txt', ContentFile(b''))
+        replace(name, b'content')
+        with default_storage.open(name) as file:
+            self.assertEqual(file.read(), b'content')
+        _, files = default_storage.listdir('recipes/images')
+        self.assertFalse([file for file in files if file.endswith('.tmp')])
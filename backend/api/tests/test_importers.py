@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.dataset import DatasetBuilder
+from recipes.models import RecipeTags, Tag
+
+
+def load_tags(data, **kwargs):
+    with tempfile.NamedTemporaryFile(
+        'w', suffix='.json', encoding='utf-8', delete=False
+    ) as file:
+        json.dump(data, file, ensure_ascii=False)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    try:
+        call_command(
+            'load_tags', file.name, stdout=stdout, stderr=stderr, **kwargs
+        )
+    finally:
+        os.remove(file.name)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+class TagImportConflictsTest(TestCase):
+    """Записи, нарушающие уникальность имени тега, пропускаются."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+
+    def load_tags(self, tags):
+        return load_tags({'tags': tags})
+
+    def test_existing_name(self):
+        stdout, stderr = self.load_tags([
+            {'name': 'Завтрак', 'slug': 'morning'},
+            {'name': 'Обед', 'slug': 'lunch'},
+        ])
+        self.assertIn('конфликтов: 1', stdout)
+        self.assertIn('morning', stderr)
+        self.assertEqual(
+            dict(Tag.objects.values_list('slug', 'name')),
+            {'breakfast': 'Завтрак', 'lunch': 'Обед'}
+        )
+
+    def test_duplicate_name_in_file(self):
+        stdout, _ = self.load_tags([
+            {'name': 'Ужин', 'slug': 'dinner'},
+            {'name': 'Ужин', 'slug': 'supper'},
+        ])
+        self.assertIn('конфликтов: 1', stdout)
+        self.assertEqual(Tag.objects.get(name='Ужин').slug, 'dinner')
+        self.assertFalse(Tag.objects.filter(slug='supper').exists())
+
+    def test_rename(self):
+        stdout, _ = self.load_tags([{'name': 'Утро', 'slug': 'breakfast'}])
+        self.assertIn('конфликтов: 0', stdout)
+        self.assertEqual(Tag.objects.get(slug='breakfast').name, 'Утро')
+
+    def test_missing_key(self):
+        with self.assertRaisesMessage(CommandError, '"tags"'):
+            load_tags({'ingredients': []})
+
+
+@override_settings(RECIPE_LIST_CACHE_TIMEOUT=0)
+class TagImportSearchTest(TestCase):
+    """Переименование тега загрузкой обновляет поиск рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=3, recipes=10, tags=2, ingredients=5, subscriptions=1,
+            favorites=1, carts=1, seed=7
+        ).build()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rename(self):
+        tag = Tag.objects.order_by('id').first()
+        recipe_ids = set(
+            RecipeTags.objects.filter(tag=tag).values_list(
+                'recipe_id', flat=True
+            )
+        )
+        self.assertTrue(recipe_ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            load_tags({
+                'tags': [{'name': 'Переименованный', 'slug': tag.slug}]
+            })
+        response = APIClient().get(
+            '/api/recipes/', {'search': 'переименованный', 'limit': 6}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], len(recipe_ids))
@@ -0,0 +1,78 @@
+import re
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+
+from api.middleware import PerformanceMiddleware, QueryInspectorMiddleware
+from api.query_inspector import QueryBudgetExceeded
+from api.views import TagViewSet
+from recipes.models import Tag
+
+PERFORMANCE_MIDDLEWARE = 'api.middleware.PerformanceMiddleware'
+
+
+@override_settings(MIDDLEWARE=[
+    PERFORMANCE_MIDDLEWARE,
+    *(name for name in settings.MIDDLEWARE if name != PERFORMANCE_MIDDLEWARE)
+])
+class PerformanceMiddlewareTest(TransactionTestCase):
+    """Запросы к БД учитываются и в синхронном, и в асинхронном стеке."""
+
+    def setUp(self):
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        self.url = f'/api/tags/{tag.pk}/'
+
+    def queries(self, response):
+        self.assertEqual(response.status_code, 200)
+        return int(
+            re.search(r'"(\d+) queries"', response['Server-Timing'])[1]
+        )
+
+    def test_async_capable(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(
+            iscoroutinefunction(PerformanceMiddleware(get_response))
+        )
+        self.assertFalse(
+            iscoroutinefunction(PerformanceMiddleware(lambda request: None))
+        )
+
+    async def test_async(self):
+        response = await self.async_client.get(self.url)
+        self.assertGreater(self.queries(response), 0)
+
+    def test_sync(self):
+        response = self.client.get(self.url)
+        self.assertGreater(self.queries(response), 0)
+
+
+@mock.patch.object(TagViewSet, 'query_budget', 0)
+class QueryInspectorMiddlewareTest(TransactionTestCase):
+    """Бюджет запросов проверяется и в синхронном, и в асинхронном стеке."""
+
+    def setUp(self):
+        tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        self.url = f'/api/tags/{tag.pk}/'
+
+    def test_async_capable(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(
+            iscoroutinefunction(QueryInspectorMiddleware(get_response))
+        )
+        self.assertFalse(
+            iscoroutinefunction(QueryInspectorMiddleware(lambda request: None))
+        )
+
+    async def test_async(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            await self.async_client.get(self.url)
+
+    def test_sync(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.url)
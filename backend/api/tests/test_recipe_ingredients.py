@@ -0,0 +1,143 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes import counters, shopping_list
+from recipes.dataset import DatasetBuilder
+from recipes.models import Ingredient, RecipeIngredients, ShoppingCart
+from users.models import User
+
+
+class RecipeIngredientsUpdateTest(TestCase):
+    """
+    Изменение ингредиентов рецепта через PATCH меняет только нужные
+    строки и не нарушает списки покупок и счетчики рецептов.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=10, recipes=30, tags=3, ingredients=40, subscriptions=3,
+            favorites=10, carts=10, seed=2
+        ).build()
+        # Рецепт из корзин других пользователей, чтобы изменения
+        # затрагивали их списки покупок.
+        cart = ShoppingCart.objects.exclude(
+            user=F('recipe__author')
+        ).select_related('recipe__author').order_by('id').first()
+        cls.recipe = cart.recipe
+        cls.author = cls.recipe.author
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def current(self):
+        return dict(
+            RecipeIngredients.objects.filter(recipe=self.recipe).values_list(
+                'ingredient_id', 'amount'
+            )
+        )
+
+    def patch(self, ingredients):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.pk}/',
+                {
+                    'ingredients': [
+                        {'id': ingredient_id, 'amount': amount}
+                        for ingredient_id, amount in ingredients.items()
+                    ],
+                    'tags': list(
+                        self.recipe.tags.values_list('id', flat=True)
+                    ),
+                },
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.current(), ingredients)
+        self.assertEqual(shopping_list.find_mismatches(), {})
+        self.assertEqual(counters.find_mismatches(), {})
+        return response
+
+    def new_ingredient(self, ingredients):
+        return Ingredient.objects.exclude(
+            id__in=list(ingredients)
+        ).order_by('id').values_list('id', flat=True).first()
+
+    def test_add(self):
+        ingredients = self.current()
+        ingredients[self.new_ingredient(ingredients)] = 7
+        self.patch(ingredients)
+
+    def test_change(self):
+        ingredients = self.current()
+        ingredient_id = next(iter(ingredients))
+        ingredients[ingredient_id] += 5
+        pks = set(
+            RecipeIngredients.objects.filter(
+                recipe=self.recipe
+            ).values_list('pk', flat=True)
+        )
+        self.patch(ingredients)
+        # Измененная строка обновляется, а не создается заново.
+        self.assertEqual(
+            set(
+                RecipeIngredients.objects.filter(
+                    recipe=self.recipe
+                ).values_list('pk', flat=True)
+            ),
+            pks
+        )
+
+    def test_remove(self):
+        ingredients = self.current()
+        if len(ingredients) < 2:
+            ingredients[self.new_ingredient(ingredients)] = 3
+            self.patch(ingredients)
+        del ingredients[next(iter(ingredients))]
+        self.patch(ingredients)
+
+    def test_add_change_remove(self):
+        ingredients = self.current()
+        removed, *rest = ingredients
+        del ingredients[removed]
+        for ingredient_id in rest:
+            ingredients[ingredient_id] += 1
+        ingredients[self.new_ingredient(ingredients | {removed: 0})] = 2
+        self.patch(ingredients)
+
+    def patch_queries(self, ingredients):
+        with CaptureQueriesContext(connection) as queries:
+            self.patch(ingredients)
+        return len(queries)
+
+    def add_cart_users(self, count):
+        users = User.objects.bulk_create([
+            User(username=f'cart-user-{number}',
+                 email=f'cart-user-{number}@example.com')
+            for number in range(count)
+        ])
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=user, recipe=self.recipe) for user in users
+        ])
+        counters.reconcile()
+        shopping_list.rebuild()
+
+    def test_queries_do_not_grow(self):
+        # Одна и та же по форме правка: одно добавление, одно изменение
+        # и одно удаление, туда и обратно.
+        before = self.current()
+        removed, changed, *_ = before
+        after = dict(before)
+        del after[removed]
+        after[changed] += 1
+        after[self.new_ingredient(before)] = 2
+        small = [self.patch_queries(after), self.patch_queries(before)]
+        self.add_cart_users(200)
+        large = [self.patch_queries(after), self.patch_queries(before)]
+        self.assertEqual(large, small)
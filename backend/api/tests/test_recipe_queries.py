@@ -0,0 +1,209 @@
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.cache import recipe_cache
+from api.pagination import PageLimitPagination
+from recipes.dataset import DatasetBuilder
+from recipes.models import (
+    Ingredient, Recipe, RecipeIngredients, RecipeTags, Tag
+)
+from users.models import User
+
+# Размеры страниц, на которых сравнивается кол-во запросов.
+PAGE_SIZES = (1, 6, 50)
+# Методы кэша, обращения к которым считаются.
+CACHE_METHODS = ('get', 'get_many', 'set', 'set_many')
+# Кол-во тегов и ингредиентов рецепта, на которых сравнивается
+# кол-во запросов.
+RELATED_COUNTS = (1, 5, 20)
+
+
+@override_settings(RECIPE_LIST_CACHE_TIMEOUT=0)
+@mock.patch.object(PageLimitPagination, 'max_page_size', max(PAGE_SIZES))
+class RecipeListQueriesTest(TestCase):
+    """Кол-во запросов списка рецептов не зависит от размера страницы."""
+
+    # Запросы анонимного пользователя: рецепты, кол-во, теги, ингредиенты.
+    ANONYMOUS_QUERIES = 4
+    # Запросы пользователя: те же и подписки для флага is_subscribed.
+    USER_QUERIES = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=20, recipes=60, tags=4, ingredients=50, subscriptions=5,
+            favorites=10, carts=5, seed=1
+        ).build()
+        cls.user = User.objects.order_by('id').first()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assert_flat(self, expected):
+        for page_size in PAGE_SIZES:
+            with self.subTest(page_size=page_size):
+                # Кэш представлений не должен скрывать запросы.
+                cache.clear()
+                with self.assertNumQueries(expected):
+                    response = self.client.get(
+                        '/api/recipes/', {'limit': page_size}
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), page_size)
+                self.assertEqual(
+                    response.data['count'], Recipe.objects.count()
+                )
+
+    def test_anonymous(self):
+        self.assert_flat(self.ANONYMOUS_QUERIES)
+
+    def test_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_flat(self.USER_QUERIES)
+
+    def test_authenticated_flags(self):
+        """Флаги берутся из аннотаций и совпадают с данными в БД."""
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/recipes/', {'limit': 50})
+        favorited = set(
+            self.user.favorites.values_list('recipe_id', flat=True)
+        )
+        in_cart = set(
+            self.user.shopping_cart.values_list('recipe_id', flat=True)
+        )
+        for recipe in response.data['results']:
+            self.assertEqual(recipe['is_favorited'], recipe['id'] in favorited)
+            self.assertEqual(
+                recipe['is_in_shopping_cart'], recipe['id'] in in_cart
+            )
+
+
+class RecipeDetailQueriesTest(TestCase):
+    """
+    Кол-во запросов страницы рецепта не зависит от кол-ва его тегов
+    и ингредиентов.
+    """
+
+    # Запросы анонимного пользователя: рецепт, теги, ингредиенты.
+    ANONYMOUS_QUERIES = 3
+    # Запросы пользователя: те же и подписки для флага is_subscribed.
+    USER_QUERIES = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=5, recipes=5, tags=max(RELATED_COUNTS),
+            ingredients=max(RELATED_COUNTS), subscriptions=2, favorites=2,
+            carts=2, seed=1
+        ).build()
+        cls.user = User.objects.order_by('id').first()
+        cls.recipe = Recipe.objects.order_by('id').first()
+        cls.url = f'/api/recipes/{cls.recipe.pk}/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def set_related(self, count):
+        """Метод для замены тегов и ингредиентов рецепта."""
+        RecipeTags.objects.filter(recipe=self.recipe).delete()
+        RecipeIngredients.objects.filter(recipe=self.recipe).delete()
+        RecipeTags.objects.bulk_create(
+            RecipeTags(recipe=self.recipe, tag=tag)
+            for tag in Tag.objects.order_by('id')[:count]
+        )
+        RecipeIngredients.objects.bulk_create(
+            RecipeIngredients(
+                recipe=self.recipe, ingredient=ingredient, amount=1
+            )
+            for ingredient in Ingredient.objects.order_by('id')[:count]
+        )
+
+    def assert_flat(self, expected):
+        for count in RELATED_COUNTS:
+            with self.subTest(count=count):
+                self.set_related(count)
+                # Кэш представлений не должен скрывать запросы.
+                cache.clear()
+                with self.assertNumQueries(expected):
+                    response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['tags']), count)
+                self.assertEqual(len(response.data['ingredients']), count)
+
+    def test_anonymous(self):
+        self.assert_flat(self.ANONYMOUS_QUERIES)
+
+    def test_authenticated(self):
+        self.client.force_authenticate(self.user)
+        self.assert_flat(self.USER_QUERIES)
+
+
+@override_settings(RECIPE_LIST_CACHE_TIMEOUT=0)
+@mock.patch.object(PageLimitPagination, 'max_page_size', max(PAGE_SIZES))
+class RecipeRepresentationCacheTest(TestCase):
+    """
+    Кол-во обращений к кэшу представлений рецептов не зависит
+    от размера страницы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=10, recipes=60, tags=4, ingredients=50, subscriptions=2,
+            favorites=2, carts=2, seed=1
+        ).build()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_page(self, page_size):
+        """
+        Метод для запроса страницы. Возвращает кол-во обращений к кэшу
+        и изменение счетчиков попаданий и промахов. Вложенные вызовы
+        (get_many локального кэша вызывает get) не считаются.
+        """
+        backend = caches['default']
+        calls = {name: 0 for name in CACHE_METHODS}
+        depth = [0]
+
+        def counted(name):
+            method = getattr(backend, name)
+
+            def wrapper(*args, **kwargs):
+                if not depth[0]:
+                    calls[name] += 1
+                depth[0] += 1
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    depth[0] -= 1
+            return wrapper
+
+        stats = recipe_cache.stats
+        with mock.patch.multiple(backend, **{
+            name: counted(name) for name in CACHE_METHODS
+        }):
+            response = self.client.get('/api/recipes/', {'limit': page_size})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return calls, {
+            name: recipe_cache.stats[name] - stats[name]
+            for name in ('hits', 'misses')
+        }
+
+    def test_calls_do_not_grow(self):
+        calls = {}
+        for page_size in PAGE_SIZES:
+            cache.clear()
+            cold, cold_stats = self.get_page(page_size)
+            warm, warm_stats = self.get_page(page_size)
+            self.assertEqual(cold_stats, {'hits': 0, 'misses': page_size})
+            self.assertEqual(warm_stats, {'hits': page_size, 'misses': 0})
+            calls[page_size] = cold, warm
+        self.assertEqual(len(set(map(str, calls.values()))), 1, calls)
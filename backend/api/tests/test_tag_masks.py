@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.pagination import PageLimitPagination
+from recipes.dataset import DatasetBuilder
+from recipes.models import Recipe, RecipeTags, Tag
+from recipes.tag_masks import update_tag_masks
+
+
+@override_settings(RECIPE_LIST_CACHE_TIMEOUT=0)
+@mock.patch.object(PageLimitPagination, 'max_page_size', 100)
+class TagMasksTest(TestCase):
+    """Теги без бита получают его вместе с пересчетом масок рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=5, recipes=20, tags=3, ingredients=10, subscriptions=1,
+            favorites=1, carts=1, seed=3
+        ).build()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def load_tags(self, tags):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.json', encoding='utf-8', delete=False
+        ) as file:
+            json.dump({'tags': tags}, file, ensure_ascii=False)
+        self.addCleanup(os.remove, file.name)
+        call_command(
+            'load_tags', file.name, stdout=io.StringIO(), stderr=io.StringIO()
+        )
+
+    def filtered_ids(self, slug):
+        response = self.client.get(
+            '/api/recipes/', {'tags': slug, 'limit': 100}
+        )
+        self.assertEqual(response.status_code, 200)
+        return {recipe['id'] for recipe in response.data['results']}
+
+    def tagged_ids(self, tag):
+        return set(
+            RecipeTags.objects.filter(tag=tag).values_list(
+                'recipe_id', flat=True
+            )
+        )
+
+    def test_import_assigns_bits(self):
+        self.load_tags([
+            {'name': 'Новый тег', 'slug': 'new-tag'},
+            {'name': 'Другой тег', 'slug': 'other-tag'},
+        ])
+        bits = list(Tag.objects.values_list('bit', flat=True))
+        self.assertNotIn(None, bits)
+        self.assertEqual(len(bits), len(set(bits)))
+
+    def test_save_gains_bit(self):
+        tag = Tag.objects.order_by('id').first()
+        recipe_ids = self.tagged_ids(tag)
+        self.assertTrue(recipe_ids)
+        # Состояние тега, загруженного через bulk_create без бита.
+        Tag.objects.filter(pk=tag.pk).update(bit=None)
+        update_tag_masks(Recipe.objects.values_list('id', flat=True))
+        tag.refresh_from_db()
+        tag.save()
+        self.assertIsNotNone(tag.bit)
+        self.assertEqual(self.filtered_ids(tag.slug), recipe_ids)
+
+    def test_import_gains_bit(self):
+        tag = Tag.objects.order_by('id').first()
+        recipe_ids = self.tagged_ids(tag)
+        Tag.objects.filter(pk=tag.pk).update(bit=None)
+        update_tag_masks(Recipe.objects.values_list('id', flat=True))
+        self.load_tags([{'name': 'Переименованный тег', 'slug': tag.slug}])
+        tag.refresh_from_db()
+        self.assertIsNotNone(tag.bit)
+        self.assertEqual(self.filtered_ids(tag.slug), recipe_ids)
@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from api.cache import token_user_cache
+from api.checks import check_token_cache
+from users.models import User
+
+LOCAL_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+CACHE_DIR = tempfile.mkdtemp()
+SHARED_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': CACHE_DIR,
+}}
+
+
+@override_settings(AUTH_MODE='cached_token')
+class TokenUserCacheTest(TestCase):
+    """Кэш токенов работает только с общим для процессов кэшем."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='secret'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.addCleanup(token_user_cache.discard, 'token')
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_local_cache(self):
+        token_user_cache.store('token', self.user)
+        self.assertIsNone(token_user_cache.lookup('token'))
+        self.assertEqual(
+            [warning.id for warning in check_token_cache(None)], ['api.W001']
+        )
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_shared_cache(self):
+        token_user_cache.store('token', self.user)
+        self.assertEqual(token_user_cache.lookup('token').pk, self.user.pk)
+        self.assertEqual(check_token_cache(None), [])
+        token_user_cache.invalidate_user(self.user.pk)
+        self.assertIsNone(token_user_cache.lookup('token'))
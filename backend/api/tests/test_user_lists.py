@@ -0,0 +1,157 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.cache import get_version
+from api.constants import RECIPE_LIST_VERSION_KEY
+from recipes import counters, shopping_list, user_lists
+from recipes.dataset import DatasetBuilder
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+
+class UserListsTest(TestCase):
+    """
+    Добавление и удаление рецептов в избранном и корзине работает
+    на любой СУБД и не нарушает счетчики и списки покупок.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        DatasetBuilder(
+            users=5, recipes=20, tags=3, ingredients=10, subscriptions=1,
+            favorites=3, carts=3, seed=4
+        ).build()
+        cls.user = User.objects.order_by('id').first()
+        cls.recipe_ids = list(
+            Recipe.objects.exclude(favorites__user=cls.user).exclude(
+                shopping_cart__user=cls.user
+            ).order_by('id').values_list('id', flat=True)[:3]
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, url, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url, data, format='json')
+
+    def assert_consistent(self):
+        self.assertEqual(shopping_list.find_mismatches(), {})
+        self.assertEqual(counters.find_mismatches(), {})
+
+    def test_single(self):
+        recipe_id = self.recipe_ids[0]
+        for model, url in (
+            (Favorite, f'/api/recipes/{recipe_id}/favorite/'),
+            (ShoppingCart, f'/api/recipes/{recipe_id}/shopping_cart/'),
+        ):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.request('post', url).status_code, 201)
+                self.assertEqual(self.request('post', url).status_code, 400)
+                self.assertTrue(model.objects.filter(
+                    user=self.user, recipe_id=recipe_id
+                ).exists())
+                self.assert_consistent()
+                self.assertEqual(self.request('delete', url).status_code, 204)
+                self.assertEqual(self.request('delete', url).status_code, 400)
+                self.assert_consistent()
+
+    def test_bulk(self):
+        for model, url in (
+            (Favorite, '/api/recipes/favorite/'),
+            (ShoppingCart, '/api/recipes/shopping_cart/'),
+        ):
+            with self.subTest(model=model.__name__):
+                response = self.request(
+                    'post', url, {'recipes': self.recipe_ids}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [recipe['id'] for recipe in response.data['recipes']],
+                    self.recipe_ids
+                )
+                self.assert_consistent()
+                response = self.request(
+                    'delete', url, {'recipes': self.recipe_ids}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(model.objects.filter(
+                    user=self.user, recipe_id__in=self.recipe_ids
+                ).exists())
+                self.assert_consistent()
+
+    def change(self, function, model, recipe_ids, sign):
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                recipes = function(model, self.user.pk, recipe_ids, sign)
+        self.assert_consistent()
+        return [recipe.id for recipe in recipes], len(queries)
+
+    def test_orm_queries(self):
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                counts = {}
+                for recipe_ids in (self.recipe_ids[:1], self.recipe_ids):
+                    for sign in (1, -1):
+                        changed, count = self.change(
+                            user_lists._change_recipes_orm, model,
+                            recipe_ids, sign
+                        )
+                        self.assertCountEqual(changed, recipe_ids)
+                        counts.setdefault(sign, set()).add(count)
+                # Кол-во запросов не зависит от кол-ва рецептов.
+                self.assertEqual([len(c) for c in counts.values()], [1, 1])
+
+    @skipUnless(
+        connection.vendor == 'postgresql', 'CTE с RETURNING для PostgreSQL'
+    )
+    def test_cte(self):
+        for model in (Favorite, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                for sign in (1, -1):
+                    changed, _ = self.change(
+                        user_lists._change_recipes, model, self.recipe_ids,
+                        sign
+                    )
+                    self.assertCountEqual(changed, self.recipe_ids)
+                    # Повтор не меняет ни записи, ни счетчики.
+                    changed, _ = self.change(
+                        user_lists._change_recipes, model, self.recipe_ids,
+                        sign
+                    )
+                    self.assertEqual(changed, [])
+                self.assertFalse(model.objects.filter(
+                    user=self.user, recipe_id__in=self.recipe_ids
+                ).exists())
+
+    def test_delete_recipe_in_cart(self):
+        recipe = Recipe.objects.filter(shopping_cart__isnull=False).first()
+        recipe.delete()
+        self.assertFalse(
+            ShoppingCart.objects.filter(recipe_id=recipe.pk).exists()
+        )
+        self.assert_consistent()
+
+    def test_cached_list_counters(self):
+        anonymous = APIClient()
+        first = anonymous.get('/api/recipes/').data['results'][0]
+        version = get_version(RECIPE_LIST_VERSION_KEY)
+        self.request('post', f'/api/recipes/{first["id"]}/favorite/')
+        # Счетчики не сбрасывают закэшированные страницы списка.
+        self.assertEqual(get_version(RECIPE_LIST_VERSION_KEY), version)
+        cached = anonymous.get('/api/recipes/')
+        self.assertEqual(
+            cached.data['results'][0]['favorites_count'],
+            first['favorites_count'] + 1
+        )
+        with override_settings(RECIPE_LIST_CACHE_TIMEOUT=0):
+            self.assertEqual(
+                anonymous.get('/api/recipes/').content, cached.content
+            )
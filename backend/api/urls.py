@@ -1,8 +1,10 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    IngredientViewSet, RecipeViewSet, TagViewSet,
+    IngredientViewSet, MetricsView, RecipeCacheStatsView, RecipeViewSet,
+    TagViewSet,
 )
 from users.views import UserViewSet
 
@@ -18,5 +20,35 @@ api_v1.register('users', UserViewSet, basename='users')
 urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
+    path(
+        'cache/stats/', RecipeCacheStatsView.as_view(),
+        name='recipe-cache-stats'
+    ),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(api_v1.urls)),
 ]
+
+if settings.AUTH_MODE == 'jwt':
+    urlpatterns.insert(0, path('auth/', include('djoser.urls.jwt')))
+
+if settings.ASYNC_READ_VIEWS:
+    from . import async_views as views
+
+    router_views = {url.name: url.callback for url in api_v1.urls}
+    urlpatterns = [
+        path(
+            route,
+            views.async_read_view(router_views[name], handler, supports),
+            name=name
+        )
+        for route, name, handler, supports in (
+            ('recipes/', 'recipe-list', views.recipe_list,
+             views.is_page_mode),
+            ('recipes/<int:pk>/', 'recipe-detail', views.recipe_detail, None),
+            ('tags/', 'tag-list', views.tag_list, None),
+            ('tags/<int:pk>/', 'tag-detail', views.tag_detail, None),
+            ('ingredients/', 'ingredient-list', views.ingredient_list, None),
+            ('ingredients/<int:pk>/', 'ingredient-detail',
+             views.ingredient_detail, None),
+        )
+    ] + urlpatterns
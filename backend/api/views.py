@@ -1,28 +1,43 @@
-from django.db.models import Sum
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
     IsAuthenticated
 )
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .cache import (
+    recipe_cache, recipe_list_cache, short_link_cache, shopping_list_key
+)
+from .catalog import CatalogPayload
 from .constants import (
+    INGREDIENT_CATALOG_VERSION_KEY, MAX_LENGTH_SHORT_LINK,
+    TAG_CATALOG_VERSION_KEY,
     UNEXIST_RECIPE_CREATE_ERROR, DUPLICATE_OF_RECIPE_ADD_CART,
     UNEXIST_SHOPPING_CART_ERROR
 
 )
 from .filters import RecipeFilter, IngredientFilter
+from .metrics import render_metrics
+from .pagination import RecipePagination
+from .renderers import (
+    CSVRenderer, FastJSONRenderer, PDFRenderer, PlainTextRenderer
+)
 from recipes.models import (
     Ingredient, Favorite, Recipe, RecipeIngredients,
-    ShoppingCart, Tag
+    ShoppingCart, ShoppingListItem, Tag
 )
 from .serializers import (
     IngredientSerializer,
     RecipeCreateSerializer,
+    RecipeIdsSerializer,
     ShortRecipeSerializer,
     TagSerializer,
 )
@@ -30,19 +45,43 @@ from users.permissions import (
     IsAuthor,
     ReadOnly
 )
-from recipes.utils import create_report_of_shopping_list
+from recipes import user_lists
+from recipes.utils import (
+    REPORT_FORMATS, cached_report_of_shopping_list,
+    create_report_of_shopping_list
+)
+
+
+class CatalogViewSetMixin:
+    """
+    Миксин для справочников.
+    Полный список без фильтров отдается заранее подготовленным
+    содержимым с ETag и Last-Modified.
+    """
+
+    catalog = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        return self.catalog.response(
+            request._request,
+            lambda: self.get_serializer(self.get_queryset(), many=True).data
+        )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для Тэгов."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
     pagination_class = None
+    catalog = CatalogPayload(TAG_CATALOG_VERSION_KEY)
+    query_budget = 4
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogViewSetMixin, viewsets.ReadOnlyModelViewSet):
     """Вьюсет для Ингредиентов."""
 
     queryset = Ingredient.objects.all()
@@ -50,6 +89,33 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [IngredientFilter, ]
     permission_classes = [AllowAny]
     pagination_class = None
+    catalog = CatalogPayload(INGREDIENT_CATALOG_VERSION_KEY)
+    query_budget = 4
+
+
+def recipe_queryset(queryset, user):
+    """
+    Функция для получения рецептов за фиксированное число запросов.
+    Флаги избранного и списка покупок вычисляются в БД,
+    теги и ингредиенты подгружаются пачкой.
+    """
+    queryset = queryset.prefetch_related(
+        'tags',
+        Prefetch(
+            'recipe_ingredients',
+            queryset=RecipeIngredients.objects.select_related('ingredient')
+        )
+    ).select_related('author').defer('search_document')
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(
+        is_favorited=Exists(Favorite.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )),
+        is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        )),
+    )
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -60,13 +126,33 @@ class RecipeViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, ]
     filterset_class = RecipeFilter
     serializer_class = RecipeCreateSerializer
+    pagination_class = RecipePagination
+    lookup_value_regex = r'\d+'
+    query_budget = {
+        'list': 10, 'retrieve': 8, 'get_short_link': 6,
+        'download_shopping_cart': 6,
+    }
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
-        if user.is_authenticated:
-            queryset = queryset.prefetch_related('favorites', 'shopping_cart')
-        return queryset
+        return recipe_queryset(super().get_queryset(), self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Метод для получения списка рецептов.
+        Страницы для анонимных пользователей в JSON кэшируются.
+        """
+        key = None
+        if request.accepted_renderer.format == 'json':
+            key = recipe_list_cache.make_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+        page = recipe_list_cache.get(key)
+        if page is not None:
+            return Response(page)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            recipe_list_cache.set(key, response.data)
+        return response
 
     def get_permissions(self):
         """Метод для прав доступа, в зависимости от метода."""
@@ -114,54 +200,159 @@ class RecipeViewSet(viewsets.ModelViewSet):
         else:
             return self.common_delete_from(Favorite, request.user, pk)
 
+    @action(
+        detail=False, methods=['POST', 'DELETE'], url_path='shopping_cart',
+        url_name='shopping-cart-bulk'
+    )
+    def shopping_cart_bulk(self, request):
+        """Метод для добавления/удаления нескольких рецептов в покупки."""
+        return self.common_bulk_change(ShoppingCart, request)
+
+    @action(
+        detail=False, methods=['POST', 'DELETE'], url_path='favorite',
+        url_name='favorite-bulk'
+    )
+    def favorite_bulk(self, request):
+        """Метод для добавления/удаления нескольких рецептов в избранное."""
+        return self.common_bulk_change(Favorite, request)
+
     def common_add_to(self, model, user, pk):
-        """Общий метод для добавления рецепта в список покупок или избранное"""
-        if model.objects.filter(user=user, recipe__id=pk).exists():
-            return Response(
-                {'errors': DUPLICATE_OF_RECIPE_ADD_CART},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        recipe = get_object_or_404(Recipe, id=pk)
-        model.objects.create(user=user, recipe=recipe)
-        serializer = ShortRecipeSerializer(recipe)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        """
+        Общий метод для добавления рецепта в список покупок или избранное.
+        Добавление выполняется одним запросом, рецепт проверяется
+        только при отказе.
+        """
+        recipes = user_lists.add_recipes(model, user.id, [int(pk)])
+        if recipes:
+            serializer = ShortRecipeSerializer(recipes[0])
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        get_object_or_404(Recipe.objects.only('id'), id=pk)
+        return Response(
+            {'errors': DUPLICATE_OF_RECIPE_ADD_CART},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
     def common_delete_from(self, model, user, pk):
         """
         Общий метод для удаления рецепта из списка покупок или избранного.
+        Удаление выполняется одним запросом, рецепт проверяется
+        только при отказе.
         """
-        recipe = get_object_or_404(Recipe, id=pk)
-
-        obj = model.objects.filter(user=user, recipe=recipe)
-        if obj.exists():
-            obj.delete()
+        if user_lists.remove_recipes(model, user.id, [int(pk)]):
             return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe.objects.only('id'), id=pk)
+        return Response(
+            {'errors': UNEXIST_RECIPE_CREATE_ERROR},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    def common_bulk_change(self, model, request):
+        """
+        Общий метод для добавления (POST) или удаления (DELETE) рецептов
+        из тела {"recipes": [id, ...]} одним запросом.
+        В ответе - измененные рецепты и id пропущенных: уже добавленных
+        или отсутствующих в списке при удалении, а также несуществующих.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+        if request.method == 'POST':
+            recipes = user_lists.add_recipes(
+                model, request.user.id, recipe_ids
+            )
         else:
-            return Response(
-                {'errors': UNEXIST_RECIPE_CREATE_ERROR},
-                status=status.HTTP_400_BAD_REQUEST
+            recipes = user_lists.remove_recipes(
+                model, request.user.id, recipe_ids
             )
+        changed_ids = {recipe.id for recipe in recipes}
+        return Response(
+            {
+                'recipes': ShortRecipeSerializer(recipes, many=True).data,
+                'skipped': [
+                    recipe_id for recipe_id in recipe_ids
+                    if recipe_id not in changed_ids
+                ],
+            },
+            status=status.HTTP_200_OK
+        )
 
-    @action(detail=False, methods=['GET'])
+    @action(
+        detail=False,
+        methods=['GET'],
+        renderer_classes=[
+            FastJSONRenderer, PlainTextRenderer, CSVRenderer, PDFRenderer
+        ]
+    )
     def download_shopping_cart(self, request):
-        """Метод для скачивания списка покупок."""
+        """
+        Метод для скачивания списка покупок.
+        Формат задается параметром ?format=txt|csv|pdf, по умолчанию txt.
+        Готовый файл кэшируется до изменения корзины пользователя.
+        """
         user = request.user
+        report_format = request.accepted_renderer.format
+        if report_format not in REPORT_FORMATS:
+            report_format = 'txt'
+        cache_key = shopping_list_key(user.id, report_format)
+        content = cache.get(cache_key)
+        if content is not None:
+            return cached_report_of_shopping_list(
+                user, report_format, content
+            )
         if not user.shopping_cart.exists():
             return Response(
                 {'errors': UNEXIST_SHOPPING_CART_ERROR},
                 status=status.HTTP_400_BAD_REQUEST)
-        ingredients = RecipeIngredients.objects.filter(
-            recipe__shopping_cart__user=user
-        ).values(
+        ingredients = ShoppingListItem.objects.filter(user=user).values(
             'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        return create_report_of_shopping_list(user, ingredients)
+            'ingredient__measurement_unit',
+            'amount'
+        ).order_by('ingredient__name')
+        return create_report_of_shopping_list(
+            user, ingredients.iterator(), report_format, cache_key
+        )
 
 
 class RecipeRedirectView(APIView):
     permission_classes = [ReadOnly]
 
     def get(self, request, short_link):
-        recipe = get_object_or_404(Recipe, short_link=short_link)
-        return redirect(recipe.get_absolute_url())
+        recipe_id = None
+        if len(short_link) <= MAX_LENGTH_SHORT_LINK:
+            recipe_id = short_link_cache.resolve(short_link)
+        if recipe_id is None:
+            raise Http404
+        return redirect(Recipe(pk=recipe_id).get_absolute_url())
+
+
+class RecipeCacheStatsView(APIView):
+    """
+    Счетчики кэша представлений рецептов текущего процесса,
+    счетчики кэша страниц списка - с префиксом list_.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                **recipe_cache.stats,
+                **{
+                    f'list_{name}': value
+                    for name, value in recipe_list_cache.stats.items()
+                },
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class MetricsView(APIView):
+    """Гистограммы времени запросов в текстовом формате Prometheus."""
+
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PlainTextRenderer]
+
+    def get(self, request):
+        return Response(
+            render_metrics().encode(), status=status.HTTP_200_OK
+        )
@@ -0,0 +1,83 @@
+import psycopg2.extras
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .pool import ConnectionPool, get_pool
+
+# Параметры пула по умолчанию.
+POOL_DEFAULTS = {
+    'MIN_SIZE': 2,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10.0,
+    'IDLE_TIMEOUT': 300.0,
+    'MAX_LIFETIME': 3600.0,
+    'CHECK_INTERVAL': 30.0,
+}
+
+
+def connect(conn_params, isolation_level=None):
+    """Функция для открытия соединения как в бэкенде PostgreSQL."""
+    connection = base.Database.connect(**conn_params)
+    if isolation_level is not None:
+        connection.isolation_level = isolation_level
+    psycopg2.extras.register_default_jsonb(
+        conn_or_curs=connection, loads=lambda value: value
+    )
+    return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Бэкенд PostgreSQL с пулом соединений процесса.
+    Django открывает соединение на поток (для ASGI - на поток
+    sync_to_async) и закрывает его в конце запроса, а этот бэкенд
+    вместо закрытия возвращает соединение в пул. Параметры задаются
+    в DATABASES[alias]['POOL'] ключами POOL_DEFAULTS.
+    """
+
+    pool = None
+
+    def get_pool(self, conn_params, isolation_level):
+        options = {**POOL_DEFAULTS, **self.settings_dict.get('POOL', {})}
+        return get_pool(
+            self.alias, repr(sorted(conn_params.items())),
+            lambda: ConnectionPool(
+                lambda: connect(conn_params, isolation_level),
+                min_size=options['MIN_SIZE'],
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                idle_timeout=options['IDLE_TIMEOUT'],
+                max_lifetime=options['MAX_LIFETIME'],
+                check_interval=options['CHECK_INTERVAL'],
+            )
+        )
+
+    def get_new_connection(self, conn_params):
+        # Служебные соединения без БД (создание тестовой БД) не пулируются.
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+        level = self.settings_dict['OPTIONS'].get('isolation_level')
+        try:
+            self.isolation_level = IsolationLevel(
+                IsolationLevel.READ_COMMITTED if level is None else level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Недопустимый уровень изоляции транзакций {level}.'
+            )
+        self.pool = self.get_pool(
+            conn_params, None if level is None else self.isolation_level
+        )
+        return self.pool.getconn()
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Соединение остается у обертки до выхода из блока
+                # atomic, поэтому в пул оно не возвращается.
+                return self.pool.discard(self.connection)
+            return self.pool.putconn(self.connection)
@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from api.constants import DB_POOL_WAIT_BUCKETS, METRICS_PREFIX
+from api.metrics import (
+    Histogram, escape_label, header_lines, histogram_lines,
+    register_collector
+)
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Свободное соединение не появилось за время ожидания."""
+
+
+class ConnectionPool:
+    """
+    Пул соединений с БД, общий для всех потоков процесса.
+    Соединения выдаются в порядке LIFO, поэтому при спаде нагрузки
+    лишние соединения простаивают и закрываются по idle_timeout,
+    но не меньше min_size. Соединение, простоявшее дольше
+    check_interval, перед выдачей проверяется запросом SELECT 1,
+    соединение старше max_lifetime закрывается при возврате.
+    """
+
+    def __init__(self, connect, min_size=2, max_size=10, timeout=10.0,
+                 idle_timeout=300.0, max_lifetime=3600.0, check_interval=30.0):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        self._condition = threading.Condition()
+        # Свободные соединения: (соединение, время возврата).
+        self._idle = deque()
+        # Время открытия соединений пула.
+        self._opened = {}
+        self.in_use = 0
+        self.waiting = 0
+        self.stats = {'opened': 0, 'closed': 0, 'timeouts': 0,
+                      'failed_checks': 0}
+        self.wait_time = Histogram(DB_POOL_WAIT_BUCKETS)
+
+    def prewarm(self):
+        """
+        Метод для открытия min_size соединений при создании пула,
+        чтобы первые запросы не ждали подключения к БД.
+        """
+        while True:
+            with self._condition:
+                if len(self._opened) >= self.min_size:
+                    return
+            connection = self.connect()
+            now = time.monotonic()
+            with self._condition:
+                self._opened[connection] = now
+                self._idle.append((connection, now))
+                self.stats['opened'] += 1
+                self._condition.notify()
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+
+    def _expire_idle(self, now):
+        """Метод для закрытия простаивающих соединений сверх min_size."""
+        while (
+            self._idle and len(self._opened) > self.min_size
+            and now - self._idle[0][1] > self.idle_timeout
+        ):
+            connection, _ = self._idle.popleft()
+            del self._opened[connection]
+            self._close(connection)
+            self.stats['closed'] += 1
+
+    def discard(self, connection):
+        """Метод для закрытия выданного соединения с удалением из пула."""
+        self._close(connection)
+        self._release(connection, 'closed')
+
+    def _release(self, connection, stat=None):
+        with self._condition:
+            self._opened.pop(connection, None)
+            self.in_use -= 1
+            if stat is not None:
+                self.stats[stat] += 1
+            self._condition.notify()
+
+    def is_healthy(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Метод для получения соединения с ожиданием до timeout секунд."""
+        started = time.monotonic()
+        placeholder = None
+        deadline = started + self.timeout
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    self._expire_idle(now)
+                    if self._idle:
+                        connection, released = self._idle.pop()
+                        break
+                    if len(self._opened) < self.max_size:
+                        # Место в пуле занимается до открытия соединения.
+                        connection = placeholder = object()
+                        self._opened[placeholder] = now
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'Нет свободных соединений с БД за {self.timeout} '
+                            f'с (max_size={self.max_size}).'
+                        )
+                    self.waiting += 1
+                    self._condition.wait(remaining)
+                    self.waiting -= 1
+                self.in_use += 1
+                self.wait_time.observe(now - started)
+            if connection is placeholder:
+                return self._open(placeholder)
+            if (
+                now - released <= self.check_interval
+                or self.is_healthy(connection)
+            ):
+                return connection
+            self._close(connection)
+            self._release(connection, 'failed_checks')
+
+    def _open(self, placeholder):
+        try:
+            connection = self.connect()
+        except Exception:
+            self._release(placeholder)
+            raise
+        with self._condition:
+            del self._opened[placeholder]
+            self._opened[connection] = time.monotonic()
+            self.stats['opened'] += 1
+        return connection
+
+    def reset(self, connection):
+        """
+        Метод для подготовки соединения к повторной выдаче.
+        Незавершенная транзакция откатывается.
+        """
+        if connection.closed:
+            return False
+        try:
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            connection.autocommit = True
+        except psycopg2.Error:
+            return False
+        return True
+
+    def putconn(self, connection):
+        """Метод для возврата соединения в пул."""
+        now = time.monotonic()
+        with self._condition:
+            opened = self._opened.get(connection, now)
+        if now - opened > self.max_lifetime or not self.reset(connection):
+            self.discard(connection)
+            return
+        with self._condition:
+            self.in_use -= 1
+            self._idle.append((connection, now))
+            self._condition.notify()
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                'size': len(self._opened), 'in_use': self.in_use,
+                'idle': len(self._idle), 'waiting': self.waiting,
+                'max_size': self.max_size, **self.stats,
+                'wait_time': self.wait_time.snapshot(),
+            }
+
+
+# Пулы процесса по псевдониму БД и параметрам подключения.
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, key, create):
+    """
+    Функция для получения пула с созданием при первом обращении.
+    Новый пул сразу открывает min_size соединений.
+    """
+    pool = pools.get((alias, key))
+    if pool is None:
+        with pools_lock:
+            pool = pools.get((alias, key))
+            if pool is None:
+                pool = create()
+                pool.prewarm()
+                pools[(alias, key)] = pool
+    return pool
+
+
+# Метрики пулов: имя, тип, описание.
+POOL_METRICS = (
+    ('size', 'gauge', 'Кол-во открытых соединений пула.'),
+    ('in_use', 'gauge', 'Кол-во выданных соединений пула.'),
+    ('idle', 'gauge', 'Кол-во свободных соединений пула.'),
+    ('waiting', 'gauge', 'Кол-во потоков, ожидающих соединение.'),
+    ('max_size', 'gauge', 'Максимальный размер пула.'),
+    ('opened', 'counter', 'Кол-во открытых за все время соединений.'),
+    ('closed', 'counter', 'Кол-во закрытых за все время соединений.'),
+    ('timeouts', 'counter', 'Кол-во отказов по времени ожидания.'),
+    ('failed_checks', 'counter', 'Кол-во соединений, не прошедших проверку.'),
+)
+
+
+@register_collector
+def pool_metrics():
+    """Функция для выгрузки метрик пулов соединений с БД."""
+    snapshots = [
+        (f'alias="{escape_label(alias)}"', pool.snapshot())
+        for (alias, _), pool in sorted(
+            pools.items(), key=lambda item: item[0][0]
+        )
+    ]
+    lines = []
+    for key, kind, help_text in POOL_METRICS:
+        name = f'{METRICS_PREFIX}_db_pool_{key}'
+        if kind == 'counter':
+            name += '_total'
+        lines.extend(header_lines(name, help_text, kind))
+        lines.extend(
+            f'{name}{{{labels}}} {snapshot[key]}'
+            for labels, snapshot in snapshots
+        )
+    name = f'{METRICS_PREFIX}_db_pool_saturation'
+    lines.extend(header_lines(
+        name, 'Доля выданных соединений от максимального размера пула.',
+        'gauge'
+    ))
+    lines.extend(
+        f'{name}{{{labels}}} {snapshot["in_use"] / snapshot["max_size"]!r}'
+        for labels, snapshot in snapshots
+    )
+    name = f'{METRICS_PREFIX}_db_pool_wait_seconds'
+    lines.extend(header_lines(
+        name, 'Время ожидания соединения из пула.', 'histogram'
+    ))
+    for labels, snapshot in snapshots:
+        lines.extend(histogram_lines(name, labels, snapshot['wait_time']))
+    return lines
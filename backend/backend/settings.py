@@ -1,5 +1,7 @@
 import os
+import sys
 
+from datetime import timedelta
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,6 +41,31 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Замеры производительности запросов: заголовок Server-Timing
+# и гистограммы по маршрутам для /api/metrics/.
+PERFORMANCE_METRICS = (
+    os.getenv('PERFORMANCE_METRICS', 'false').lower() == 'true'
+)
+if PERFORMANCE_METRICS:
+    MIDDLEWARE.insert(0, 'api.middleware.PerformanceMiddleware')
+
+# Запуск тестов через manage.py test.
+TESTING = sys.argv[1:2] == ['test']
+# Поиск повторяющихся запросов к БД и бюджеты запросов представлений.
+QUERY_INSPECTOR = (
+    os.getenv('QUERY_INSPECTOR', str(DEBUG or TESTING)).lower() == 'true'
+)
+QUERY_BUDGET_STRICT = (
+    os.getenv('QUERY_BUDGET_STRICT', str(TESTING)).lower() == 'true'
+)
+if QUERY_INSPECTOR:
+    MIDDLEWARE.insert(0, 'api.middleware.QueryInspectorMiddleware')
+
+# Асинхронные варианты представлений для чтения, включаются под ASGI.
+ASYNC_READ_VIEWS = (
+    os.getenv('ASYNC_READ_VIEWS', 'false').lower() == 'true'
+)
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -71,6 +98,53 @@ DATABASES = {
     }
 }
 
+# Режим соединений с БД: none - соединение на запрос, persistent -
+# постоянное соединение на поток, pool - общий пул соединений процесса.
+# Соединений с БД открывается не больше процессов * DB_POOL_MAX_SIZE.
+DB_CONNECTION_MODE = os.getenv('DB_CONNECTION_MODE', 'none')
+if DB_CONNECTION_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.getenv('DB_CONN_MAX_AGE', 60)
+    )
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONNECTION_MODE == 'pool':
+    DATABASES['default']['ENGINE'] = 'backend.postgresql_pool'
+    DATABASES['default']['POOL'] = {
+        'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'IDLE_TIMEOUT': float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+        'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+        'CHECK_INTERVAL': float(os.getenv('DB_POOL_CHECK_INTERVAL', 30)),
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Время жизни кэшей (в секундах), 0 - не кэшировать представления рецептов.
+RECIPE_CACHE_TIMEOUT = int(os.getenv('RECIPE_CACHE_TIMEOUT', 60 * 60))
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', 24 * 60 * 60)
+)
+# Время жизни страниц списка рецептов для анонимных пользователей,
+# 0 - не кэшировать.
+RECIPE_LIST_CACHE_TIMEOUT = int(os.getenv('RECIPE_LIST_CACHE_TIMEOUT', 5 * 60))
+SHORT_LINK_NEGATIVE_TIMEOUT = int(
+    os.getenv('SHORT_LINK_NEGATIVE_TIMEOUT', 60)
+)
+SHOPPING_LIST_FONT_PATH = os.getenv(
+    'SHOPPING_LIST_FONT_PATH',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+# Кол-во коротких ссылок в кэше переадресации процесса.
+SHORT_LINK_CACHE_SIZE = int(os.getenv('SHORT_LINK_CACHE_SIZE', 10000))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -105,15 +179,57 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = '/media/'
 
+# Конфигурация полнотекстового поиска PostgreSQL для рецептов.
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'russian')
+
+# Обработка загружаемых изображений.
+IMAGE_UPLOAD_MAX_SIZE = int(
+    os.getenv('IMAGE_UPLOAD_MAX_SIZE', 5 * 1024 * 1024)
+)
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+IMAGE_VARIANT_FORMAT = os.getenv('IMAGE_VARIANT_FORMAT', 'WEBP')
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', 85))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Режим аутентификации API: token - токен из БД на каждый запрос,
+# cached_token - токен с кэшем процесса, jwt - JWT без обращения к БД
+# (токены по-прежнему принимаются). Кэш токенов работает только
+# с общим для процессов CACHE_BACKEND.
+AUTH_MODE = os.getenv('AUTH_MODE', 'token')
+AUTHENTICATION_CLASSES = {
+    'token': ['rest_framework.authentication.TokenAuthentication'],
+    'cached_token': ['api.authentication.CachedTokenAuthentication'],
+    'jwt': [
+        'api.authentication.StatelessJWTAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+}
+# Время жизни записи кэша токенов (в секундах) и ее макс. кол-во.
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        seconds=int(os.getenv('JWT_ACCESS_TOKEN_LIFETIME', 5 * 60))
+    ),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        seconds=int(os.getenv('JWT_REFRESH_TOKEN_LIFETIME', 24 * 60 * 60))
+    ),
+    'CHECK_REVOKE_TOKEN': True,
+    'TOKEN_REFRESH_SERIALIZER': 'api.authentication.UserTokenRefreshSerializer',
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+    'DEFAULT_AUTHENTICATION_CLASSES': AUTHENTICATION_CLASSES[AUTH_MODE],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageLimitPagination',
@@ -1,14 +1,19 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
 from api.views import RecipeRedirectView
 
+recipe_redirect = RecipeRedirectView.as_view()
+if settings.ASYNC_READ_VIEWS:
+    from api.async_views import async_read_view, recipe_redirect as handler
+
+    recipe_redirect = async_read_view(recipe_redirect, handler)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls', namespace='api')),
     path(
-        's/<str:short_link>/', RecipeRedirectView.as_view(),
-        name='recipe-redirect'
+        's/<str:short_link>/', recipe_redirect, name='recipe-redirect'
     ),
 ]
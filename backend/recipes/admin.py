@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models import Q
 
+from api.recipe_search import search_recipes
 from .models import (Favorite, Ingredient, RecipeIngredients, Recipe,
                      ShoppingCart, Tag)
 
@@ -16,9 +18,22 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('name', 'author__username', 'tags__name')
     inlines = [RecipeIngredientInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Метод для поиска рецептов в админке.
+        Название, описание, ингредиенты и теги ищутся по полнотекстовому
+        индексу, автор - по точному совпадению имени пользователя.
+        """
+        if not search_term:
+            return queryset, False
+        found = search_recipes(Recipe.objects.all(), search_term)
+        return queryset.filter(
+            Q(pk__in=found.values('pk')) | Q(author__username=search_term)
+        ), False
+
     @admin.display(description='Число добавлений в избранное рецепта')
     def added_in_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
 
 @admin.register(Ingredient)
@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Favorite, Recipe, ShoppingCart
+
+# Счетчики рецепта и модели, строки которых они считают.
+COUNTERS = {
+    'favorites_count': Favorite,
+    'in_carts_count': ShoppingCart,
+}
+COUNTER_FIELDS = {model: field for field, model in COUNTERS.items()}
+
+
+def change_counter(recipe_id, field, delta):
+    """Функция для атомарного изменения счетчика рецепта."""
+    Recipe.objects.filter(pk=recipe_id).update(**{field: F(field) + delta})
+
+
+def expected_counters():
+    """Функция для расчета счетчиков рецептов по связям с нуля."""
+    counters = {}
+    for field, model in COUNTERS.items():
+        for recipe_id, total in model.objects.values(
+            'recipe_id'
+        ).annotate(total=Count('id')).values_list('recipe_id', 'total'):
+            counters.setdefault(recipe_id, dict.fromkeys(COUNTERS, 0))
+            counters[recipe_id][field] = total
+    return counters
+
+
+def find_mismatches():
+    """
+    Функция для поиска расхождений сохраненных и расчетных счетчиков.
+    Возвращает словарь {id рецепта: (сохранено, ожидается)}.
+    """
+    expected = expected_counters()
+    mismatches = {}
+    for recipe_id, *stored in Recipe.objects.values_list(
+        'id', *COUNTERS
+    ).iterator():
+        stored = dict(zip(COUNTERS, stored))
+        should_be = expected.get(recipe_id, dict.fromkeys(COUNTERS, 0))
+        if stored != should_be:
+            mismatches[recipe_id] = (stored, should_be)
+    return mismatches
+
+
+@transaction.atomic
+def reconcile(batch_size=1000):
+    """Функция для исправления расходящихся счетчиков рецептов."""
+    mismatches = find_mismatches()
+    Recipe.objects.bulk_update(
+        [
+            Recipe(pk=recipe_id, **expected)
+            for recipe_id, (_, expected) in mismatches.items()
+        ],
+        list(COUNTERS), batch_size=batch_size
+    )
+    return mismatches
@@ -0,0 +1,224 @@
+import random
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from api.cache import bump_version, recipe_cache
+from api.constants import (
+    INGREDIENT_CATALOG_VERSION_KEY, TAG_CATALOG_VERSION_KEY, TAG_MASK_BITS
+)
+from users.models import Subscription
+from . import counters, shopping_list
+from .models import (
+    Favorite, Ingredient, Recipe, RecipeIngredients, RecipeTags,
+    ShoppingCart, Tag
+)
+from .search import update_search_documents
+from .tag_masks import update_tag_masks
+from .utils import encode_short_link
+
+User = get_user_model()
+
+# Префикс имен пользователей синтетического набора данных.
+SEED_USERNAME_PREFIX = 'seed_user_'
+# Пароль всех пользователей синтетического набора данных.
+SEED_PASSWORD = 'seed-password'
+# Единицы измерения ингредиентов набора данных.
+UNITS = ('г', 'кг', 'мл', 'л', 'шт', 'ст. л.', 'ч. л.')
+# Слова для названий и описаний рецептов.
+WORDS = (
+    'борщ', 'суп', 'салат', 'пирог', 'каша', 'рагу', 'котлеты', 'паста',
+    'запеканка', 'блины', 'соус', 'курица', 'говядина', 'рыба', 'овощи',
+    'грибы', 'сыр', 'томаты', 'картофель', 'рис', 'острый', 'сладкий',
+    'домашний', 'быстрый', 'праздничный', 'постный', 'летний', 'зимний',
+)
+
+
+def batches(iterable, size):
+    """Генератор списков из не более чем size элементов."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class DatasetBuilder:
+    """
+    Построение воспроизводимого синтетического набора данных.
+    Все записи создаются пакетными вставками, после чего
+    производные данные (маски тегов, короткие ссылки, счетчики,
+    списки покупок и поисковые документы) пересчитываются целиком.
+    """
+
+    def __init__(self, users=1000, recipes=10000, tags=8, ingredients=2000,
+                 subscriptions=10, favorites=20, carts=5,
+                 ingredients_per_recipe=(3, 10), seed=42, batch_size=1000,
+                 progress=None):
+        self.sizes = {
+            'users': users, 'recipes': recipes, 'tags': tags,
+            'ingredients': ingredients, 'subscriptions': subscriptions,
+            'favorites': favorites, 'carts': carts,
+        }
+        self.ingredients_per_recipe = ingredients_per_recipe
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+        self.stats = {}
+
+    def report(self, name, count):
+        self.stats[name] = self.stats.get(name, 0) + count
+        self.progress(f'{name}: {self.stats[name]}')
+
+    def create_tags(self):
+        tags = Tag.objects.bulk_create(
+            Tag(
+                name=f'Тег {number}', slug=f'seed-tag-{number}',
+                bit=number if number < TAG_MASK_BITS else None
+            )
+            for number in range(self.sizes['tags'])
+        )
+        self.report('tags', len(tags))
+        return [tag.pk for tag in tags]
+
+    def create_ingredients(self):
+        ids = []
+        for batch in batches(range(self.sizes['ingredients']),
+                             self.batch_size):
+            ids.extend(
+                ingredient.pk for ingredient in
+                Ingredient.objects.bulk_create(
+                    Ingredient(
+                        name=f'Ингредиент {number}',
+                        measurement_unit=UNITS[number % len(UNITS)]
+                    )
+                    for number in batch
+                )
+            )
+            self.report('ingredients', len(batch))
+        return ids
+
+    def create_users(self):
+        password = make_password(SEED_PASSWORD)
+        ids = []
+        for batch in batches(range(self.sizes['users']), self.batch_size):
+            ids.extend(
+                user.pk for user in User.objects.bulk_create(
+                    User(
+                        username=f'{SEED_USERNAME_PREFIX}{number}',
+                        email=f'{SEED_USERNAME_PREFIX}{number}@example.com',
+                        first_name='Пользователь', last_name=str(number),
+                        password=password
+                    )
+                    for number in batch
+                )
+            )
+            self.report('users', len(batch))
+        return ids
+
+    def sample_pairs(self, user_ids, targets, per_user, exclude_self=False):
+        """Генератор уникальных пар (пользователь, объект)."""
+        for user_id in user_ids:
+            candidates = self.random.sample(
+                targets, min(per_user + exclude_self, len(targets))
+            )
+            if exclude_self:
+                candidates = [
+                    target for target in candidates if target != user_id
+                ]
+            yield from (
+                (user_id, target) for target in candidates[:per_user]
+            )
+
+    def create_subscriptions(self, user_ids):
+        pairs = self.sample_pairs(
+            user_ids, user_ids, self.sizes['subscriptions'],
+            exclude_self=True
+        )
+        for batch in batches(pairs, self.batch_size):
+            Subscription.objects.bulk_create(
+                Subscription(follower_id=follower, followed_id=followed)
+                for follower, followed in batch
+            )
+            self.report('subscriptions', len(batch))
+
+    def create_recipes(self, user_ids, tag_ids, ingredient_ids):
+        recipe_ids = []
+        low, high = self.ingredients_per_recipe
+        for batch in batches(range(self.sizes['recipes']), self.batch_size):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    # Первый рецепт принадлежит первому пользователю,
+                    # чтобы у него был рецепт для сценариев изменения.
+                    author_id=(
+                        user_ids[0] if number == 0
+                        else self.random.choice(user_ids)
+                    ),
+                    name=' '.join(self.random.sample(WORDS, 3)).capitalize(),
+                    text=' '.join(self.random.choices(WORDS, k=30)),
+                    cooking_time=self.random.randint(5, 180)
+                )
+                for number in batch
+            )
+            RecipeTags.objects.bulk_create(
+                RecipeTags(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe in recipes
+                for tag_id in self.random.sample(
+                    tag_ids, self.random.randint(1, min(3, len(tag_ids)))
+                )
+            )
+            RecipeIngredients.objects.bulk_create(
+                RecipeIngredients(
+                    recipe_id=recipe.pk, ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500)
+                )
+                for recipe in recipes
+                for ingredient_id in self.random.sample(
+                    ingredient_ids,
+                    self.random.randint(low, min(high, len(ingredient_ids)))
+                )
+            )
+            Recipe.objects.bulk_update(
+                [
+                    Recipe(pk=recipe.pk, short_link=encode_short_link(
+                        recipe.pk
+                    ))
+                    for recipe in recipes
+                ],
+                ['short_link']
+            )
+            update_tag_masks(recipe.pk for recipe in recipes)
+            recipe_ids.extend(recipe.pk for recipe in recipes)
+            self.report('recipes', len(recipes))
+        return recipe_ids
+
+    def create_user_recipes(self, model, name, user_ids, recipe_ids):
+        pairs = self.sample_pairs(user_ids, recipe_ids, self.sizes[name])
+        for batch in batches(pairs, self.batch_size):
+            model.objects.bulk_create(
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id, recipe_id in batch
+            )
+            self.report(name, len(batch))
+
+    @transaction.atomic
+    def build(self):
+        """Метод для создания набора данных и пересчета производных."""
+        tag_ids = self.create_tags()
+        ingredient_ids = self.create_ingredients()
+        user_ids = self.create_users()
+        self.create_subscriptions(user_ids)
+        recipe_ids = self.create_recipes(user_ids, tag_ids, ingredient_ids)
+        self.create_user_recipes(Favorite, 'favorites', user_ids, recipe_ids)
+        self.create_user_recipes(ShoppingCart, 'carts', user_ids, recipe_ids)
+        self.progress('Пересчет производных данных.')
+        counters.reconcile(self.batch_size)
+        shopping_list.rebuild(batch_size=self.batch_size)
+        update_search_documents()
+        bump_version(TAG_CATALOG_VERSION_KEY)
+        bump_version(INGREDIENT_CATALOG_VERSION_KEY)
+        recipe_cache.bump_catalog_version()
+        return self.stats
@@ -0,0 +1,300 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import bump_version, recipe_cache
+from .search import schedule_search_update
+from .tag_masks import assign_tag_bits
+
+# Размер блока чтения файла JSON.
+JSON_CHUNK_SIZE: int = 64 * 1024
+# Пробельные символы и разделители между элементами массива JSON.
+JSON_SEPARATORS: str = ' \t\r\n,'
+
+
+def iter_json(file, key):
+    """
+    Генератор записей из файла JSON без загрузки его целиком.
+    Поддерживает массив верхнего уровня и объект вида {key: [...]}.
+    Объект без ключа key считается ошибкой, а не пустым справочником.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(JSON_CHUNK_SIZE)
+    start = buffer.lstrip()[:1]
+    if start == '{':
+        while f'"{key}"' not in buffer:
+            chunk = file.read(JSON_CHUNK_SIZE)
+            if not chunk:
+                raise CommandError(f'В файле не найден ключ "{key}".')
+            buffer += chunk
+        buffer = buffer[buffer.index(f'"{key}"'):]
+    while '[' not in buffer:
+        chunk = file.read(JSON_CHUNK_SIZE)
+        if not chunk:
+            raise CommandError('В файле не найден массив записей.')
+        buffer += chunk
+    buffer = buffer[buffer.index('[') + 1:]
+    eof = False
+    while True:
+        buffer = buffer.lstrip(JSON_SEPARATORS)
+        if buffer.startswith(']'):
+            return
+        try:
+            row, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Файл JSON поврежден или обрезан.')
+            chunk = file.read(JSON_CHUNK_SIZE)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield row
+        buffer = buffer[end:]
+
+
+def iter_ndjson(file, key):
+    """Генератор записей из файла NDJSON (одна запись в строке)."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_csv(file, fields):
+    """
+    Генератор записей из файла CSV.
+    Первая строка считается заголовком, если совпадает с именами полей.
+    """
+    reader = csv.reader(file)
+    first = next(reader, None)
+    if first is None:
+        return
+    if [column.strip() for column in first] != list(fields):
+        yield dict(zip(fields, first))
+    for row in reader:
+        if row:
+            yield dict(zip(fields, row))
+
+
+class CatalogImporter:
+    """
+    Пакетная идемпотентная загрузка справочника.
+    Для каждого пакета одним запросом загружаются существующие записи,
+    после чего новые и измененные записи сохраняются одним
+    INSERT ... ON CONFLICT DO UPDATE по уникальному полю.
+    Записи, нарушающие уникальность других полей, пропускаются
+    и попадают в отчет conflicts.
+    bulk_create не вызывает сигналы моделей, поэтому поисковые
+    документы рецептов с измененными записями пересчитываются здесь.
+    """
+
+    def __init__(self, model, key_field, value_fields, batch_size=1000,
+                 dry_run=False):
+        self.model = model
+        self.key_field = key_field
+        self.value_fields = value_fields
+        self.fields = (key_field, *value_fields)
+        self.unique_fields = tuple(
+            field for field in value_fields
+            if model._meta.get_field(field).unique
+        )
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = {
+            'processed': 0, 'created': 0, 'updated': 0, 'unchanged': 0,
+            'invalid': 0, 'conflicts': 0,
+        }
+        self.diff = []
+        self.conflicts = []
+
+    def clean(self, row):
+        """Метод для проверки и нормализации записи."""
+        if not isinstance(row, dict):
+            return None
+        values = tuple(
+            str(row.get(field) or '').strip() for field in self.fields
+        )
+        if not all(values):
+            return None
+        return values
+
+    def find_conflicts(self, batch):
+        """
+        Метод для поиска записей, значение уникального поля которых
+        уже занято записью с другим ключом в БД или в пакете.
+        Возвращает словарь {ключ: (поле, ключ занявшей записи)}.
+        """
+        conflicts = {}
+        for field in self.unique_fields:
+            index = self.fields.index(field)
+            taken = [values[index] for values in batch.values()]
+            owners = dict(
+                self.model.objects.filter(
+                    **{f'{field}__in': taken}
+                ).values_list(field, self.key_field)
+            )
+            for key, values in batch.items():
+                owner = owners.setdefault(values[index], key)
+                if owner != key and key not in conflicts:
+                    conflicts[key] = (field, owner)
+        return conflicts
+
+    def import_batch(self, rows):
+        batch = {}
+        for row in rows:
+            values = self.clean(row)
+            if values is None:
+                self.stats['invalid'] += 1
+                continue
+            batch[values[0]] = values
+        existing = {
+            values[0]: values
+            for values in self.model.objects.filter(
+                **{f'{self.key_field}__in': batch}
+            ).values_list(*self.fields)
+        }
+        changed, updated = [], []
+        conflicts = self.find_conflicts(batch)
+        for key, values in batch.items():
+            current = existing.get(key)
+            if current == values:
+                self.stats['unchanged'] += 1
+                continue
+            if key in conflicts:
+                self.stats['conflicts'] += 1
+                self.conflicts.append((values, *conflicts[key]))
+                continue
+            sign = '+' if current is None else '~'
+            self.stats['created' if current is None else 'updated'] += 1
+            if self.dry_run:
+                self.diff.append((sign, values))
+            if current is not None:
+                updated.append(key)
+            changed.append(self.model(**dict(zip(self.fields, values))))
+        if changed and not self.dry_run:
+            self.model.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=[self.key_field],
+                update_fields=list(self.value_fields),
+            )
+            if updated:
+                schedule_search_update(self.recipe_ids(updated))
+        return len(batch)
+
+    def recipe_ids(self, keys):
+        """Метод для получения id рецептов с указанными записями."""
+        return self.model.objects.filter(
+            **{f'{self.key_field}__in': keys}, recipes__isnull=False
+        ).values_list('recipes', flat=True)
+
+    def run(self, rows, progress=None):
+        rows = iter(rows)
+        with transaction.atomic():
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch)
+                self.stats['processed'] += len(batch)
+                if progress is not None:
+                    progress(self.stats)
+        return self.stats
+
+
+class TagImporter(CatalogImporter):
+    """
+    Загрузка тегов с присвоением битов маски новым тегам.
+    bulk_create не вызывает Tag.save, поэтому биты присваиваются
+    после каждого пакета в транзакции загрузки.
+    """
+
+    def import_batch(self, rows):
+        count = super().import_batch(rows)
+        if not self.dry_run:
+            assign_tag_bits()
+        return count
+
+
+class BaseImportCommand(BaseCommand):
+    """Базовая команда для загрузки справочника из JSON, NDJSON или CSV."""
+
+    model = None
+    key_field = None
+    value_fields = ()
+    json_key = None
+    default_path = None
+    importer_class = CatalogImporter
+    catalog_version_key = None
+    readers = {'json': iter_json, 'ndjson': iter_ndjson, 'jsonl': iter_ndjson}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=self.default_path,
+            help='Путь до файла с данными.'
+        )
+        parser.add_argument(
+            '--format', choices=('json', 'ndjson', 'csv'),
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Кол-во записей в одном пакете.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Показать изменения без записи в БД.'
+        )
+
+    def get_rows(self, file, file_format):
+        if file_format == 'csv':
+            return iter_csv(file, (self.key_field, *self.value_fields))
+        if file_format not in self.readers:
+            raise CommandError(f'Неизвестный формат файла: {file_format}.')
+        return self.readers[file_format](file, self.json_key)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}.')
+        file_format = (
+            options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        )
+        importer = self.importer_class(
+            self.model, self.key_field, self.value_fields,
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+        )
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8', newline='') as file:
+            stats = importer.run(
+                self.get_rows(file, file_format), progress=self.progress
+            )
+        elapsed = time.monotonic() - started
+        for values, field, owner in importer.conflicts:
+            self.stderr.write(self.style.WARNING(
+                f'! {" | ".join(values)}: значение поля {field} '
+                f'уже занято записью {owner}, запись пропущена.'
+            ))
+        if options['dry_run']:
+            for sign, values in importer.diff:
+                self.stdout.write(f'{sign} {" | ".join(values)}')
+        elif stats['created'] or stats['updated']:
+            bump_version(self.catalog_version_key)
+            recipe_cache.bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано: {stats["processed"]}, '
+            f'создано: {stats["created"]}, '
+            f'обновлено: {stats["updated"]}, '
+            f'без изменений: {stats["unchanged"]}, '
+            f'пропущено: {stats["invalid"]}, '
+            f'конфликтов: {stats["conflicts"]} '
+            f'за {elapsed:.2f} с.'
+            + (' (пробный запуск)' if options['dry_run'] else '')
+        ))
+
+    def progress(self, stats):
+        self.stderr.write(f'Обработано записей: {stats["processed"]}')
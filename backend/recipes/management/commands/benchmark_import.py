@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.importers import CatalogImporter, iter_json
+from recipes.models import Ingredient
+
+# Единицы измерения синтетических ингредиентов.
+UNITS = ('г', 'кг', 'мл', 'л', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу')
+
+
+def write_catalog(path, rows, shift=0):
+    """
+    Функция для записи синтетического справочника ингредиентов.
+    shift меняет единицы измерения, чтобы записи считались измененными.
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'ingredients': [
+            {
+                'name': f'Синтетический ингредиент {number}',
+                'measurement_unit': UNITS[(number + shift) % len(UNITS)],
+            }
+            for number in range(rows)
+        ]}, file, ensure_ascii=False)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет загрузку синтетического справочника ингредиентов: '
+        'создание, повторную загрузку без изменений и обновление'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=100000,
+            help='Кол-во записей в справочнике.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Кол-во записей в одном пакете.'
+        )
+        parser.add_argument(
+            '--output', help='Путь для сохранения отчета.'
+        )
+
+    def run(self, path, batch_size):
+        importer = CatalogImporter(
+            Ingredient, 'name', ('measurement_unit',), batch_size=batch_size
+        )
+        started = time.perf_counter()
+        with open(path, encoding='utf-8') as file:
+            stats = importer.run(iter_json(file, 'ingredients'))
+        elapsed = time.perf_counter() - started
+        return dict(
+            stats, seconds=round(elapsed, 3),
+            rows_per_second=round(stats['processed'] / elapsed)
+        )
+
+    def handle(self, *args, **options):
+        rows, batch_size = options['rows'], options['batch_size']
+        report = {}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'ingredients.json')
+            # Загрузки выполняются в транзакции с откатом,
+            # поэтому замер не меняет данные в БД.
+            with transaction.atomic():
+                write_catalog(path, rows)
+                report['create'] = self.run(path, batch_size)
+                report['unchanged'] = self.run(path, batch_size)
+                write_catalog(path, rows, shift=1)
+                report['update'] = self.run(path, batch_size)
+                transaction.set_rollback(True)
+        for name, result in report.items():
+            self.stdout.write(
+                f'{name}: {result["seconds"]} с, '
+                f'{result["rows_per_second"]} записей/с, '
+                f'создано: {result["created"]}, '
+                f'обновлено: {result["updated"]}, '
+                f'без изменений: {result["unchanged"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            self.stdout.write(f'Отчет сохранен: {options["output"]}.')
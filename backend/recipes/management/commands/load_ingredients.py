@@ -1,40 +1,16 @@
-import json
 import os
-from django.core.management.base import BaseCommand
-from recipes.models import Ingredient
-
 
-class Command(BaseCommand):
-    help = 'Загружает ингредиенты в БД из формата JSON'
-
-    def handle(self, *args, **kwargs):
-        file_path = os.path.join('data', 'ingredients.json')
+from api.constants import INGREDIENT_CATALOG_VERSION_KEY
+from recipes.importers import BaseImportCommand
+from recipes.models import Ingredient
 
-        if not os.path.exists(file_path):
-            self.stdout.write(self.style.ERROR('Файл не найден.'))
-            return
 
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+class Command(BaseImportCommand):
+    help = 'Загружает ингредиенты в БД из формата JSON, NDJSON или CSV'
 
-        for ingredient_data in data.get('ingredients', []):
-            ingredient, created = Ingredient.objects.get_or_create(
-                name=ingredient_data['name'],
-                measurement_unit=ingredient_data['measurement_unit']
-            )
-            if created:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Ингредиент "{ingredient.name}" создан'
-                    )
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'Ингредиент "{ingredient.name}" уже существует.'
-                    )
-                )
-        self.stdout.write(
-            self.style.SUCCESS('Ингредиенты успешно загружены.'
-                               )
-        )
+    model = Ingredient
+    key_field = 'name'
+    value_fields = ('measurement_unit',)
+    json_key = 'ingredients'
+    default_path = os.path.join('data', 'ingredients.json')
+    catalog_version_key = INGREDIENT_CATALOG_VERSION_KEY
@@ -1,38 +1,17 @@
-import json
 import os
-from django.core.management.base import BaseCommand
-from recipes.models import Tag
-
 
-class Command(BaseCommand):
-    help = 'Загружает тэги в БД из формата JSON'
-
-    def handle(self, *args, **kwargs):
-        file_path = os.path.join('data', 'tags.json')
+from api.constants import TAG_CATALOG_VERSION_KEY
+from recipes.importers import BaseImportCommand, TagImporter
+from recipes.models import Tag
 
-        if not os.path.exists(file_path):
-            self.stdout.write(self.style.ERROR('Файл не найден.'))
-            return
 
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+class Command(BaseImportCommand):
+    help = 'Загружает тэги в БД из формата JSON, NDJSON или CSV'
 
-        for tags_data in data.get('tags', []):
-            tag, created = Tag.objects.get_or_create(
-                name=tags_data['name'],
-                slug=tags_data['slug']
-            )
-            if created:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Тэг "{tag.name}" создан'
-                    )
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'Тэг "{tag.name}" уже существует.'
-                    )
-                )
-        self.stdout.write(
-            self.style.SUCCESS('Тэги успешно загружены.'))
+    model = Tag
+    key_field = 'slug'
+    value_fields = ('name',)
+    json_key = 'tags'
+    default_path = os.path.join('data', 'tags.json')
+    catalog_version_key = TAG_CATALOG_VERSION_KEY
+    importer_class = TagImporter
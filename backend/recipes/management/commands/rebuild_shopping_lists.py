@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import shopping_list
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и проверяет агрегированные списки покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='Только проверить списки без пересчета.'
+        )
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='Ограничить обработку пользователем с указанным id.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if not options['verify_only']:
+            total = shopping_list.rebuild(user_ids)
+            self.stdout.write(f'Пересчитано позиций: {total}.')
+        mismatches = shopping_list.find_mismatches(user_ids)
+        for (user_id, ingredient_id), (stored, expected) in sorted(
+            mismatches.items()
+        )[:20]:
+            self.stdout.write(self.style.WARNING(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'сохранено {stored}, ожидается {expected}.'
+            ))
+        if mismatches:
+            raise CommandError(f'Найдено расхождений: {len(mismatches)}.')
+        self.stdout.write(
+            self.style.SUCCESS('Списки покупок совпадают с корзинами.')
+        )
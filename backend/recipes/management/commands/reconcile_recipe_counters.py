@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и исправляет счетчики избранного и корзин рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help='Только проверить счетчики без исправления.'
+        )
+
+    def handle(self, *args, **options):
+        if options['verify_only']:
+            mismatches = counters.find_mismatches()
+        else:
+            mismatches = counters.reconcile()
+        for recipe_id, (stored, expected) in sorted(
+            mismatches.items()
+        )[:20]:
+            self.stdout.write(self.style.WARNING(
+                f'Рецепт {recipe_id}: сохранено {stored}, '
+                f'ожидается {expected}.'
+            ))
+        if options['verify_only'] and mismatches:
+            raise CommandError(f'Найдено расхождений: {len(mismatches)}.')
+        if mismatches:
+            self.stdout.write(
+                f'Исправлено счетчиков рецептов: {len(mismatches)}.'
+            )
+        self.stdout.write(
+            self.style.SUCCESS('Счетчики рецептов совпадают со связями.')
+        )
@@ -0,0 +1,63 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.dataset import SEED_USERNAME_PREFIX, DatasetBuilder
+
+User = get_user_model()
+
+# Готовые размеры набора данных, например для замера поиска на 1M рецептов.
+PRESETS = {
+    'search-1m': {
+        'users': 100000, 'recipes': 1000000, 'ingredients': 2000,
+        'batch_size': 5000,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Создает воспроизводимый синтетический набор данных'
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 1000, 'Кол-во пользователей.'),
+            ('recipes', 10000, 'Кол-во рецептов.'),
+            ('tags', 8, 'Кол-во тегов.'),
+            ('ingredients', 2000, 'Кол-во ингредиентов.'),
+            ('subscriptions', 10, 'Кол-во подписок на пользователя.'),
+            ('favorites', 20, 'Кол-во избранных рецептов на пользователя.'),
+            ('carts', 5, 'Кол-во рецептов в корзине на пользователя.'),
+            ('seed', 42, 'Начальное значение генератора случайных чисел.'),
+            ('batch-size', 1000, 'Кол-во записей в одном пакете.'),
+        ):
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=help_text)
+        parser.add_argument(
+            '--preset', choices=PRESETS,
+            help='Готовый размер набора, заменяет заданные количества.'
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(
+            username__startswith=SEED_USERNAME_PREFIX
+        ).exists():
+            raise CommandError(
+                'Синтетический набор данных уже создан в этой БД.'
+            )
+        options.update(PRESETS.get(options['preset'], {}))
+        builder = DatasetBuilder(
+            users=options['users'], recipes=options['recipes'],
+            tags=options['tags'], ingredients=options['ingredients'],
+            subscriptions=options['subscriptions'],
+            favorites=options['favorites'], carts=options['carts'],
+            seed=options['seed'], batch_size=options['batch_size'],
+            progress=self.stderr.write,
+        )
+        started = time.monotonic()
+        stats = builder.build()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{name}: {count}' for name, count in stats.items())
+            + f' за {elapsed:.2f} с.'
+        ))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:48
+
+from django.db import migrations, models
+
+from recipes.utils import encode_short_link
+
+
+def deduplicate_short_links(apps, schema_editor):
+    """
+    Присвоение кодов из id рецептам без короткой ссылки и всем,
+    кроме первого, рецептам с повторяющейся ссылкой.
+    Существующие уникальные ссылки сохраняются.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    seen = set()
+    changed = []
+    for recipe in Recipe.objects.order_by('id').only('id', 'short_link'):
+        if recipe.short_link and recipe.short_link not in seen:
+            seen.add(recipe.short_link)
+            continue
+        recipe.short_link = encode_short_link(recipe.id)
+        changed.append(recipe)
+    Recipe.objects.bulk_update(changed, ['short_link'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_link',
+            field=models.CharField(blank=True, editable=False, max_length=6, null=True, verbose_name='Короткая ссылка'),
+        ),
+        migrations.RunPython(
+            deduplicate_short_links, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_link',
+            field=models.CharField(blank=True, editable=False, max_length=6, null=True, unique=True, verbose_name='Короткая ссылка'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:50
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# Кол-во тегов, учитываемых в битовой маске тегов рецепта.
+TAG_MASK_BITS = 63
+
+
+def fill_tag_masks(apps, schema_editor):
+    """Присвоение битов тегам и расчет масок тегов рецептов."""
+    Tag = apps.get_model('recipes', 'Tag')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeTags = apps.get_model('recipes', 'RecipeTags')
+    tags = list(Tag.objects.order_by('id')[:TAG_MASK_BITS])
+    for bit, tag in enumerate(tags):
+        tag.bit = bit
+    Tag.objects.bulk_update(tags, ['bit'])
+    masks = defaultdict(int)
+    for recipe_id, bit in RecipeTags.objects.filter(
+        tag__bit__isnull=False
+    ).values_list('recipe_id', 'tag__bit').iterator():
+        masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        [
+            Recipe(pk=recipe_id, tags_mask=mask)
+            for recipe_id, mask in masks.items()
+        ],
+        ['tags_mask'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_alter_recipe_short_link'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Битовая маска тегов'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Бит в маске тегов рецепта'),
+        ),
+        migrations.RunPython(fill_tag_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:52
+
+from django.conf import settings
+import django.contrib.postgres.search
+from django.db import migrations
+
+from recipes.search import DOCUMENT_SQL
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Заполнение поисковых документов и создание GIN-индекса.
+    Выполняется только на PostgreSQL, для других БД поиск
+    работает по индексу в памяти процесса.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        DOCUMENT_SQL, {'config': settings.SEARCH_CONFIG}
+    )
+    schema_editor.execute(
+        'CREATE INDEX recipe_search_document_idx ON recipe '
+        'USING gin (search_document)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX recipe_search_document_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_tag_masks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый документ'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
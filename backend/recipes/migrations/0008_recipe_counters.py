@@ -0,0 +1,45 @@
+# Generated by Django 4.2.16 on 2026-10-18 01:55
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import django.db.models.expressions
+
+
+def fill_counters(apps, schema_editor):
+    """Заполнение счетчиков избранного и корзин по текущим связям."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for field, model_name in (
+        ('favorites_count', 'Favorite'), ('in_carts_count', 'ShoppingCart')
+    ):
+        model = apps.get_model('recipes', model_name)
+        counts = model.objects.filter(recipe=OuterRef('pk')).order_by(
+        ).values('recipe').annotate(total=Count('id')).values('total')
+        Recipe.objects.update(
+            **{field: Coalesce(Subquery(counts), Value(0))}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipe_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число добавлений в корзины'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('favorites_count'), '+', models.F('in_carts_count')), descending=True), models.OrderBy(models.F('id'), descending=True), name='recipe_popularity_idx'),
+        ),
+    ]
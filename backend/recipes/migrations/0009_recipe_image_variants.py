@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:52
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+from api.constants import RECIPE_IMAGE_VARIANTS
+from api.images import variant_name
+
+
+def mark_processed(apps, schema_editor):
+    """Отметка изображений, для которых варианты уже созданы."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    for pk, name in Recipe.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).values_list('pk', 'image').iterator():
+        if all(
+            default_storage.exists(variant_name(name, variant))
+            for variant in RECIPE_IMAGE_VARIANTS
+        ):
+            Recipe.objects.filter(pk=pk).update(image_variants=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Картинка с созданными вариантами'),
+        ),
+        migrations.RunPython(mark_processed, migrations.RunPython.noop),
+    ]
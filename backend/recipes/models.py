@@ -1,15 +1,17 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
 
 from api.constants import (
     TAG_NAME_MAX_LENGTH, INGREDIENT_NAME_MAX_LENGTH,
     INGREDIENT_UNIT_MAX_LENGTH, RECIPE_NAME_MAX_LENGTH,
     COOKING_TIME_MIN_VALUE, COOKING_TIME_ERROR_MESSAGE,
     AMOUNT_OF_INGREDIENT_MIN_VALUE,
-    AMOUNT_OF_INGREDIENT_MIN_VALUE_ERROR_MESSAGE, MAX_LENGTH_SHORT_LINK
+    AMOUNT_OF_INGREDIENT_MIN_VALUE_ERROR_MESSAGE, MAX_LENGTH_SHORT_LINK,
+    TAG_MASK_BITS
 )
-from .utils import generate_short_link
+from .utils import encode_short_link
 
 
 User = get_user_model()
@@ -26,10 +28,39 @@ class Tag(models.Model):
         verbose_name='Уникальный слаг', max_length=TAG_NAME_MAX_LENGTH,
         unique=True
     )
+    bit = models.PositiveSmallIntegerField(
+        verbose_name='Бит в маске тегов рецепта', unique=True, null=True,
+        blank=True, editable=False
+    )
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Метод для сохранения тега.
+        Тегу без бита присваивается первый свободный бит маски,
+        если свободных битов нет, тег фильтруется через связи.
+        Маски рецептов пересчитываются обработчиком сигнала post_save
+        в той же транзакции.
+        """
+        with transaction.atomic():
+            if self.bit is None:
+                used = set(
+                    Tag.objects.filter(bit__isnull=False).values_list(
+                        'bit', flat=True
+                    )
+                )
+                self.bit = next(
+                    (bit for bit in range(TAG_MASK_BITS) if bit not in used),
+                    None
+                )
+                if kwargs.get('update_fields') is not None:
+                    kwargs['update_fields'] = {
+                        *kwargs['update_fields'], 'bit'
+                    }
+            super().save(*args, **kwargs)
+
     class Meta:
         db_table = 'tag'
         verbose_name = 'Тег'
@@ -59,6 +90,10 @@ class Ingredient(models.Model):
         ordering = ['name']
 
 
+# Популярность рецепта: число добавлений в избранное и в корзины.
+POPULARITY = models.F('favorites_count') + models.F('in_carts_count')
+
+
 class Recipe(models.Model):
     """Модель для рецептов."""
 
@@ -79,6 +114,10 @@ class Recipe(models.Model):
         verbose_name='Путь до картинки', blank=True,
         upload_to='recipes/images/'
     )
+    image_variants = models.CharField(
+        verbose_name='Картинка с созданными вариантами', max_length=100,
+        blank=True, editable=False
+    )
     text = models.TextField(
         verbose_name='Описание'
     )
@@ -91,13 +130,54 @@ class Recipe(models.Model):
         ]
     )
     short_link = models.CharField(
-        verbose_name='Короткая ссылка', default=generate_short_link,
-        max_length=MAX_LENGTH_SHORT_LINK
+        verbose_name='Короткая ссылка', max_length=MAX_LENGTH_SHORT_LINK,
+        unique=True, null=True, blank=True, editable=False
+    )
+    tags_mask = models.BigIntegerField(
+        verbose_name='Битовая маска тегов', default=0, editable=False
+    )
+    search_document = SearchVectorField(
+        verbose_name='Поисковый документ', null=True, editable=False
+    )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Число добавлений в избранное', default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Число добавлений в корзины', default=0,
+        editable=False
+    )
+
+    # Поля, вычисляемые по связям рецепта, счетчики и отметка
+    # обработчика изображений.
+    DERIVED_FIELDS = (
+        'tags_mask', 'search_document', 'favorites_count', 'in_carts_count',
+        'image_variants'
     )
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Метод для сохранения рецепта.
+        Новому рецепту присваивается короткая ссылка из его id.
+        Маска тегов и поисковый документ поддерживаются в БД отдельно
+        и не перезаписываются значениями из загруженного объекта.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        if not self.short_link:
+            self.short_link = encode_short_link(self.pk)
+            Recipe.objects.filter(pk=self.pk).update(
+                short_link=self.short_link
+            )
+
     def get_absolute_url(self) -> str:
         return f'/recipes/{self.pk}/'
 
@@ -107,6 +187,13 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='recipe_name_id_idx'),
+            models.Index(
+                POPULARITY.desc(), models.F('id').desc(),
+                name='recipe_popularity_idx'
+            ),
+        ]
 
 
 class RecipeTags(models.Model):
@@ -178,6 +265,36 @@ class ShoppingCart(models.Model):
         return f'{self.user} добавил {self.recipe} в список покупок.'
 
 
+class ShoppingListItem(models.Model):
+    """
+    Модель для агрегированного списка покупок пользователя.
+    Хранит суммарное количество каждого ингредиента по всем рецептам
+    из списка покупок и поддерживается при изменении корзины и рецептов.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, verbose_name='Ингредиент',
+    )
+    amount = models.IntegerField(verbose_name='Общее количество')
+
+    class Meta:
+        db_table = 'shopping_list_item'
+        default_related_name = 'shopping_list_items'
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'], name='unique_shopping_list_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} - {self.amount}'
+
+
 class Favorite(models.Model):
     """ Модель для Избранных рецептов."""
 
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import connection, transaction
+
+from api.cache import bump_version
+from api.constants import RECIPE_SEARCH_VERSION_KEY
+
+# Поисковый документ рецепта: название (вес A), описание (вес B),
+# названия ингредиентов и тегов (вес C).
+DOCUMENT_SQL = (
+    "UPDATE recipe SET search_document = "
+    "setweight(to_tsvector(%(config)s::regconfig, name), 'A') || "
+    "setweight(to_tsvector(%(config)s::regconfig, text), 'B') || "
+    "setweight(to_tsvector(%(config)s::regconfig, concat_ws(' ', "
+    "(SELECT string_agg(ingredient.name, ' ') FROM recipe_ingredients "
+    "JOIN ingredient ON ingredient.id = recipe_ingredients.ingredient_id "
+    "WHERE recipe_ingredients.recipe_id = recipe.id), "
+    "(SELECT string_agg(tag.name, ' ') FROM recipe_tags "
+    "JOIN tag ON tag.id = recipe_tags.tag_id "
+    "WHERE recipe_tags.recipe_id = recipe.id))), 'C')"
+)
+
+
+def has_search_document():
+    """Функция для проверки поддержки поискового документа в БД."""
+    return connection.vendor == 'postgresql'
+
+
+def update_search_documents(recipe_ids=None):
+    """
+    Функция для пересчета поисковых документов рецептов.
+    Без PostgreSQL сбрасывается версия индекса в памяти процесса.
+    :param recipe_ids: id рецептов, по умолчанию все рецепты.
+    """
+    if recipe_ids is not None:
+        recipe_ids = list(set(recipe_ids))
+        if not recipe_ids:
+            return
+    if not has_search_document():
+        bump_version(RECIPE_SEARCH_VERSION_KEY)
+        return
+    sql, params = DOCUMENT_SQL, {'config': settings.SEARCH_CONFIG}
+    if recipe_ids is not None:
+        sql += ' WHERE id = ANY(%(ids)s)'
+        params['ids'] = recipe_ids
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def schedule_search_update(recipe_ids):
+    """
+    Функция для пересчета поисковых документов после фиксации
+    транзакции, когда ингредиенты и теги рецепта уже сохранены.
+    """
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: update_search_documents(recipe_ids))
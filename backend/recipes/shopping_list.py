@@ -0,0 +1,136 @@
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from .models import RecipeIngredients, ShoppingCart, ShoppingListItem
+
+# Прибавление количества к существующей позиции списка покупок.
+UPSERT_SQL = (
+    'INSERT INTO shopping_list_item (user_id, ingredient_id, amount) '
+    '{select} '
+    'ON CONFLICT (user_id, ingredient_id) DO UPDATE '
+    'SET amount = shopping_list_item.amount + excluded.amount'
+)
+# Ингредиенты рецептов для пользователя с указанным знаком количества.
+# Список id передается через IN, поддерживаемый всеми СУБД проекта.
+RECIPE_ITEMS_SELECT = (
+    'SELECT %s, ingredient_id, %s * SUM(amount) FROM recipe_ingredients '
+    'WHERE recipe_id IN ({placeholders}) GROUP BY ingredient_id'
+)
+# Изменение ингредиента рецепта для всех пользователей с ним в корзине.
+CART_USERS_SELECT = (
+    'SELECT user_id, %s, %s FROM shopping_cart WHERE recipe_id = %s'
+)
+
+
+def remove_empty_items(**filters):
+    """Функция для удаления позиций с нулевым количеством."""
+    ShoppingListItem.objects.filter(amount__lte=0, **filters).delete()
+
+
+def add_recipes(user_id, recipe_ids, sign=1):
+    """Функция для добавления ингредиентов рецептов в список покупок."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    select = RECIPE_ITEMS_SELECT.format(
+        placeholders=', '.join(['%s'] * len(recipe_ids))
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            UPSERT_SQL.format(select=select), [user_id, sign, *recipe_ids]
+        )
+    if sign < 0:
+        remove_empty_items(user_id=user_id)
+
+
+def add_recipe(user_id, recipe_id, sign=1):
+    """Функция для добавления ингредиентов рецепта в список покупок."""
+    add_recipes(user_id, [recipe_id], sign)
+
+
+def remove_recipe(user_id, recipe_id):
+    """Функция для вычитания ингредиентов рецепта из списка покупок."""
+    add_recipe(user_id, recipe_id, sign=-1)
+
+
+def apply_ingredient_deltas(recipe_id, deltas):
+    """
+    Функция для учета изменения ингредиентов рецепта
+    в списках покупок всех пользователей, добавивших рецепт.
+    :param deltas: словарь {id ингредиента: изменение количества}.
+    """
+    deltas = {
+        ingredient_id: delta for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not deltas:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            UPSERT_SQL.format(select=CART_USERS_SELECT),
+            [
+                [ingredient_id, delta, recipe_id]
+                for ingredient_id, delta in deltas.items()
+            ]
+        )
+    remove_empty_items(ingredient_id__in=deltas)
+
+
+def expected_items(user_ids=None):
+    """Функция для расчета списков покупок по корзинам с нуля."""
+    carts = ShoppingCart.objects.all()
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+    rows = RecipeIngredients.objects.filter(
+        recipe__shopping_cart__in=carts
+    ).values(
+        'recipe__shopping_cart__user_id', 'ingredient_id'
+    ).annotate(total=Sum('amount')).order_by()
+    return {
+        (row['recipe__shopping_cart__user_id'], row['ingredient_id']):
+            row['total']
+        for row in rows.iterator()
+    }
+
+
+def stored_items(user_ids=None):
+    """Функция для получения сохраненных списков покупок."""
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in items.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        ).iterator()
+    }
+
+
+def find_mismatches(user_ids=None):
+    """Функция для поиска расхождений сохраненных и расчетных списков."""
+    expected, stored = expected_items(user_ids), stored_items(user_ids)
+    return {
+        key: (stored.get(key), expected.get(key))
+        for key in expected.keys() | stored.keys()
+        if stored.get(key) != expected.get(key)
+    }
+
+
+@transaction.atomic
+def rebuild(user_ids=None, batch_size=1000):
+    """Функция для полного пересчета списков покупок."""
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    items.delete()
+    expected = expected_items(user_ids)
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, amount=amount
+            )
+            for (user_id, ingredient_id), amount in expected.items()
+        ),
+        batch_size=batch_size
+    )
+    return len(expected)
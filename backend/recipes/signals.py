@@ -0,0 +1,322 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.cache import (
+    bump_recipe_shopping_lists, bump_shopping_list_versions, bump_version,
+    recipe_cache, short_link_cache, token_user_cache
+)
+from api.constants import (
+    INGREDIENT_CATALOG_VERSION_KEY, RECIPE_AUTHOR_FIELDS,
+    TAG_CATALOG_VERSION_KEY
+)
+from . import shopping_list
+from .counters import COUNTER_FIELDS, change_counter
+from .search import schedule_search_update
+from .tag_masks import (
+    recipes_with_bit, tag_recipe_ids, update_tag_masks
+)
+from .models import (
+    Favorite, Ingredient, Recipe, RecipeIngredients, RecipeTags,
+    ShoppingCart, Tag
+)
+from .utils import encode_short_link
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    """Сброс версии рецепта при его изменении или удалении."""
+    recipe_cache.bump_recipe_version(instance.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def discard_short_link(sender, instance, **kwargs):
+    """
+    Удаление короткой ссылки рецепта из кэша переадресации,
+    в том числе закэшированного промаха для кода нового рецепта.
+    """
+    short_link_cache.discard(
+        instance.short_link or encode_short_link(instance.pk)
+    )
+
+
+@receiver(post_save, sender=RecipeTags)
+@receiver(post_delete, sender=RecipeTags)
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+def invalidate_recipe_relation(sender, instance, **kwargs):
+    """Сброс версии рецепта при изменении его тегов или ингредиентов."""
+    recipe_cache.bump_recipe_version(instance.recipe_id)
+
+
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+def invalidate_recipe_shopping_lists(sender, instance, **kwargs):
+    """Сброс списков покупок при изменении ингредиентов рецепта."""
+    bump_recipe_shopping_lists(instance.recipe_id)
+
+
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def invalidate_shopping_list(sender, instance, **kwargs):
+    """Сброс списка покупок пользователя при изменении его корзины."""
+    bump_shopping_list_versions([instance.user_id])
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Добавление ингредиентов рецепта в агрегированный список покупок."""
+    if created:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    """
+    Вычитание ингредиентов рецепта из агрегированного списка покупок.
+    Выполняется до удаления, пока ингредиенты рецепта еще существуют.
+    """
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_save, sender=RecipeIngredients)
+def remember_recipe_ingredient(sender, instance, **kwargs):
+    """Сохранение прежнего значения ингредиента рецепта."""
+    instance._previous = None
+    if instance.pk is not None:
+        instance._previous = RecipeIngredients.objects.filter(
+            pk=instance.pk
+        ).values_list('ingredient_id', 'amount').first()
+
+
+@receiver(post_save, sender=RecipeIngredients)
+def update_shopping_lists(sender, instance, **kwargs):
+    """Учет изменения ингредиента рецепта в списках покупок."""
+    deltas = {instance.ingredient_id: instance.amount}
+    previous = getattr(instance, '_previous', None)
+    if previous is not None:
+        ingredient_id, amount = previous
+        deltas[ingredient_id] = deltas.get(ingredient_id, 0) - amount
+    shopping_list.apply_ingredient_deltas(instance.recipe_id, deltas)
+
+
+@receiver(pre_delete, sender=RecipeIngredients)
+def subtract_from_shopping_lists(sender, instance, origin=None, **kwargs):
+    """
+    Учет удаления ингредиента рецепта в списках покупок.
+    При удалении самого рецепта ингредиенты вычитаются вместе
+    с позициями корзины, поэтому здесь пропускаются.
+    """
+    if getattr(origin, 'model', type(origin)) is not RecipeIngredients:
+        return
+    shopping_list.apply_ingredient_deltas(
+        instance.recipe_id, {instance.ingredient_id: -instance.amount}
+    )
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipe_m2m(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """Сброс версии рецепта при массовом изменении связей."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipe_cache.bump_recipe_version(instance.pk)
+        return
+    for recipe_id in pk_set or ():
+        recipe_cache.bump_recipe_version(recipe_id)
+    if action == 'post_clear':
+        recipe_cache.bump_catalog_version()
+
+
+@receiver(post_save, sender=RecipeTags)
+@receiver(post_delete, sender=RecipeTags)
+def update_recipe_tag_mask(sender, instance, **kwargs):
+    """Пересчет маски тегов рецепта при изменении его тега."""
+    update_tag_masks([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_recipe_tag_masks(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Пересчет масок тегов при массовом изменении тегов рецептов."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_tag_masks([instance.pk])
+    elif action == 'post_clear':
+        if instance.bit is not None:
+            update_tag_masks(recipes_with_bit(instance.bit))
+    else:
+        update_tag_masks(pk_set)
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_bit(sender, instance, **kwargs):
+    """Сохранение прежнего бита тега."""
+    instance._previous_bit = None
+    if instance.pk is not None:
+        instance._previous_bit = Tag.objects.filter(
+            pk=instance.pk
+        ).values_list('bit', flat=True).first()
+
+
+@receiver(post_save, sender=Tag)
+def update_tag_bit_masks(sender, instance, created, **kwargs):
+    """
+    Пересчет масок рецептов тега, получившего бит или сменившего его,
+    например тега, загруженного без бита через bulk_create.
+    """
+    previous = getattr(instance, '_previous_bit', None)
+    if created or previous == instance.bit:
+        return
+    recipe_ids = set(tag_recipe_ids([instance.pk]))
+    if previous is not None:
+        recipe_ids.update(recipes_with_bit(previous))
+    update_tag_masks(recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_catalog(sender, **kwargs):
+    """
+    Сброс версии каталога при изменении тегов или ингредиентов
+    после фиксации транзакции, чтобы справочники и индексы
+    не перестраивались по еще не измененным данным.
+    """
+    recipe_cache.bump_catalog_version()
+    key = (
+        INGREDIENT_CATALOG_VERSION_KEY if sender is Ingredient
+        else TAG_CATALOG_VERSION_KEY
+    )
+    transaction.on_commit(lambda: bump_version(key))
+
+
+@receiver(pre_save, sender=User)
+def remember_author(sender, instance, update_fields=None, **kwargs):
+    """
+    Сохранение прежних данных пользователя, входящих в представление
+    автора рецепта и в список покупок.
+    """
+    instance._previous_author = None
+    fields = [
+        field for field in RECIPE_AUTHOR_FIELDS
+        if update_fields is None or field in update_fields
+    ]
+    if fields and not instance._state.adding:
+        instance._previous_author = User.objects.filter(
+            pk=instance.pk
+        ).values(*fields).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created, **kwargs):
+    """
+    Сброс версий рецептов автора и его списка покупок
+    только при изменении данных, входящих в них.
+    """
+    previous = getattr(instance, '_previous_author', None)
+    if created or not previous:
+        return
+    if all(
+        getattr(instance, field) == value
+        for field, value in previous.items()
+    ):
+        return
+    recipe_cache.bump_author_versions(instance.pk)
+    bump_shopping_list_versions([instance.pk])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    """
+    Сброс кэша аутентификации при изменении пользователя,
+    в том числе при смене пароля и деактивации.
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    token_user_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Сброс кэша аутентификации при выходе пользователя."""
+    token_user_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def update_recipe_search_document(sender, instance, update_fields=None,
+                                  **kwargs):
+    """
+    Пересчет поискового документа при изменении рецепта,
+    кроме отметки о созданных вариантах изображения.
+    """
+    if update_fields is not None and set(update_fields) == {'image_variants'}:
+        return
+    schedule_search_update([instance.pk])
+
+
+@receiver(post_save, sender=RecipeTags)
+@receiver(post_delete, sender=RecipeTags)
+@receiver(post_save, sender=RecipeIngredients)
+@receiver(post_delete, sender=RecipeIngredients)
+def update_relation_search_document(sender, instance, **kwargs):
+    """Пересчет поискового документа при изменении тегов и ингредиентов."""
+    schedule_search_update([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_m2m_search_documents(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """
+    Пересчет поисковых документов при массовом изменении связей.
+    При очистке связей со стороны тега или ингредиента рецепты
+    запоминаются до удаления связей.
+    """
+    if not reverse and action.startswith('post_'):
+        schedule_search_update([instance.pk])
+    elif reverse and action == 'pre_clear':
+        schedule_search_update(
+            instance.recipes.values_list('id', flat=True)
+        )
+    elif reverse and action in ('post_add', 'post_remove'):
+        schedule_search_update(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def update_catalog_search_documents(sender, instance, created, **kwargs):
+    """Пересчет поисковых документов рецептов после переименования."""
+    if not created:
+        schedule_search_update(
+            instance.recipes.values_list('id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    """Увеличение счетчика рецепта при добавлении в избранное/корзину."""
+    if created:
+        change_counter(instance.recipe_id, COUNTER_FIELDS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    """Уменьшение счетчика рецепта при удалении из избранного/корзины."""
+    change_counter(instance.recipe_id, COUNTER_FIELDS[sender], -1)
@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.db.models import F
+
+from api.constants import TAG_MASK_BITS
+from .models import Recipe, RecipeTags, Tag
+
+
+def update_tag_masks(recipe_ids):
+    """
+    Функция для пересчета битовых масок тегов рецептов
+    по текущим связям рецептов и тегов.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    masks = defaultdict(int)
+    for recipe_id, bit in RecipeTags.objects.filter(
+        recipe_id__in=recipe_ids, tag__bit__isnull=False
+    ).values_list('recipe_id', 'tag__bit'):
+        masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        [
+            Recipe(pk=recipe_id, tags_mask=masks[recipe_id])
+            for recipe_id in recipe_ids
+        ],
+        ['tags_mask']
+    )
+
+
+def recipes_with_bit(bit):
+    """Функция для получения id рецептов с указанным битом в маске."""
+    return Recipe.objects.alias(
+        tag_match=F('tags_mask').bitand(1 << bit)
+    ).filter(tag_match__gt=0).values_list('id', flat=True)
+
+
+def tag_recipe_ids(tag_ids):
+    """Функция для получения id рецептов с указанными тегами."""
+    return RecipeTags.objects.filter(tag_id__in=tag_ids).values_list(
+        'recipe_id', flat=True
+    )
+
+
+def assign_tag_bits():
+    """
+    Функция для присвоения свободных битов маски тегам без бита,
+    например сохраненным через bulk_create, с пересчетом масок
+    их рецептов. Возвращает кол-во тегов, получивших бит.
+    """
+    used = set(
+        Tag.objects.filter(bit__isnull=False).values_list('bit', flat=True)
+    )
+    free = [bit for bit in range(TAG_MASK_BITS) if bit not in used]
+    tags = [
+        Tag(pk=tag_id, bit=bit)
+        for tag_id, bit in zip(
+            Tag.objects.filter(bit__isnull=True).order_by('id').values_list(
+                'id', flat=True
+            ),
+            free
+        )
+    ]
+    if tags:
+        Tag.objects.bulk_update(tags, ['bit'])
+        update_tag_masks(tag_recipe_ids([tag.pk for tag in tags]))
+    return len(tags)
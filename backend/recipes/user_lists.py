@@ -0,0 +1,125 @@
+from django.db import connection, transaction
+from django.db.models import F
+
+from api.cache import bump_shopping_list_versions
+from . import shopping_list
+from .counters import COUNTER_FIELDS
+from .models import Recipe, ShoppingCart
+
+# Добавление существующих рецептов без повторов.
+ADD_SQL = (
+    'INSERT INTO {table} (user_id, recipe_id) '
+    'SELECT %s, id FROM recipe WHERE id = ANY(%s) '
+    'ON CONFLICT (user_id, recipe_id) DO NOTHING RETURNING recipe_id'
+)
+# Удаление рецептов пользователя.
+REMOVE_SQL = (
+    'DELETE FROM {table} WHERE user_id = %s AND recipe_id = ANY(%s) '
+    'RETURNING recipe_id'
+)
+# Изменение счетчика рецептов, затронутых запросом changed,
+# с возвратом полей для ShortRecipeSerializer.
+CHANGE_SQL = (
+    'WITH changed AS ({change}) '
+    'UPDATE recipe SET {counter} = {counter} + %s FROM changed '
+    'WHERE recipe.id = changed.recipe_id '
+    'RETURNING recipe.id, recipe.name, recipe.image, recipe.image_variants, '
+    'recipe.cooking_time'
+)
+
+
+def change_recipes(model, user_id, recipe_ids, sign):
+    """
+    Функция для добавления (sign=1) или удаления (sign=-1) рецептов
+    в избранном или корзине пользователя.
+    Повторное добавление и удаление отсутствующих рецептов пропускаются
+    без ошибки уникальности при одновременных запросах.
+    Возвращает измененные рецепты в порядке recipe_ids.
+    """
+    if connection.vendor == 'postgresql':
+        if model is ShoppingCart:
+            # Список покупок меняется в одной транзакции с корзиной.
+            with transaction.atomic():
+                recipes = _change_recipes(model, user_id, recipe_ids, sign)
+        else:
+            recipes = _change_recipes(model, user_id, recipe_ids, sign)
+    else:
+        recipes = _change_recipes_orm(model, user_id, recipe_ids, sign)
+    order = {recipe_id: index for index, recipe_id in enumerate(recipe_ids)}
+    return sorted(recipes, key=lambda recipe: order[recipe.id])
+
+
+def _change_recipes(model, user_id, recipe_ids, sign):
+    """
+    Изменение одним запросом с CTE, изменяющим данные (PostgreSQL).
+    Сигналы моделей не вызываются, поэтому их действия выполняются
+    здесь: счетчики рецептов меняются тем же запросом, список покупок
+    и его кэш - после него.
+    """
+    quote_name = connection.ops.quote_name
+    counter = quote_name(COUNTER_FIELDS[model])
+    sql = CHANGE_SQL.format(
+        change=(ADD_SQL if sign > 0 else REMOVE_SQL).format(
+            table=quote_name(model._meta.db_table)
+        ),
+        counter=counter
+    )
+    recipes = list(Recipe.objects.raw(sql, [user_id, recipe_ids, sign]))
+    _change_shopping_list(
+        model, user_id, [recipe.id for recipe in recipes], sign
+    )
+    return recipes
+
+
+@transaction.atomic
+def _change_recipes_orm(model, user_id, recipe_ids, sign):
+    """
+    Изменение через ORM для SQLite и других СУБД, используемых
+    при разработке. Записи создаются одним bulk_create и удаляются
+    одним запросом без сигналов моделей, поэтому счетчики рецептов
+    меняются одним UPDATE, а список покупок и его кэш - одним
+    изменением на весь запрос.
+    """
+    queryset = model.objects.filter(user_id=user_id, recipe_id__in=recipe_ids)
+    existing = set(queryset.values_list('recipe_id', flat=True))
+    if sign > 0:
+        changed = list(
+            Recipe.objects.filter(id__in=recipe_ids).exclude(
+                id__in=existing
+            ).values_list('id', flat=True)
+        )
+        model.objects.bulk_create(
+            [model(user_id=user_id, recipe_id=recipe_id)
+             for recipe_id in changed],
+            ignore_conflicts=True
+        )
+    else:
+        changed = list(existing)
+        queryset._raw_delete(queryset.db)
+    if not changed:
+        return []
+    counter = COUNTER_FIELDS[model]
+    Recipe.objects.filter(id__in=changed).update(
+        **{counter: F(counter) + sign}
+    )
+    _change_shopping_list(model, user_id, changed, sign)
+    return list(
+        Recipe.objects.filter(id__in=changed).only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time'
+        )
+    )
+
+
+def _change_shopping_list(model, user_id, recipe_ids, sign):
+    """Изменение списка покупок и его кэша вслед за корзиной."""
+    if model is ShoppingCart and recipe_ids:
+        shopping_list.add_recipes(user_id, recipe_ids, sign)
+        bump_shopping_list_versions([user_id])
+
+
+def add_recipes(model, user_id, recipe_ids):
+    return change_recipes(model, user_id, recipe_ids, 1)
+
+
+def remove_recipes(model, user_id, recipe_ids):
+    return change_recipes(model, user_id, recipe_ids, -1)
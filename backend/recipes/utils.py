@@ -1,32 +1,194 @@
+import csv
+import os
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
 from uuid import uuid4
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
 
-from api.constants import MAX_LENGTH_SHORT_LINK
+from api.constants import MAX_LENGTH_SHORT_LINK, SHORT_LINK_ALPHABET
 
 
 def generate_short_link():
-    """Функция для генерации короткой ссылки."""
+    """
+    Функция для генерации случайной короткой ссылки.
+    Используется только в ранних миграциях.
+    """
     return uuid4().hex[:MAX_LENGTH_SHORT_LINK]
 
 
-def create_report_of_shopping_list(user, ingredients):
-    """Функция для генерации отчета списка покупок для скачивания."""
-    today = datetime.today()
-    shopping_list = (
-        f'Список покупок для: {user.get_full_name()}\n\n'
-        f'Дата: {today:%Y-%m-%d}\n\n'
-    )
-    shopping_list += '\n'.join([
+def encode_short_link(number):
+    """
+    Функция для кодирования id рецепта в короткую ссылку base62.
+    Коды длиной до 5 символов (id меньше 62 ** 5) не пересекаются
+    со старыми случайными 6-символьными кодами.
+    """
+    base = len(SHORT_LINK_ALPHABET)
+    code = ''
+    while True:
+        number, remainder = divmod(number, base)
+        code = SHORT_LINK_ALPHABET[remainder] + code
+        if not number:
+            return code
+
+
+def format_ingredient(ingredient):
+    """Функция для форматирования строки ингредиента."""
+    return (
         f'- {ingredient["ingredient__name"]} '
         f'({ingredient["ingredient__measurement_unit"]})'
         f' - {ingredient["amount"]}'
-        for ingredient in ingredients
-    ])
-    shopping_list += f'\n\nFoodgram ({today:%Y})'
+    )
+
+
+def txt_report(user, ingredients, today):
+    """Генератор списка покупок в текстовом формате."""
+    yield (
+        f'Список покупок для: {user.get_full_name()}\n\n'
+        f'Дата: {today:%Y-%m-%d}\n\n'
+    ).encode()
+    separator = ''
+    for ingredient in ingredients:
+        yield f'{separator}{format_ingredient(ingredient)}'.encode()
+        separator = '\n'
+    yield f'\n\nFoodgram ({today:%Y})'.encode()
+
+
+class Echo:
+    """Псевдобуфер, возвращающий записанную строку для csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_report(user, ingredients, today):
+    """Генератор списка покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        ('Ингредиент', 'Единица измерения', 'Количество')
+    ).encode()
+    for ingredient in ingredients:
+        yield writer.writerow((
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['amount'],
+        )).encode()
+
+
+class PDFTemplate:
+    """
+    Шаблон PDF-документа списка покупок.
+    Шрифт регистрируется и параметры разметки вычисляются
+    один раз на процесс.
+    """
+
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    title_size = 16
+    margin = 50
+    line_height = 18
 
-    filename = f'{user.username}_shopping_list.txt'
-    response = HttpResponse(shopping_list, content_type='text/plain')
+    def __init__(self, font_path):
+        if os.path.exists(font_path):
+            pdfmetrics.registerFont(TTFont(self.font_name, font_path))
+        else:
+            self.font_name = 'Helvetica'
+        self.width, self.height = A4
+        self.top = self.height - self.margin
+
+    def new_page(self, pdf):
+        pdf.setFont(self.font_name, self.font_size)
+        return self.top
+
+    def render(self, user, ingredients, today):
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+        pdf.setFont(self.font_name, self.title_size)
+        pdf.drawString(
+            self.margin, self.top,
+            f'Список покупок для: {user.get_full_name()}'
+        )
+        y = self.top - self.line_height * 2
+        pdf.setFont(self.font_name, self.font_size)
+        pdf.drawString(self.margin, y, f'Дата: {today:%Y-%m-%d}')
+        y -= self.line_height * 2
+        for ingredient in ingredients:
+            if y < self.margin:
+                pdf.showPage()
+                y = self.new_page(pdf)
+            pdf.drawString(self.margin, y, format_ingredient(ingredient))
+            y -= self.line_height
+        pdf.drawString(self.margin, self.margin / 2, f'Foodgram ({today:%Y})')
+        pdf.save()
+        return buffer.getvalue()
+
+
+@lru_cache(maxsize=None)
+def get_pdf_template():
+    """Функция для получения общего для процесса шаблона PDF."""
+    return PDFTemplate(settings.SHOPPING_LIST_FONT_PATH)
+
+
+def pdf_report(user, ingredients, today):
+    """
+    Генератор списка покупок в формате PDF.
+    Документ собирается целиком, так как PDF содержит таблицу
+    смещений объектов в конце файла.
+    """
+    yield get_pdf_template().render(user, ingredients, today)
+
+
+# Форматы списка покупок: генератор и тип содержимого.
+REPORT_FORMATS = {
+    'txt': (txt_report, 'text/plain; charset=utf-8'),
+    'csv': (csv_report, 'text/csv; charset=utf-8'),
+    'pdf': (pdf_report, 'application/pdf'),
+}
+
+
+def cache_chunks(chunks, cache_key):
+    """Генератор, сохраняющий отданное содержимое в кэш по завершении."""
+    content = []
+    for chunk in chunks:
+        content.append(chunk)
+        yield chunk
+    cache.set(
+        cache_key, b''.join(content),
+        timeout=settings.SHOPPING_LIST_CACHE_TIMEOUT
+    )
+
+
+def attach_filename(response, user, report_format):
+    filename = f'{user.username}_shopping_list.{report_format}'
     response['Content-Disposition'] = f'attachment; filename={filename}'
     return response
+
+
+def create_report_of_shopping_list(user, ingredients, report_format='txt',
+                                   cache_key=None):
+    """
+    Функция для генерации отчета списка покупок для скачивания.
+    Отчет отдается потоком; при указании cache_key готовое
+    содержимое сохраняется в кэш.
+    """
+    generator, content_type = REPORT_FORMATS[report_format]
+    chunks = generator(user, ingredients, datetime.today())
+    if cache_key is not None:
+        chunks = cache_chunks(chunks, cache_key)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    return attach_filename(response, user, report_format)
+
+
+def cached_report_of_shopping_list(user, report_format, content):
+    """Функция для ответа ранее сгенерированным списком покупок."""
+    response = HttpResponse(
+        content, content_type=REPORT_FORMATS[report_format][1]
+    )
+    return attach_filename(response, user, report_format)
@@ -4,6 +4,10 @@
 FIO_MAX_FIELD_LENGTH: int = 150
 # Константа для значения по-умолчанию лимита рецептов.
 RECIPES_LIMIT: int = 10
+# Константа для ошибки некорректного лимита рецептов.
+RECIPES_LIMIT_ERROR_MESSAGE: str = (
+    'Лимит рецептов должен быть целым положительным числом.'
+)
 # Константа ддя ошибки отсутствия аватара.
 CHANGE_AVATAR_ERROR_MESSAGE: str = 'Изображение отсутствует.'
 # Константа для ошибки, если подписка уже существует.
@@ -14,3 +18,9 @@ SUBSCRIBE_SELF_ERROR_MESSAGE: str = 'Нельзя подписаться на с
 SUBSCRIBE_DELETE_ERROR_MESSAGE: str = (
     'Невозможно удалить несуществующую подписку.'
 )
+# Константа для ошибки превышения размера изображения.
+IMAGE_TOO_LARGE_ERROR_MESSAGE: str = (
+    'Размер изображения не должен превышать {} МБ.'
+)
+# Константа для ошибки некорректного формата изображения.
+IMAGE_FORMAT_ERROR_MESSAGE: str = 'Некорректный формат изображения.'
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:52
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+from api.constants import AVATAR_IMAGE_VARIANTS
+from api.images import variant_name
+
+
+def mark_processed(apps, schema_editor):
+    """Отметка изображений, для которых варианты уже созданы."""
+    User = apps.get_model('users', 'User')
+    for pk, name in User.objects.exclude(avatar='').exclude(
+        avatar__isnull=True
+    ).values_list('pk', 'avatar').iterator():
+        if all(
+            default_storage.exists(variant_name(name, variant))
+            for variant in AVATAR_IMAGE_VARIANTS
+        ):
+            User.objects.filter(pk=pk).update(avatar_variants=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_variants',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(mark_processed, migrations.RunPython.noop),
+    ]
@@ -19,6 +19,10 @@ class User(AbstractUser):
         blank=True,
         null=True,
     )
+    # Имя файла аватара, для которого созданы варианты.
+    avatar_variants = models.CharField(
+        max_length=100, blank=True, editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -36,6 +40,17 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Метод для загрузки отложенных полей одним запросом.
+        При обращении к одному отложенному полю загружаются все,
+        например у пользователя из JWT, известного только по id.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = list(deferred)
+        super().refresh_from_db(using, fields)
+
 
 class Subscription(models.Model):
     """Модель подписок."""
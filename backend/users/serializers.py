@@ -5,7 +5,7 @@ from rest_framework import serializers
 from recipes.models import Recipe
 from .constants import RECIPES_LIMIT
 from .models import Subscription
-from .utils import Base64ImageField
+from .utils import Base64ImageField, get_followed_ids
 
 
 # Получение объекта пользователя.
@@ -16,6 +16,9 @@ class MeUserSerializer(DjoserUserSerializer):
     """Сериалайзер под текущего пользователя."""
 
     is_subscribed = serializers.SerializerMethodField()
+    avatar = Base64ImageField(
+        variant='avatar', required=False, allow_null=True
+    )
 
     class Meta:
         model = User
@@ -37,9 +40,9 @@ class UserSerializer(MeUserSerializer):
     """Общий сериалайзер для пользователя."""
 
     def get_is_subscribed(self, obj):
-        request = self.context['request']
-        return Subscription.objects.filter(follower_id=request.user.id,
-                                           followed_id=obj.id).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_followed_ids(self.context.get('request'))
 
 
 class AvatarSerializer(serializers.Serializer):
@@ -51,6 +54,8 @@ class AvatarSerializer(serializers.Serializer):
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор для короткого отображения рецептов у подписчиков."""
 
+    image = Base64ImageField(variant='card', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -62,7 +67,9 @@ class SubscriptionGetSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField(
         method_name='get_is_subscribed')
     recipes = serializers.SerializerMethodField(method_name='get_recipes')
-    recipes_count = serializers.IntegerField(source='recipes.count')
+    recipes_count = serializers.SerializerMethodField(
+        method_name='get_recipes_count')
+    avatar = Base64ImageField(variant='avatar', read_only=True)
 
     class Meta:
         model = User
@@ -79,12 +86,9 @@ class SubscriptionGetSerializer(serializers.ModelSerializer):
         :param obj: объект указанного пользователя.
         :return: возвращает булевое значение, в зависимости от подписки.
         """
-        request = self.context.get('request')
-        if request is None or request.user.is_anonymous:
-            return False
-        return Subscription.objects.filter(
-            follower=request.user, followed=obj
-        ).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.id in get_followed_ids(self.context.get('request'))
 
     def get_recipes(self, obj):
         """
@@ -92,6 +96,8 @@ class SubscriptionGetSerializer(serializers.ModelSerializer):
         :param obj: объект указанного пользователя.
         :return: сериализованный список рецептов.
         """
+        if hasattr(obj, 'limited_recipes'):
+            return RecipeShortSerializer(obj.limited_recipes, many=True).data
         try:
             request = self.context.get('request')
             recipes_limit = request.GET.get('recipes_limit')
@@ -102,6 +108,12 @@ class SubscriptionGetSerializer(serializers.ModelSerializer):
             queryset = queryset[:int(recipes_limit)]
         return RecipeShortSerializer(queryset, many=True).data
 
+    def get_recipes_count(self, obj):
+        """Метод для получения кол-ва рецептов указанного пользователя."""
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return obj.recipes.count()
+
 
 class SubscriptionEditSerializer(serializers.ModelSerializer):
     """Сериалайзер для подписчиков. Только на запись."""
@@ -1,15 +1,75 @@
 import base64
+import binascii
+from uuid import uuid4
+
+from django.conf import settings
 from django.core.files.base import ContentFile
 from rest_framework import serializers
 
+from api.images import variant_url
+from .constants import (
+    IMAGE_FORMAT_ERROR_MESSAGE, IMAGE_TOO_LARGE_ERROR_MESSAGE
+)
+from .models import Subscription
+
+
+def get_followed_ids(request):
+    """
+    Функция для получения id авторов, на которых подписан пользователь.
+    Загружается один раз на запрос и используется всеми сериализаторами.
+    Для анонимного пользователя запрос к БД не выполняется.
+    """
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+    followed_ids = getattr(request, '_followed_ids', None)
+    if followed_ids is None:
+        followed_ids = frozenset(
+            Subscription.objects.filter(
+                follower_id=request.user.id
+            ).values_list('followed_id', flat=True)
+        )
+        request._followed_ids = followed_ids
+    return followed_ids
+
 
 class Base64ImageField(serializers.ImageField):
-    """Кастомный класс для расширения стандартного ImageField."""
+    """
+    Кастомный класс для расширения стандартного ImageField.
+    При указании variant отдает ссылку на уменьшенный вариант изображения.
+    """
+
+    def __init__(self, *args, variant=None, **kwargs):
+        self.variant = variant
+        super().__init__(*args, **kwargs)
 
     def to_internal_value(self, data):
         """Метод для формата base64"""
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
+            try:
+                format, imgstr = data.split(';base64,')
+            except ValueError:
+                raise serializers.ValidationError(IMAGE_FORMAT_ERROR_MESSAGE)
+            max_size = settings.IMAGE_UPLOAD_MAX_SIZE
+            # Проверка размера до декодирования: 4 символа на 3 байта.
+            if len(imgstr) > (max_size + 2) // 3 * 4:
+                raise serializers.ValidationError(
+                    IMAGE_TOO_LARGE_ERROR_MESSAGE.format(
+                        max_size // (1024 * 1024)
+                    )
+                )
+            try:
+                content = base64.b64decode(imgstr, validate=True)
+            except binascii.Error:
+                raise serializers.ValidationError(IMAGE_FORMAT_ERROR_MESSAGE)
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = ContentFile(content, name=f'{uuid4().hex}.{ext}')
         return super().to_internal_value(data)
+
+    def to_representation(self, value):
+        if not value or self.variant is None:
+            return super().to_representation(value)
+        url = variant_url(value, self.variant)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -1,14 +1,21 @@
+from django.db.models import Count, Prefetch, Value
 from django.shortcuts import get_object_or_404
 from djoser import views as djoser_views
 from djoser.permissions import CurrentUserOrAdmin
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from api.constants import AVATAR_IMAGE_VARIANTS
+from api.images import schedule_processing
+from api.pagination import SubscriptionPagination
+from recipes.models import Recipe
 from .constants import (
-    CHANGE_AVATAR_ERROR_MESSAGE, SUBSCRIBE_ERROR_MESSAGE,
-    SUBSCRIBE_DELETE_ERROR_MESSAGE, SUBSCRIBE_SELF_ERROR_MESSAGE
+    CHANGE_AVATAR_ERROR_MESSAGE, RECIPES_LIMIT_ERROR_MESSAGE,
+    SUBSCRIBE_ERROR_MESSAGE, SUBSCRIBE_DELETE_ERROR_MESSAGE,
+    SUBSCRIBE_SELF_ERROR_MESSAGE
 )
 from .models import Subscription, User
 from .serializers import (
@@ -26,6 +33,7 @@ class UserViewSet(djoser_views.UserViewSet):
     serializer_class = UserSerializer
     pagination_class = PageNumberPagination
     pagination_class.page_size_query_param = 'limit'
+    query_budget = {'list': 4, 'retrieve': 4, 'subscriptions': 7}
 
     @action(
         ["get", "put", "patch", "delete"],
@@ -58,6 +66,7 @@ class UserViewSet(djoser_views.UserViewSet):
         avatar_data = serializer.validated_data.get('avatar')
         request.user.avatar = avatar_data
         request.user.save()
+        schedule_processing(request.user.avatar, AVATAR_IMAGE_VARIANTS)
         image_url = request.build_absolute_uri(
             f'/media/users/{avatar_data.name}'
         )
@@ -65,11 +74,32 @@ class UserViewSet(djoser_views.UserViewSet):
             {'avatar': str(image_url)}, status=status.HTTP_200_OK
         )
 
-    @action(['GET'], detail=False, url_path='subscriptions')
+    @action(
+        ['GET'],
+        detail=False,
+        url_path='subscriptions',
+        pagination_class=SubscriptionPagination
+    )
     def subscriptions(self, request):
-        """Метод для управления подписками пользователя."""
+        """
+        Метод для управления подписками пользователя.
+        Кол-во рецептов считается в БД, а первые recipes_limit рецептов
+        всех авторов страницы загружаются одним оконным запросом.
+        """
         user = request.user
-        queryset = User.objects.filter(followings__follower=user)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'image_variants', 'cooking_time',
+            'author_id'
+        )
+        recipes_limit = self.get_recipes_limit(request)
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
+        queryset = User.objects.filter(followings__follower=user).annotate(
+            recipes_count=Count('recipes', distinct=True),
+            is_subscribed=Value(True),
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        ).order_by('id')
         pages = self.paginate_queryset(queryset)
         self.serializer_class = SubscriptionGetSerializer
         serializer = self.get_serializer(
@@ -79,6 +109,17 @@ class UserViewSet(djoser_views.UserViewSet):
         )
         return self.get_paginated_response(serializer.data)
 
+    def get_recipes_limit(self, request):
+        """Метод для разбора и проверки параметра recipes_limit."""
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit is None:
+            return None
+        if not recipes_limit.isdigit() or int(recipes_limit) < 1:
+            raise ValidationError(
+                {'recipes_limit': RECIPES_LIMIT_ERROR_MESSAGE}
+            )
+        return int(recipes_limit)
+
     @action(
         detail=True,
         methods=('POST', 'DELETE'),